@@ -4,10 +4,30 @@ __title__ = "mygeotab-python"
 __author__ = "Geotab Inc."
 __version__ = "0.9.8"
 
+import importlib
+
 from .api import Credentials, server_call
 from .exceptions import MyGeotabException, AuthenticationException, TimeoutException
 
-from .api_async import API, server_call_async
+# The asynchronous API is imported on first use (PEP 562), to keep `import mygeotab` quick
+_LAZY_ATTRIBUTES = {"API": "api_async", "server_call_async": "api_async"}
+_LAZY_MODULES = frozenset(["api_async"])
+
+
+def __getattr__(name):
+    if name in _LAZY_MODULES:
+        return importlib.import_module("." + name, __name__)
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+    value = getattr(importlib.import_module("." + module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES) | _LAZY_MODULES)
+
 
 __all__ = [
     "API",
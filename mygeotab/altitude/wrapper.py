@@ -18,6 +18,7 @@ class AltitudeAPI(API):
         timeout=DEFAULT_TIMEOUT,
         proxies=None,
         cert=None,
+        hooks=None,
     ):
         """
         A wrapper around mygeotab API for altitude users.
@@ -39,6 +40,8 @@ class AltitudeAPI(API):
         :type proxies: dict or None
         :param cert: The path to client certificate. A single path to .pem file or a Tuple (.cer file, .key file).
         :type cert: str or Tuple or None
+        :param hooks: Instrumentation hooks to call before and after each call, and around each job and its steps.
+        :type hooks: list(mygeotab.hooks.CallHook) or None
         :raise Exception: Raises an Exception if a username, or one of the session_id or password is not provided.
         """
         # Overwriting to our new proxy server - backwards compatible for our customers
@@ -52,6 +55,7 @@ class AltitudeAPI(API):
             timeout=timeout,
             proxies=proxies,
             cert=cert,
+            hooks=hooks,
         )
         _ = logging.basicConfig(
             stream=sys.stdout,
@@ -103,16 +107,17 @@ class AltitudeAPI(API):
         creates the job with the given params.
         """
         try:
-            results = self.call_api(
-                function_name="createQueryJob",
-                params=params,
-            )
-            
-            errors = self._extract_errors(resp=results)
-            if errors:
-                raise Exception(errors[0].get("message", "Failed to create the job"))            
-            
-            return results["apiResult"]["results"][0]
+            with self.operation("AltitudeAPI.create_job", service_name=params.get("serviceName")):
+                results = self.call_api(
+                    function_name="createQueryJob",
+                    params=params,
+                )
+
+                errors = self._extract_errors(resp=results)
+                if errors:
+                    raise Exception(errors[0].get("message", "Failed to create the job"))
+
+                return results["apiResult"]["results"][0]
         except Exception as e:
             logging.error(f"Exception: {e}")
             raise e
@@ -129,6 +134,10 @@ class AltitudeAPI(API):
         """
         waits for a job to finish running and returns the job. jobId needs to be included in params.
         """
+        with self.operation("AltitudeAPI.wait_for_job", job_id=params["functionParameters"].get("jobId")):
+            return self._wait_for_job_to_complete(params)
+
+    def _wait_for_job_to_complete(self, params: dict) -> dict:
         while True:
             try:
                 daas_status = self.check_job_status(params)
@@ -184,6 +193,10 @@ class AltitudeAPI(API):
         """
         uses and iterates through fetch_data for the given params, and returns the combined data. jobId needs to be included in params.
         """
+        with self.operation("AltitudeAPI.get_data", job_id=params["functionParameters"].get("jobId")):
+            return self._get_data(params)
+
+    def _get_data(self, params: dict) -> list:
         data = []
         results_iterator = self.fetch_data(params)
         for data_page in results_iterator:
@@ -205,6 +218,10 @@ class AltitudeAPI(API):
         """
         given the parameters, will call the request, wait on it to finish and return the combined data.
         """
+        with self.operation("AltitudeAPI.job", service_name=params.get("serviceName")):
+            return self._do(params)
+
+    def _do(self, params: dict) -> list:
         logging.info(f"creating job")
         job = self.create_job(params)
         logging.info(f"job created: {job}")
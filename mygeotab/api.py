@@ -21,7 +21,9 @@ from urllib3.util.ssl_ import create_urllib3_context
 
 from . import __title__, __version__
 from .exceptions import AuthenticationException, MyGeotabException, TimeoutException
+from .hooks import CallInfo, measure_call, run_hooks, run_operation
 from .parameters import camelcaseify_parameters, convert_get_parameters
+from .profiling import get_profiling_hook
 from .serializers import json_deserialize, json_serialize
 
 DEFAULT_TIMEOUT = 300
@@ -40,6 +42,9 @@ class API(object):
         timeout=DEFAULT_TIMEOUT,
         proxies=None,
         cert=None,
+        intern_ids=False,
+        hooks=None,
+        profile=None,
     ):
         """Initialize the MyGeotab API object with credentials.
 
@@ -59,6 +64,16 @@ class API(object):
         :type proxies: dict or None
         :param cert: The path to client certificate. A single path to .pem file or a Tuple (.cer file, .key file).
         :type cert: str or Tuple or None
+        :param intern_ids: If True, intern entity ids in results and share identical references to other entities
+                           (such as `{"id": "b12"}`) within each result, to save memory on large results. Shared
+                           references must not be changed in place.
+        :type intern_ids: bool
+        :param hooks: Instrumentation hooks to call before and after each call, including authentication.
+        :type hooks: list(mygeotab.hooks.CallHook) or None
+        :param profile: True to profile the calls and write the stats to `mygeotab-<pid>.prof`, or the path of the
+                        stats file. By default, this is set by the `MYGEOTAB_PROFILE` environment variable. See
+                        :func:`mygeotab.profiling.get_profiling_hook`.
+        :type profile: bool or str or None
         :raise Exception: Raises an Exception if a username, or one of the session_id or password is not provided.
         """
         if username is None:
@@ -72,6 +87,11 @@ class API(object):
         self._proxies = proxies
         self.__reauthorize_count = 0
         self._cert = cert
+        self.intern_ids = intern_ids
+        self.hooks = list(hooks or [])
+        profiling_hook = get_profiling_hook(profile)
+        if profiling_hook is not None and profiling_hook not in self.hooks:
+            self.hooks.append(profiling_hook)
 
     @property
     def _server(self):
@@ -88,6 +108,28 @@ class API(object):
         """
         return not any(s in get_api_url(self._server) for s in ["127.0.0.1", "localhost"])
 
+    def _new_call_info(self, method, params):
+        """Creates the details of a call for the hooks.
+
+        :return: The details of the call, or None if there are no hooks.
+        :rtype: CallInfo or None
+        """
+        if not self.hooks:
+            return None
+        return CallInfo(method, params, self.credentials.server, self.__reauthorize_count)
+
+    def operation(self, name, **attributes):
+        """Groups the calls made within it into an operation for the instrumentation hooks, such as a span around
+        several calls when tracing.
+
+        :param name: The name of the operation.
+        :type name: str
+        :param attributes: Details of the operation, such as the type name.
+        :return: A context manager. If there are no hooks, it does nothing.
+        :rtype: contextlib.AbstractContextManager
+        """
+        return run_operation(self.hooks, name, **attributes)
+
     def call(self, method, **parameters):
         """Makes a call to the API.
 
@@ -107,16 +149,20 @@ class API(object):
         if "credentials" not in params and self.credentials.session_id:
             params["credentials"] = self.credentials.get_param()
 
+        call_info = self._new_call_info(method, params)
         try:
-            result = _query(
-                self._server,
-                method,
-                params,
-                self.timeout,
-                verify_ssl=self._is_verify_ssl,
-                proxies=self._proxies,
-                cert=self._cert,
-            )
+            with run_hooks(self.hooks, call_info):
+                result = _query(
+                    self._server,
+                    method,
+                    params,
+                    self.timeout,
+                    verify_ssl=self._is_verify_ssl,
+                    proxies=self._proxies,
+                    cert=self._cert,
+                    intern_ids=self.intern_ids,
+                    call_info=call_info,
+                )
             if result is not None:
                 self.__reauthorize_count = 0
             return result
@@ -224,15 +270,18 @@ class API(object):
                     userName=self.credentials.username,
                     sessionId=self.credentials.session_id,
                 )
-                _query(
-                    self._server,
-                    "ExtendSession",
-                    extend_session_data,
-                    self.timeout,
-                    verify_ssl=self._is_verify_ssl,
-                    proxies=self._proxies,
-                    cert=self._cert,
-                )
+                call_info = self._new_call_info("ExtendSession", extend_session_data)
+                with run_hooks(self.hooks, call_info):
+                    _query(
+                        self._server,
+                        "ExtendSession",
+                        extend_session_data,
+                        self.timeout,
+                        verify_ssl=self._is_verify_ssl,
+                        proxies=self._proxies,
+                        cert=self._cert,
+                        call_info=call_info,
+                    )
                 return self.credentials
 
             auth_data = dict(
@@ -240,15 +289,18 @@ class API(object):
                 userName=self.credentials.username,
                 password=self.credentials.password,
             )
-            result = _query(
-                self._server,
-                "Authenticate",
-                auth_data,
-                self.timeout,
-                verify_ssl=self._is_verify_ssl,
-                proxies=self._proxies,
-                cert=self._cert,
-            )
+            call_info = self._new_call_info("Authenticate", auth_data)
+            with run_hooks(self.hooks, call_info):
+                result = _query(
+                    self._server,
+                    "Authenticate",
+                    auth_data,
+                    self.timeout,
+                    verify_ssl=self._is_verify_ssl,
+                    proxies=self._proxies,
+                    cert=self._cert,
+                    call_info=call_info,
+                )
             if result:
                 if "path" not in result and self.credentials.session_id:
                     # Session was extended
@@ -341,7 +393,17 @@ class GeotabHTTPAdapter(HTTPAdapter):
         )
 
 
-def _query(server, method, parameters, timeout=DEFAULT_TIMEOUT, verify_ssl=True, proxies=None, cert=None):
+def _query(
+    server,
+    method,
+    parameters,
+    timeout=DEFAULT_TIMEOUT,
+    verify_ssl=True,
+    proxies=None,
+    cert=None,
+    intern_ids=False,
+    call_info=None,
+):
     """Formats and performs the query against the API.
 
     :param server: The MyGeotab server.
@@ -358,6 +420,10 @@ def _query(server, method, parameters, timeout=DEFAULT_TIMEOUT, verify_ssl=True,
     :type proxies: dict or None
     :param cert: The path to client certificate. A single path to .pem file or a Tuple (.cer file, .pem file)
     :type cert: str or Tuple or None
+    :param intern_ids: If True, intern entity ids and share identical entity references in the result.
+    :type intern_ids: bool
+    :param call_info: If set, the timings and sizes of the call are recorded in it.
+    :type call_info: mygeotab.hooks.CallInfo or None
     :raise MyGeotabException: Raises when an exception occurs on the MyGeotab server.
     :raise TimeoutException: Raises when the request does not respond after some time.
     :raise urllib2.HTTPError: Raises when there is an HTTP status code that indicates failure.
@@ -366,27 +432,35 @@ def _query(server, method, parameters, timeout=DEFAULT_TIMEOUT, verify_ssl=True,
     api_endpoint = get_api_url(server)
     params = dict(id=-1, method=method, params=parameters or {})
     headers = get_headers()
+    measurement = measure_call(call_info)
+    with measurement.phase("serialize"):
+        data = json_serialize(params)
+    measurement.record(bytes_sent=len(data))
     with requests.Session() as session:
         session.mount("https://", GeotabHTTPAdapter())
         if cert:
             session.cert = cert
         try:
-            response = session.post(
-                api_endpoint,
-                data=json_serialize(params),
-                headers=headers,
-                allow_redirects=True,
-                timeout=timeout,
-                verify=verify_ssl,
-                proxies=proxies,
-            )
+            with measurement.phase("network"):
+                response = session.post(
+                    api_endpoint,
+                    data=data,
+                    headers=headers,
+                    allow_redirects=True,
+                    timeout=timeout,
+                    verify=verify_ssl,
+                    proxies=proxies,
+                )
         except Timeout as exc:
             raise TimeoutException(server) from exc
+    measurement.record(status_code=response.status_code, bytes_received=len(response.content))
     response.raise_for_status()
     content_type = response.headers.get("Content-Type")
     if content_type and "application/json" not in content_type.lower():
         return response.text
-    return _process(json_deserialize(response.text))
+    with measurement.phase("deserialize"):
+        result = _process(json_deserialize(response.text, intern_ids=intern_ids))
+    return measurement.set_result(result)
 
 
 def _process(data):
@@ -11,10 +11,9 @@ import asyncio
 import ssl
 from concurrent.futures import TimeoutError
 
-import aiohttp
-
 from .api import API as SyncAPI, DEFAULT_TIMEOUT, _process, get_api_url, get_headers
 from .exceptions import AuthenticationException, MyGeotabException, TimeoutException
+from .hooks import measure_call, run_hooks
 from .parameters import camelcaseify_parameters, convert_get_parameters
 from .serializers import json_deserialize, json_serialize
 
@@ -32,6 +31,9 @@ class API(SyncAPI):
         timeout=DEFAULT_TIMEOUT,
         proxies=None,
         cert=None,
+        intern_ids=False,
+        hooks=None,
+        profile=None,
     ):
         """
         Initialize the asynchronous MyGeotab API object with credentials.
@@ -44,9 +46,26 @@ class API(SyncAPI):
         :param timeout: The timeout to make the call, in seconds. By default, this is 300 seconds (or 5 minutes).
         :param proxies: The proxies dictionary to apply to the request.
         :param cert: The path to client certificate. A single path to .pem file or a Tuple (.cer file, .pem file)
+        :param intern_ids: If True, intern entity ids in results and share identical references to other entities
+                           (such as `{"id": "b12"}`) within each result. Shared references must not be changed in place.
+        :param hooks: Instrumentation hooks to call before and after each call, including authentication.
+        :param profile: True to profile the calls and write the stats to `mygeotab-<pid>.prof`, or the path of the
+                        stats file. By default, this is set by the `MYGEOTAB_PROFILE` environment variable.
         :raise Exception: Raises an Exception if a username, or one of the session_id or password is not provided.
         """
-        super().__init__(username, password, database, session_id, server, timeout, proxies=proxies, cert=cert)
+        super().__init__(
+            username,
+            password,
+            database,
+            session_id,
+            server,
+            timeout,
+            proxies=proxies,
+            cert=cert,
+            intern_ids=intern_ids,
+            hooks=hooks,
+            profile=profile,
+        )
 
     async def call_async(self, method, **parameters):
         """Makes an async call to the API.
@@ -65,8 +84,18 @@ class API(SyncAPI):
         if "credentials" not in params and self.credentials.session_id:
             params["credentials"] = self.credentials.get_param()
 
+        call_info = self._new_call_info(method, params)
         try:
-            result = await _query(self._server, method, params, verify_ssl=self._is_verify_ssl, cert=self._cert)
+            with run_hooks(self.hooks, call_info):
+                result = await _query(
+                    self._server,
+                    method,
+                    params,
+                    verify_ssl=self._is_verify_ssl,
+                    cert=self._cert,
+                    intern_ids=self.intern_ids,
+                    call_info=call_info,
+                )
             if result is not None:
                 self.__reauthorize_count = 0
             return result
@@ -173,7 +202,9 @@ async def server_call_async(method, server, timeout=DEFAULT_TIMEOUT, verify_ssl=
     return await _query(server, method, parameters, timeout=timeout, verify_ssl=verify_ssl)
 
 
-async def _query(server, method, parameters, timeout=DEFAULT_TIMEOUT, verify_ssl=True, cert=None):
+async def _query(
+    server, method, parameters, timeout=DEFAULT_TIMEOUT, verify_ssl=True, cert=None, intern_ids=False, call_info=None
+):
     """Formats and performs the asynchronous query against the API
 
     :param server: The server to query.
@@ -182,6 +213,8 @@ async def _query(server, method, parameters, timeout=DEFAULT_TIMEOUT, verify_ssl
     :param timeout: The timeout to make the call, in seconds. By default, this is 300 seconds (or 5 minutes).
     :param verify_ssl: Whether or not to verify SSL connections
     :param cert: The path to client certificate. A single path to .pem file or a Tuple (.cer file, .pem file)
+    :param intern_ids: If True, intern entity ids and share identical entity references in the result.
+    :param call_info: If set, the timings and sizes of the call are recorded in it.
     :return: The JSON-decoded result from the server
     :raise MyGeotabException: Raises when an exception occurs on the MyGeotab server
     :raise TimeoutException: Raises when the request does not respond after some time.
@@ -204,17 +237,29 @@ async def _query(server, method, parameters, timeout=DEFAULT_TIMEOUT, verify_ssl
             cer, key = cert
             ssl_context.load_cert_chain(cer, key)
 
+    measurement = measure_call(call_info)
+    with measurement.phase("serialize"):
+        data = json_serialize(params)
+    measurement.record(bytes_sent=len(data))
+    # Imported on first use, as aiohttp is slow to import
+    import aiohttp
+
     conn = aiohttp.TCPConnector(ssl=ssl_context)
     try:
-        async with aiohttp.ClientSession(connector=conn) as session:
-            response = await session.post(
-                api_endpoint, data=json_serialize(params), headers=headers, timeout=timeout, allow_redirects=True
-            )
-            response.raise_for_status()
-            content_type = response.headers.get("Content-Type")
-            body = await response.text()
+        with measurement.phase("network"):
+            async with aiohttp.ClientSession(connector=conn) as session:
+                response = await session.post(
+                    api_endpoint, data=data, headers=headers, timeout=timeout, allow_redirects=True
+                )
+                measurement.record(status_code=response.status)
+                response.raise_for_status()
+                content_type = response.headers.get("Content-Type")
+                measurement.record(bytes_received=len(await response.read()))
+                body = await response.text()
     except (TimeoutError, asyncio.TimeoutError) as exc:
         raise TimeoutException(server) from exc
     if content_type and "application/json" not in content_type.lower():
         return body
-    return _process(json_deserialize(body))
+    with measurement.phase("deserialize"):
+        result = _process(json_deserialize(body, intern_ids=intern_ids))
+    return measurement.set_result(result)
@@ -8,18 +8,22 @@ Console utilities for working with the MyGeotab API.
 """
 
 import configparser
+import json
 import os
 import os.path
 import stat
 import sys
+from time import time
 
 import click
 
 import mygeotab
 
-from . import API, __title__, __version__, dates
+from . import __title__, __version__, dates
 from .api import Credentials
 from .exceptions import AuthenticationException
+from .ext.feed import DataFeedListener
+from .serializers import json_serialize
 
 
 class Session(object):
@@ -104,14 +108,14 @@ class Session(object):
 
     def get_api(self):
         if self.credentials:
-            return API.from_credentials(self.credentials)
+            return mygeotab.API.from_credentials(self.credentials)
         return None
 
     def login(self, username, password=None, database=None, server=None):
         if server:
-            api = API(username=username, password=password, database=database, server=server)
+            api = mygeotab.API(username=username, password=password, database=database, server=server)
         else:
-            api = API(username=username, password=password, database=database)
+            api = mygeotab.API(username=username, password=password, database=database)
         self.credentials = api.authenticate()
         self.save()
 
@@ -244,6 +248,291 @@ def console(session, database=None, user=None, password=None, server=None):
             code.interact(banner, local=local_vars)
 
 
+def _parse_search(ctx, param, value):
+    if not value:
+        return None
+    try:
+        search = json.loads(value)
+    except ValueError as exc:
+        raise click.BadParameter("must be a JSON object") from exc
+    if not isinstance(search, dict):
+        raise click.BadParameter("must be a JSON object")
+    return search
+
+
+@click.command(help="Export every entity of a type to a NDJSON, CSV or Parquet file")
+@click.argument("type_name", nargs=1, required=True)
+@click.argument("output", nargs=1, required=True, type=click.Path(dir_okay=False))
+@click.option("--database", "-d", default=None, help="The database to export from")
+@click.option("--user", "-u")
+@click.option("--password", "-p")
+@click.option("--server", default=None, help="The server (ie. my4.geotab.com)")
+@click.option(
+    "--format", "-f", "file_format", type=click.Choice(["ndjson", "csv", "parquet"]), help="Defaults to the extension"
+)
+@click.option("--search", "-s", callback=_parse_search, help='The search, as JSON (ie. \'{"name": "%Truck%"}\')')
+@click.option("--page-size", default=None, type=click.IntRange(min=1), help="The number of entities per call")
+@click.option("--resume", is_flag=True, help="Resume an interrupted export, appending to the output")
+@click.pass_obj
+def export(
+    session,
+    type_name,
+    output,
+    database=None,
+    user=None,
+    password=None,
+    server=None,
+    file_format=None,
+    search=None,
+    page_size=None,
+    resume=False,
+):
+    """Exports every entity of a type to a file, one page at a time, so large types can be exported with little memory.
+
+    The progress is saved next to the output file (with a `.checkpoint` extension), so an interrupted export can be
+    resumed with `--resume`.
+
+    :param session: The current Session object.
+    :param type_name: The type of entity to export.
+    :param output: The path to the file to export to.
+    :param database: The database name to export from.
+    :param user: The username used for MyGeotab servers. Usually an email address.
+    :param password: The password associated with the username. Optional if `session_id` is provided.
+    :param server: The server ie. my23.geotab.com. Optional as this usually gets resolved upon authentication.
+    :param file_format: The file format. By default, it is taken from the extension of the output file.
+    :param search: The search object.
+    :param page_size: The number of entities to get per call.
+    :param resume: If True, resume an interrupted export.
+    """
+    from .ext import export as exporter
+    from .ext.checkpoint import FileCheckpointStore
+
+    api = _get_api(database, password, server, session, user)
+    checkpoint_path = output + ".checkpoint"
+    if not resume and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    try:
+        sink = exporter.open_sink(output, file_format, append=resume)
+    except (ValueError, ImportError) as exc:
+        raise click.UsageError(str(exc)) from exc
+    count = exporter.export_entities(
+        api,
+        type_name,
+        sink,
+        search=search,
+        page_size=page_size or exporter.DEFAULT_PAGE_SIZE,
+        checkpoint_store=FileCheckpointStore(checkpoint_path),
+        progress=lambda exported: click.echo("\rExporting {}... {}".format(type_name, exported), nl=False, err=True),
+    )
+    click.echo(err=True)
+    click.echo("Exported {} entities to {}".format(count, output))
+
+
+class FeedWriter(DataFeedListener):
+    """Writes data feed batches as newline-delimited JSON, one write per batch, and shows the progress of the feed."""
+
+    def __init__(self, stream, type_name, show_progress=True):
+        """Initializes the FeedWriter object.
+
+        :param stream: The text stream to write to.
+        :param type_name: The type of entity.
+        :param show_progress: If True, show the rate and lag of the feed after every batch.
+        """
+        self.stream = stream
+        self.type_name = type_name
+        self.show_progress = show_progress
+        self.stats = None
+        self.started = time()
+
+    def on_data(self, data):
+        if data:
+            self.stream.write("".join(json_serialize(entity) + "\n" for entity in data))
+            self.stream.flush()
+        if self.show_progress and self.stats is not None:
+            click.echo("\r" + self.progress(), nl=False, err=True)
+
+    def on_error(self, error):
+        click.secho("\n{}".format(error), fg="red", err=True)
+        return True
+
+    def progress(self):
+        """Gets a line with the progress of the feed.
+
+        :rtype: str
+        """
+        elapsed = max(time() - self.started, 1e-6)
+        lag = self.stats.lag
+        return "{}: {} records, {:.1f} records/s, last batch {}, lag {}".format(
+            self.type_name,
+            self.stats.records,
+            self.stats.records / elapsed,
+            self.stats.last_batch_size,
+            "{:.0f}s".format(lag) if lag is not None else "unknown",
+        ).ljust(79)
+
+
+@click.command(help="Tail a data feed, writing its records as NDJSON")
+@click.argument("type_name", nargs=1, required=True)
+@click.option("--database", "-d", default=None, help="The database to follow the feed of")
+@click.option("--user", "-u")
+@click.option("--password", "-p")
+@click.option("--server", default=None, help="The server (ie. my4.geotab.com)")
+@click.option(
+    "--output", "-o", default="-", type=click.Path(dir_okay=False, allow_dash=True), help="Defaults to stdout"
+)
+@click.option("--search", "-s", callback=_parse_search, help="The search, as JSON")
+@click.option("--interval", "-i", type=click.IntRange(min=1), default=30, help="The polling interval in seconds")
+@click.option("--results-limit", type=click.IntRange(min=1), default=None, help="The number of records per batch")
+@click.option("--adaptive/--fixed", default=True, help="Poll again right away while the feed returns full batches")
+@click.option("--checkpoint", type=click.Path(dir_okay=False), default=None, help="The file to save the version to")
+@click.option("--quiet", "-q", is_flag=True, help="Don't show the progress of the feed")
+@click.pass_obj
+def feed(
+    session,
+    type_name,
+    database=None,
+    user=None,
+    password=None,
+    server=None,
+    output="-",
+    search=None,
+    interval=30,
+    results_limit=None,
+    adaptive=True,
+    checkpoint=None,
+    quiet=False,
+):
+    """Tails the data feed of a type, writing each batch of records as newline-delimited JSON.
+
+    The version of the feed is saved after every batch (by default, next to the output file with a `.checkpoint`
+    extension), so the feed continues where it left off when the command is run again. Press Ctrl+C to stop.
+
+    :param session: The current Session object.
+    :param type_name: The type of entity.
+    :param database: The database name to follow the feed of.
+    :param user: The username used for MyGeotab servers. Usually an email address.
+    :param password: The password associated with the username. Optional if `session_id` is provided.
+    :param server: The server ie. my23.geotab.com. Optional as this usually gets resolved upon authentication.
+    :param output: The file to append the records to, or `-` for stdout.
+    :param search: The search object.
+    :param interval: The polling interval (in seconds).
+    :param results_limit: The maximum number of records per batch.
+    :param adaptive: If True, poll again immediately while full batches are returned.
+    :param checkpoint: The file to save the version of the feed to.
+    :param quiet: If True, don't show the progress of the feed.
+    """
+    from .ext.checkpoint import FileCheckpointStore
+    from .ext.feed import DataFeed
+
+    api = _get_api(database, password, server, session, user)
+    if checkpoint is None and output != "-":
+        checkpoint = output + ".checkpoint"
+    checkpoint_store = FileCheckpointStore(checkpoint) if checkpoint else None
+    with click.open_file(output, "a", encoding="utf-8") as stream:
+        writer = FeedWriter(stream, type_name, show_progress=not quiet)
+        data_feed = DataFeed(
+            api,
+            writer,
+            type_name,
+            interval,
+            search=search,
+            results_limit=results_limit,
+            adaptive=adaptive,
+            checkpoint_store=checkpoint_store,
+        )
+        writer.stats = data_feed.stats
+        try:
+            data_feed.start(threaded=False)
+        except KeyboardInterrupt:
+            data_feed.running = False
+        if not quiet:
+            click.echo("\n" + writer.progress().rstrip(), err=True)
+
+
+@click.command(help="Measure the throughput of the client against a local stand-in server, or a database")
+@click.argument("workloads", nargs=-1, type=click.Choice(["get", "multicall", "async", "feed"]))
+@click.option("--database", "-d", default=None, help="Run against this database instead of a local stand-in server")
+@click.option("--user", "-u")
+@click.option("--password", "-p")
+@click.option("--server", default=None, help="The server (ie. my4.geotab.com)")
+@click.option("--type", "type_name", default="LogRecord", help="The type of entity to get")
+@click.option("--requests", "-n", type=click.IntRange(min=1), default=100, help="The number of requests per workload")
+@click.option("--entities", "-e", type=click.IntRange(min=1), default=1000, help="The number of entities per request")
+@click.option("--batch", type=click.IntRange(min=1), default=10, help="The number of calls per multi-call")
+@click.option("--concurrency", "-c", type=click.IntRange(min=1), default=10, help="The number of async calls at a time")
+@click.option("--json", "as_json", is_flag=True, help="Print the results as JSON")
+@click.pass_obj
+def bench(
+    session,
+    workloads,
+    database=None,
+    user=None,
+    password=None,
+    server=None,
+    type_name="LogRecord",
+    requests=100,
+    entities=1000,
+    batch=10,
+    concurrency=10,
+    as_json=False,
+):
+    """Runs workloads against a local stand-in server (or a database), and reports latency percentiles, throughput, and
+    the client's CPU time, split between JSON serialization and the HTTP transport.
+
+    :param session: The current Session object.
+    :param workloads: The workloads to run. By default, all of them.
+    :param database: The database name to run against. By default, a local stand-in server is started.
+    :param user: The username used for MyGeotab servers. Usually an email address.
+    :param password: The password associated with the username. Optional if `session_id` is provided.
+    :param server: The server ie. my23.geotab.com. Optional as this usually gets resolved upon authentication.
+    :param type_name: The type of entity to get.
+    :param requests: The number of requests per workload.
+    :param entities: The number of entities per request.
+    :param batch: The number of calls per multi-call.
+    :param concurrency: The number of asynchronous calls at a time.
+    :param as_json: If True, print the results as JSON.
+    """
+    from .ext.bench import SYNC_SETUP_NOTE, SYNC_WORKLOADS, WORKLOADS, run_workload
+    from .ext.fake_server import FakeServer
+
+    fake_server = None
+    if database:
+        api = _get_api(database, password, server, session, user)
+    else:
+        fake_server = FakeServer(entity_count=entities).start()
+        api = mygeotab.API("bench@example.com", password="bench", database=fake_server.database, server=fake_server.url)
+        api.authenticate()
+    results = []
+    try:
+        for workload in workloads or WORKLOADS:
+            result = run_workload(
+                api,
+                workload,
+                requests=requests,
+                type_name=type_name,
+                entities=entities,
+                batch=batch,
+                concurrency=concurrency,
+            )
+            results.append(result.to_dict())
+            if not as_json:
+                click.echo(
+                    "{workload:<10} {requests:>6} req  "
+                    "p50 {p50_ms:8.2f} ms  p95 {p95_ms:8.2f} ms  p99 {p99_ms:8.2f} ms  "
+                    "{requests_per_second:8.1f} req/s  {mb_per_second:8.2f} MB/s  "
+                    "CPU {serialization_cpu_seconds:.2f}s JSON / {transport_cpu_seconds:.2f}s transport".format(
+                        mb_per_second=result.bytes_per_second / 1e6, **results[-1]
+                    )
+                )
+    finally:
+        if fake_server is not None:
+            fake_server.stop()
+    if as_json:
+        click.echo(json.dumps(results, indent=2))
+    elif any(result["workload"] in SYNC_WORKLOADS for result in results):
+        click.echo(SYNC_SETUP_NOTE)
+
+
 @click.group()
 @click.version_option()
 @click.pass_context
@@ -265,6 +554,11 @@ def main(ctx):
 
 
 def _populate_locals(database, password, server, session, user):
+    api = _get_api(database, password, server, session, user)
+    return dict(myg=api, mygeotab=mygeotab, dates=dates)
+
+
+def _get_api(database, password, server, session, user):
     if not session.credentials:
         login(session, user, password, database, server)
     session.load(database)
@@ -278,10 +572,13 @@ def _populate_locals(database, password, server, session, user):
         # Credentials expired, try logging in again
         click.echo("Your session has expired. Please login again.")
         api = login(session, user, password, database, server)
-    return dict(myg=api, mygeotab=mygeotab, dates=dates)
+    return api
 
 
 main.add_command(console)
+main.add_command(export)
+main.add_command(feed)
+main.add_command(bench)
 sessions.add_command(remove)
 main.add_command(sessions)
 
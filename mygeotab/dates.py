@@ -7,13 +7,20 @@ mygeotab.dates
 Date helper objects for timezone shifting and date formatting for the MyGeotab API.
 """
 
-from datetime import datetime
+import re
+import sys
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
 
-import arrow
-import pytz
+MIN_DATE = datetime(1, 1, 1, tzinfo=timezone.utc)
+MAX_DATE = datetime(9999, 12, 31, 23, 59, 59, 999999, tzinfo=timezone.utc)
 
-MIN_DATE = pytz.utc.localize(datetime(1, 1, 1))
-MAX_DATE = pytz.utc.localize(datetime(9999, 12, 31, 23, 59, 59, 999999))
+_ISO_FORMAT = "%04d-%02d-%02dT%02d:%02d:%02d.%03dZ"
+_LONG_FRACTION_REGEX = re.compile(r"\.\d{7}")
+
+# The bounds of MyGeotab dates, at the millisecond precision of the API, for NumPy arrays
+_NUMPY_MIN_DATE = "0001-01-01T00:00:00.000"
+_NUMPY_MAX_DATE = "9999-12-31T23:59:59.999"
 
 
 def format_iso_datetime(datetime_obj):
@@ -26,30 +33,206 @@ def format_iso_datetime(datetime_obj):
     """
     if not isinstance(datetime_obj, datetime):
         return datetime_obj.isoformat()
-    datetime_obj = localize_datetime(datetime_obj, pytz.utc)
-    if datetime_obj < MIN_DATE:
-        datetime_obj = MIN_DATE
-    elif datetime_obj > MAX_DATE:
-        datetime_obj = MAX_DATE
-    return arrow.get(datetime_obj).format("YYYY-MM-DDTHH:mm:ss.SSS") + "Z"
+    if datetime_obj.tzinfo is not None:
+        offset = datetime_obj.utcoffset()
+        if offset:
+            try:
+                datetime_obj = datetime_obj.replace(tzinfo=None) - offset
+            except OverflowError:
+                # Out of range in UTC
+                datetime_obj = MIN_DATE if offset.days >= 0 else MAX_DATE
+    return _ISO_FORMAT % (
+        datetime_obj.year,
+        datetime_obj.month,
+        datetime_obj.day,
+        datetime_obj.hour,
+        datetime_obj.minute,
+        datetime_obj.second,
+        datetime_obj.microsecond // 1000,
+    )
+
 
+def _resolve_timezone(tz):
+    if not tz:
+        return timezone.utc
+    if isinstance(tz, str):
+        return ZoneInfo(tz)
+    return tz
 
-def localize_datetime(datetime_obj, tz=pytz.utc):
+
+def localize_datetime(datetime_obj, tz=timezone.utc):
     """Converts a naive or UTC-localized date into the provided timezone.
 
     :param datetime_obj: The datetime object.
     :type datetime_obj: datetime
-    :param tz: The timezone. If blank or None, UTC is used.
-    :type tz: datetime.tzinfo
+    :param tz: The timezone, or its IANA name (such as `America/Toronto`). If blank or None, UTC is used. Naive dates
+               are assumed to be in this timezone. pytz timezones are supported.
+    :type tz: datetime.tzinfo or str
     :return: The localized datetime object.
     :rtype: datetime
     """
+    tz = _resolve_timezone(tz)
     if not datetime_obj.tzinfo:
-        return tz.localize(datetime_obj)
+        localize = getattr(tz, "localize", None)
+        if localize is not None:
+            # pytz timezones need to pick the offset in effect at that date
+            return localize(datetime_obj)
+        return datetime_obj.replace(tzinfo=tz)
     else:
         try:
             return datetime_obj.astimezone(tz)
         except OverflowError:
-            if datetime_obj < datetime(2, 1, 1, tzinfo=pytz.utc):
-                return MIN_DATE.astimezone(pytz.utc)
-            return MAX_DATE.astimezone(pytz.utc)
+            if datetime_obj < datetime(2, 1, 1, tzinfo=timezone.utc):
+                return MIN_DATE
+            return MAX_DATE
+
+
+def parse_iso_datetime(value, tz=timezone.utc):
+    """Parses an ISO 8601 date string, such as those returned by the MyGeotab API, into a localized datetime.
+
+    :param value: The date string. Dates without an offset are assumed to be in UTC.
+    :type value: str
+    :param tz: The timezone to localize the date into, or its IANA name. If blank or None, UTC is used.
+    :type tz: datetime.tzinfo or str
+    :raise ValueError: Raises when the string isn't a valid date.
+    :return: The localized datetime object.
+    :rtype: datetime
+    """
+    datetime_obj = None
+    if _LONG_FRACTION_REGEX.search(value) is None:
+        try:
+            # Before Python 3.11, fromisoformat() doesn't accept the "Z" suffix
+            datetime_obj = datetime.fromisoformat(value[:-1] + "+00:00" if value.endswith("Z") else value)
+        except ValueError:
+            pass
+    if datetime_obj is None:
+        # Other forms, and more than 6 fractional digits, which arrow rounds to the microsecond. Imported on first use,
+        # as arrow is slow to import
+        import arrow
+
+        datetime_obj = arrow.get(value).datetime
+    if datetime_obj.tzinfo is None:
+        datetime_obj = datetime_obj.replace(tzinfo=timezone.utc)
+    return localize_datetime(datetime_obj, tz)
+
+
+def _is_pandas(values):
+    # pandas is never imported here: if it isn't loaded yet, the values can't be pandas objects
+    pandas = sys.modules.get("pandas")
+    if pandas is not None and isinstance(values, (pandas.Series, pandas.Index)):
+        return pandas
+    return None
+
+
+def _is_numpy(values):
+    numpy = sys.modules.get("numpy")
+    if numpy is not None and isinstance(values, numpy.ndarray):
+        return numpy
+    return None
+
+
+def _format_datetime64(numpy, values):
+    """Formats a NumPy datetime64 array (in UTC) as an object array of ISO 8601 strings, with None for NaT."""
+    values = values.astype("datetime64[ms]")
+    values = numpy.clip(values, numpy.datetime64(_NUMPY_MIN_DATE, "ms"), numpy.datetime64(_NUMPY_MAX_DATE, "ms"))
+    formatted = numpy.datetime_as_string(values, unit="ms", timezone="UTC").astype(object)
+    formatted[numpy.isnat(values)] = None
+    return formatted
+
+
+def _format_other(value):
+    """Formats a value that isn't a plain datetime, such as a date, a pandas Timestamp, or a missing value."""
+    if value is None:
+        return None
+    numpy = sys.modules.get("numpy")
+    if numpy is not None and isinstance(value, numpy.datetime64):
+        return _format_datetime64(numpy, numpy.array([value]))[0]
+    if value != value:
+        # NaT, or NaN, which pandas uses for missing values
+        return None
+    return format_iso_datetime(value)
+
+
+def _parse_other(value, tz):
+    """Parses a value that isn't a plain string, such as a NumPy string, or a missing value."""
+    if value is None or value != value:
+        return None
+    return parse_iso_datetime(value, tz)
+
+
+def format_iso_datetimes(values):
+    """Formats many datetimes as UTC-zoned ISO 8601 date strings. NumPy arrays and pandas columns of dates are
+    formatted in a single vectorized pass.
+
+    :param values: The datetime or date objects, a NumPy datetime64 array (in UTC), or a pandas Series or Index. Naive
+                   dates are assumed to be in UTC. Missing values (None, NaT or NaN) are left as None.
+    :type values: list or numpy.ndarray or pandas.Series or pandas.Index
+    :return: The dates in 8601 string form: a list for a sequence, an object array for a NumPy array, and a Series
+             (with the same index) or Index for pandas objects.
+    :rtype: list or numpy.ndarray or pandas.Series or pandas.Index
+    """
+    pandas = _is_pandas(values)
+    if pandas is not None:
+        if values.dtype.kind == "M":
+            utc_values = pandas.to_datetime(values, utc=True)
+            if isinstance(values, pandas.Series):
+                utc_values = utc_values.dt.tz_localize(None)
+            else:
+                utc_values = utc_values.tz_localize(None)
+            import numpy
+
+            formatted = _format_datetime64(numpy, utc_values.to_numpy(dtype="datetime64[ms]"))
+        else:
+            formatted = format_iso_datetimes(values.tolist())
+        if isinstance(values, pandas.Series):
+            return pandas.Series(formatted, index=values.index, name=values.name, dtype=object)
+        return pandas.Index(formatted, name=values.name, dtype=object)
+    numpy = _is_numpy(values)
+    if numpy is not None:
+        if values.dtype.kind == "M":
+            return _format_datetime64(numpy, values)
+        return numpy.array(format_iso_datetimes(values.tolist()), dtype=object)
+    return [format_iso_datetime(value) if type(value) is datetime else _format_other(value) for value in values]
+
+
+def parse_iso_datetimes(values, tz=timezone.utc):
+    """Parses many ISO 8601 date strings, such as those returned by the MyGeotab API. NumPy string arrays and pandas
+    columns are parsed in a single vectorized pass.
+
+    :param values: The date strings: a sequence, a NumPy array, or a pandas Series or Index. Dates without an offset
+                   are assumed to be in UTC. Missing values (None, NaT or NaN) are left as None, or NaT.
+    :type values: list or numpy.ndarray or pandas.Series or pandas.Index
+    :param tz: The timezone to localize the dates into, or its IANA name. If blank or None, UTC is used. NumPy arrays
+               have no timezone, so they are always in UTC.
+    :type tz: datetime.tzinfo or str
+    :raise ValueError: Raises when a string isn't a valid date.
+    :return: The dates: a list of localized datetimes for a sequence, a datetime64[us] array (in UTC) for a NumPy
+             array, and a zoned datetime Series or DatetimeIndex for pandas objects.
+    :rtype: list or numpy.ndarray or pandas.Series or pandas.DatetimeIndex
+    """
+    tz = _resolve_timezone(tz)
+    pandas = _is_pandas(values)
+    if pandas is not None:
+        parsed = pandas.to_datetime(values, utc=True, format="ISO8601")
+        if tz is timezone.utc:
+            return parsed
+        return parsed.dt.tz_convert(tz) if isinstance(parsed, pandas.Series) else parsed.tz_convert(tz)
+    numpy = _is_numpy(values)
+    if numpy is not None:
+        if values.dtype.kind == "U":
+            dates_in_utc = numpy.char.rstrip(values, "Z")
+            # NumPy's parsing of offsets is deprecated, and it truncates more than 6 fractional digits (where
+            # parse_iso_datetime() rounds), so only dates in UTC with at most 6 fractional digits (26 characters)
+            # take the vectorized path
+            short_fractions = (numpy.char.str_len(dates_in_utc) <= 26).all()
+            no_offsets = (numpy.char.find(values, "+") < 0).all() and (numpy.char.rfind(values, "-") < 10).all()
+            if short_fractions and no_offsets:
+                try:
+                    return dates_in_utc.astype("datetime64[us]")
+                except ValueError:
+                    pass
+        parsed = parse_iso_datetimes(values.tolist())
+        return numpy.array(
+            [None if value is None else value.replace(tzinfo=None) for value in parsed], dtype="datetime64[us]"
+        )
+    return [parse_iso_datetime(value, tz) if type(value) is str else _parse_other(value, tz) for value in values]
@@ -1,4 +1,47 @@
-from .entitylist import API
-from .feed import DataFeed, DataFeedListener
+import importlib
 
-__all__ = ["API", "DataFeed", "DataFeedListener"]
+# The extensions are imported on first use (PEP 562), so importing one of them doesn't import them all
+_LAZY_ATTRIBUTES = {
+    "API": "entitylist",
+    "CSVSink": "export",
+    "CheckpointStore": "checkpoint",
+    "ColumnarEntityList": "columnar",
+    "DataFeed": "feed",
+    "DataFeedListener": "feed",
+    "ExportSink": "export",
+    "FeedCursor": "feed",
+    "FeedStats": "feed",
+    "FileCheckpointStore": "checkpoint",
+    "MemoryCheckpointStore": "checkpoint",
+    "MultiDataFeed": "feed",
+    "NDJSONSink": "export",
+    "ParquetSink": "export",
+    "PipelinedDataFeed": "feed",
+    "PrometheusHook": "metrics",
+    "Record": "records",
+    "SQLiteCheckpointStore": "checkpoint",
+    "ShardedDataFeed": "sharded",
+    "TracingHook": "tracing",
+    "export_entities": "export",
+    "open_sink": "export",
+    "record_class": "records",
+    "shard_by_devices": "sharded",
+    "shard_by_groups": "sharded",
+    "to_records": "records",
+}
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+    value = getattr(importlib.import_module("." + module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
+
+
+__all__ = sorted(_LAZY_ATTRIBUTES)
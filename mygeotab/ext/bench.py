@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+
+"""
+mygeotab.ext.bench
+~~~~~~~~~~~~~~~~~~
+
+Workloads to measure the throughput of the MyGeotab API client, against a real server or a FakeServer.
+"""
+
+import asyncio
+import math
+import threading
+from time import perf_counter, thread_time
+
+from mygeotab.hooks import CallHook
+
+WORKLOADS = ("get", "multicall", "async", "feed")
+SYNC_WORKLOADS = ("get", "multicall", "feed")
+SYNC_SETUP_NOTE = (
+    "The synchronous workloads ({}) open a new HTTP session, and load the default certificates, on every call. "
+    "Their latencies and transport time include that setup.".format(", ".join(SYNC_WORKLOADS))
+)
+
+
+class BenchResult(object):
+    """The measurements of a workload."""
+
+    def __init__(self, name, latencies, elapsed, bytes_sent, bytes_received, cpu_time, serialization_time):
+        """Initializes the BenchResult object.
+
+        :param name: The name of the workload.
+        :type name: str
+        :param latencies: The time each request took (in seconds).
+        :type latencies: list(float)
+        :param elapsed: The time the whole workload took (in seconds).
+        :type elapsed: float
+        :param bytes_sent: The size of the requests.
+        :type bytes_sent: int
+        :param bytes_received: The size of the responses.
+        :type bytes_received: int
+        :param cpu_time: The CPU time used by the client (in seconds).
+        :type cpu_time: float
+        :param serialization_time: The time spent serializing and deserializing JSON (in seconds).
+        :type serialization_time: float
+        """
+        self.name = name
+        self.latencies = sorted(latencies)
+        self.elapsed = elapsed
+        self.bytes_sent = bytes_sent
+        self.bytes_received = bytes_received
+        self.cpu_time = cpu_time
+        self.serialization_time = serialization_time
+
+    def percentile(self, percent):
+        """Gets a latency percentile, using the nearest rank.
+
+        :param percent: The percentile, such as 95.
+        :type percent: float
+        :return: The latency (in seconds).
+        :rtype: float
+        """
+        if not self.latencies:
+            return 0.0
+        rank = max(int(math.ceil(percent / 100.0 * len(self.latencies))), 1)
+        return self.latencies[rank - 1]
+
+    @property
+    def requests_per_second(self):
+        """The number of requests per second.
+
+        :rtype: float
+        """
+        return len(self.latencies) / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def bytes_per_second(self):
+        """The number of bytes received per second.
+
+        :rtype: float
+        """
+        return self.bytes_received / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def transport_time(self):
+        """The part of the CPU time not spent on JSON, mostly in the HTTP client (in seconds). For the synchronous
+        workloads, this includes setting up a new HTTP session for every call (see `SYNC_SETUP_NOTE`).
+
+        :rtype: float
+        """
+        return max(self.cpu_time - self.serialization_time, 0.0)
+
+    def to_dict(self):
+        """Gets the results as a dict, in milliseconds and seconds.
+
+        :rtype: dict
+        """
+        return dict(
+            workload=self.name,
+            requests=len(self.latencies),
+            p50_ms=self.percentile(50) * 1000,
+            p95_ms=self.percentile(95) * 1000,
+            p99_ms=self.percentile(99) * 1000,
+            requests_per_second=self.requests_per_second,
+            bytes_per_second=self.bytes_per_second,
+            bytes_sent=self.bytes_sent,
+            bytes_received=self.bytes_received,
+            cpu_seconds=self.cpu_time,
+            serialization_cpu_seconds=self.serialization_time,
+            transport_cpu_seconds=self.transport_time,
+        )
+
+
+class _BenchHook(CallHook):
+    """Adds up the sizes and JSON times of the calls made during a workload."""
+
+    def __init__(self):
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.serialization_time = 0.0
+        self._lock = threading.Lock()
+
+    def after_call(self, call_info):
+        with self._lock:
+            self.bytes_sent += call_info.bytes_sent
+            self.bytes_received += call_info.bytes_received
+            self.serialization_time += call_info.serialize_time + call_info.deserialize_time
+
+
+def _timed(latencies, function, *args, **kwargs):
+    start = perf_counter()
+    result = function(*args, **kwargs)
+    latencies.append(perf_counter() - start)
+    return result
+
+
+async def _timed_async(latencies, coroutine):
+    start = perf_counter()
+    result = await coroutine
+    latencies.append(perf_counter() - start)
+    return result
+
+
+def _get(client_api, latencies, requests, type_name, entities, **options):
+    for _ in range(requests):
+        _timed(latencies, client_api.get, type_name, resultsLimit=entities)
+
+
+def _multicall(client_api, latencies, requests, type_name, entities, batch=10, **options):
+    calls = [("Get", dict(typeName=type_name, resultsLimit=max(entities // batch, 1)))] * batch
+    for _ in range(requests):
+        _timed(latencies, client_api.multi_call, calls)
+
+
+def _async(client_api, latencies, requests, type_name, entities, concurrency=10, **options):
+    async def run():
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def get():
+            async with semaphore:
+                await _timed_async(latencies, client_api.get_async(type_name, resultsLimit=entities))
+
+        await asyncio.gather(*[get() for _ in range(requests)])
+
+    asyncio.run(run())
+
+
+def _feed(client_api, latencies, requests, type_name, entities, **options):
+    version = None
+    for _ in range(requests):
+        result = _timed(
+            latencies, client_api.call, "GetFeed", type_name=type_name, from_version=version, results_limit=entities
+        )
+        # Start over once the end of the feed is reached
+        version = result["toVersion"] if result["data"] else None
+
+
+_WORKLOAD_FUNCTIONS = {"get": _get, "multicall": _multicall, "async": _async, "feed": _feed}
+
+
+def run_workload(client_api, workload, requests=100, type_name="LogRecord", entities=1000, batch=10, concurrency=10):
+    """Runs a workload and measures it. The client's CPU time is measured on the calling thread, and the sizes and JSON
+    times of the calls with an instrumentation hook added to the API object for the duration of the workload.
+
+    The synchronous API opens a new HTTP session on every call, and loads the default certificates for it even for
+    plain HTTP servers. This setup is part of the latencies and transport time of the `get`, `multicall` and `feed`
+    workloads, and against a local server it is most of them.
+
+    :param client_api: The asynchronous MyGeotab API object, authenticated.
+    :type client_api: mygeotab.API
+    :param workload: The workload, one of `WORKLOADS`: `get` makes `Get` calls one after the other, `multicall` makes
+                     `ExecuteMultiCall` calls of `batch` `Get` calls, `async` makes `Get` calls with `call_async()`,
+                     `concurrency` at a time, and `feed` polls a data feed.
+    :type workload: str
+    :param requests: The number of requests to make.
+    :type requests: int
+    :param type_name: The type of entity to get.
+    :type type_name: str
+    :param entities: The number of entities to get per request.
+    :type entities: int
+    :param batch: The number of calls per `ExecuteMultiCall`.
+    :type batch: int
+    :param concurrency: The number of asynchronous calls at a time.
+    :type concurrency: int
+    :raise ValueError: Raises when the workload is not supported.
+    :rtype: BenchResult
+    """
+    function = _WORKLOAD_FUNCTIONS.get(workload)
+    if function is None:
+        raise ValueError("Unsupported workload '{}'. Use one of: {}".format(workload, ", ".join(WORKLOADS)))
+    latencies = []
+    hook = _BenchHook()
+    client_api.hooks.append(hook)
+    try:
+        start, start_cpu = perf_counter(), thread_time()
+        function(client_api, latencies, requests, type_name, entities, batch=batch, concurrency=concurrency)
+        elapsed, cpu_time = perf_counter() - start, thread_time() - start_cpu
+    finally:
+        client_api.hooks.remove(hook)
+    return BenchResult(
+        workload, latencies, elapsed, hook.bytes_sent, hook.bytes_received, cpu_time, hook.serialization_time
+    )
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+
+"""
+mygeotab.ext.checkpoint
+~~~~~~~~~~~~~~~~~~~~~~~
+
+Durable stores for data feed versions, so feeds can resume where they left off after a restart.
+"""
+
+import abc
+import json
+import os
+import sqlite3
+import tempfile
+from contextlib import closing
+from threading import Lock
+
+
+class CheckpointStore(object):
+    """The abstract CheckpointStore to override"""
+
+    __metaclass__ = abc.ABCMeta
+
+    @abc.abstractmethod
+    def load(self, key):
+        """Loads the saved version for a feed.
+
+        :param key: The name of the feed.
+        :type key: str
+        :return: The saved version, or None if nothing was saved.
+        :rtype: str or None
+        """
+        return None
+
+    @abc.abstractmethod
+    def save(self, key, version):
+        """Saves the version for a feed.
+
+        :param key: The name of the feed.
+        :type key: str
+        :param version: The version to resume from.
+        :type version: str
+        """
+        return
+
+
+class MemoryCheckpointStore(CheckpointStore):
+    """Keeps versions in memory. Useful for testing, or to share versions between feeds in the same process."""
+
+    def __init__(self):
+        """Initializes the MemoryCheckpointStore object."""
+        self._versions = {}
+
+    def load(self, key):
+        return self._versions.get(key)
+
+    def save(self, key, version):
+        self._versions[key] = version
+
+
+class FileCheckpointStore(CheckpointStore):
+    """Keeps versions in a local JSON file. The file is replaced atomically on every save, so a crash never
+    leaves a partially-written file behind.
+    """
+
+    def __init__(self, path):
+        """Initializes the FileCheckpointStore object.
+
+        :param path: The path to the JSON file.
+        :type path: str
+        """
+        self.path = path
+        self._lock = Lock()
+
+    def _read(self):
+        try:
+            with open(self.path, "r") as checkpoint_file:
+                return json.load(checkpoint_file)
+        except FileNotFoundError:
+            return {}
+
+    def load(self, key):
+        with self._lock:
+            return self._read().get(key)
+
+    def save(self, key, version):
+        with self._lock:
+            versions = self._read()
+            versions[key] = version
+            directory = os.path.dirname(os.path.abspath(self.path))
+            file_descriptor, temp_path = tempfile.mkstemp(dir=directory, prefix=".checkpoint-")
+            try:
+                with os.fdopen(file_descriptor, "w") as temp_file:
+                    json.dump(versions, temp_file)
+                    temp_file.flush()
+                    os.fsync(temp_file.fileno())
+                os.replace(temp_path, self.path)
+            except BaseException:
+                os.remove(temp_path)
+                raise
+
+
+class SQLiteCheckpointStore(CheckpointStore):
+    """Keeps versions in a SQLite database table."""
+
+    def __init__(self, path, table="checkpoints"):
+        """Initializes the SQLiteCheckpointStore object.
+
+        :param path: The path to the SQLite database file.
+        :type path: str
+        :param table: The name of the table to keep versions in. It is created if it doesn't exist.
+        :type table: str
+        """
+        if not table.isidentifier():
+            raise ValueError("Invalid table name: {}".format(table))
+        self.path = path
+        self.table = table
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS {} (key TEXT PRIMARY KEY, version TEXT NOT NULL)".format(self.table)
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def load(self, key):
+        with closing(self._connect()) as connection:
+            row = connection.execute("SELECT version FROM {} WHERE key = ?".format(self.table), (key,)).fetchone()
+        return row[0] if row else None
+
+    def save(self, key, version):
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO {} (key, version) VALUES (?, ?)".format(self.table), (key, version)
+            )
@@ -0,0 +1,407 @@
+# -*- coding: utf-8 -*-
+
+"""
+mygeotab.ext.columnar
+~~~~~~~~~~~~~~~~~~~~~
+
+A memory-compact, column-oriented alternative to the EntityList, written as an extension to the MyGeotab API object.
+"""
+
+from array import array
+from collections.abc import Mapping
+from datetime import datetime, timedelta, timezone
+
+from mygeotab import api
+from mygeotab.serializers import json_serialize
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_NAT = -(2**63)
+_INT_MAX = 2**63 - 1
+
+
+class API(api.API):
+    """An experimental wrapper around the base MyGeotab API class that returns results from `get()` as a
+    ColumnarEntityList.
+    """
+
+    def get(self, type_name, **parameters):
+        """Gets entities using the API. Shortcut for using call() with the 'Get' method. This returns a
+        ColumnarEntityList.
+
+        :param type_name: The type of entity.
+        :type type_name: str
+        :param parameters: Additional parameters to send.
+        :raise MyGeotabException: Raises when an exception occurs on the MyGeotab server.
+        :raise TimeoutException: Raises when the request does not respond after some time.
+        :return: The results from the server.
+        :rtype: ColumnarEntityList
+        """
+        return ColumnarEntityList.from_entities(super().get(type_name, **parameters), type_name=type_name)
+
+
+class _Column(object):
+    """A single column of values, stored in an `array` of the narrowest kind that fits all the values so far."""
+
+    __slots__ = ("kind", "values", "valid", "categories", "_codes")
+
+    def __init__(self, length=0):
+        self.kind = None
+        self.values = None
+        self.valid = bytearray(length)
+        self.categories = None
+        self._codes = None
+
+    def __len__(self):
+        return len(self.valid)
+
+    @staticmethod
+    def _kind_of(value):
+        if isinstance(value, bool):
+            return "bool"
+        if isinstance(value, int):
+            # Integers that don't fit in 64 bits are kept as objects
+            return "int" if _NAT <= value <= _INT_MAX else "object"
+        if isinstance(value, float):
+            return "float"
+        if isinstance(value, str):
+            return "string"
+        if isinstance(value, datetime):
+            return "datetime"
+        return "object"
+
+    def _start(self, kind):
+        length = len(self.valid)
+        self.kind = kind
+        if kind == "string":
+            self.categories = []
+            self._codes = {}
+            self.values = array("i", [-1]) * length
+        elif kind == "datetime":
+            self.values = array("q", [_NAT]) * length
+        elif kind == "object":
+            self.values = [None] * length
+        else:
+            self.values = array({"bool": "b", "int": "q", "float": "d"}[kind], [0]) * length
+
+    def _convert(self, kind):
+        """Changes the kind of the column, keeping its values."""
+        if self.kind == "int" and kind == "float":
+            self.values = array("d", self.values)
+            self.kind = "float"
+            return
+        values = [self.get(index) for index in range(len(self.valid))]
+        self._start("object")
+        self.values = values
+
+    def truncate(self, length):
+        """Removes the values after the first `length` ones."""
+        del self.valid[length:]
+        if self.values is not None:
+            del self.values[length:]
+
+    def append(self, value):
+        if value is None:
+            self.valid.append(0)
+            if self.values is not None:
+                self.values.append(self._null())
+            return
+        kind = self._kind_of(value)
+        if self.kind is None:
+            self._start(kind)
+        elif kind != self.kind and self.kind != "object":
+            if self.kind == "float" and kind == "int":
+                value = float(value)
+            else:
+                self._convert("float" if (self.kind, kind) == ("int", "float") else "object")
+        self.valid.append(1)
+        self.values.append(self._encode(value))
+
+    def _null(self):
+        if self.kind == "string":
+            return -1
+        if self.kind == "datetime":
+            return _NAT
+        if self.kind == "object":
+            return None
+        return 0
+
+    def _encode(self, value):
+        if self.kind == "string":
+            code = self._codes.get(value)
+            if code is None:
+                code = self._codes[value] = len(self.categories)
+                self.categories.append(value)
+            return code
+        if self.kind == "datetime":
+            if not value.tzinfo:
+                value = value.replace(tzinfo=timezone.utc)
+            delta = value - _EPOCH
+            return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+        return value
+
+    def get(self, index):
+        if not self.valid[index]:
+            return None
+        value = self.values[index]
+        if self.kind == "string":
+            return self.categories[value]
+        if self.kind == "datetime":
+            return _EPOCH + timedelta(microseconds=value)
+        if self.kind == "bool":
+            return bool(value)
+        return value
+
+    def to_numpy(self):
+        """Gets NumPy arrays of the values, and of the validity mask. They are copied from the buffers in bulk, as the
+        buffers can't grow while a view of them is alive.
+        """
+        import numpy
+
+        valid = numpy.frombuffer(self.valid, dtype=numpy.bool_).copy()
+        if self.kind == "object" or self.kind is None:
+            values = numpy.empty(len(self.valid), dtype=object)
+            values[:] = self.values if self.values is not None else None
+            return values, valid
+        values = numpy.frombuffer(self.values, dtype=self.values.typecode).copy()
+        if self.kind == "datetime":
+            values = values.view("datetime64[us]")
+        elif self.kind == "bool":
+            values = values.view(numpy.bool_)
+        return values, valid
+
+
+class ColumnarEntityList(object):
+    """The column-oriented result list. Nested entities are flattened into columns with dotted names, such as
+    `device.id`. Numbers, booleans and dates are stored in `array` objects, and strings are stored once per column
+    with an array of codes (so repeated ids, like `device.id`, cost a few bytes per row).
+    """
+
+    def __init__(self, type_name):
+        """Initializes an empty ColumnarEntityList. Use `append()`, or create it with `from_entities()`.
+
+        :param type_name: The type of entity.
+        :type type_name: str
+        """
+        self.type_name = type_name
+        self._columns = {}
+        self._length = 0
+
+    @classmethod
+    def from_entities(cls, entities, type_name):
+        """Creates a ColumnarEntityList from entities. The entities are consumed one at a time, so a generator can be
+        passed in to avoid holding every entity in memory.
+
+        :param entities: The entities.
+        :type entities: Iterable[dict]
+        :param type_name: The type of entity.
+        :type type_name: str
+        :rtype: ColumnarEntityList
+        """
+        entity_list = cls(type_name)
+        for entity in entities:
+            entity_list.append(entity)
+        return entity_list
+
+    def append(self, entity):
+        """Adds an entity to the end of the list.
+
+        :param entity: The entity.
+        :type entity: dict
+        """
+        flattened = {}
+        _flatten(entity, "", flattened)
+        new_columns = [name for name in flattened if name not in self._columns]
+        try:
+            for name in new_columns:
+                self._columns[name] = _Column(self._length)
+            for name, column in self._columns.items():
+                column.append(flattened.get(name))
+        except BaseException:
+            # Leave every column as it was, so they all keep the same length
+            for name in new_columns:
+                self._columns.pop(name, None)
+            for column in self._columns.values():
+                column.truncate(self._length)
+            raise
+        self._length += 1
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if not isinstance(index, int):
+            raise TypeError("ColumnarEntityList indices must be integers")
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("ColumnarEntityList index out of range")
+        return ColumnarRow(self, index)
+
+    def __iter__(self):
+        for index in range(self._length):
+            yield ColumnarRow(self, index)
+
+    def __repr__(self):
+        return "{}(<{} entities, {} columns>)".format(self.type_name, self._length, len(self._columns))
+
+    @property
+    def columns(self):
+        """The flattened column names.
+
+        :rtype: list(str)
+        """
+        return list(self._columns)
+
+    def column(self, name):
+        """Gets the values of a column.
+
+        :param name: The column name, such as `device.id`.
+        :type name: str
+        :rtype: list
+        """
+        column = self._columns[name]
+        return [column.get(index) for index in range(self._length)]
+
+    def to_dataframe(self):
+        """Transforms the data into a pandas DataFrame, with a column per flattened column name. Numeric and date
+        columns are copied from the list in bulk, and string columns become categoricals.
+
+        :rtype: pandas.DataFrame
+        """
+        try:
+            import pandas
+        except ImportError as exc:
+            raise ImportError("The 'pandas' package could not be imported") from exc
+        series = {}
+        for name, column in self._columns.items():
+            values, valid = column.to_numpy()
+            if column.kind == "string":
+                data = pandas.Categorical.from_codes(values, column.categories)
+            elif column.kind == "datetime":
+                data = pandas.DatetimeIndex(values).tz_localize("UTC")
+            elif column.kind == "int":
+                data = pandas.arrays.IntegerArray(values, ~valid)
+            elif column.kind == "float":
+                data = pandas.arrays.FloatingArray(values, ~valid)
+            elif column.kind == "bool":
+                data = pandas.arrays.BooleanArray(values, ~valid)
+            else:
+                data = values
+            series[name] = pandas.Series(data, name=name, copy=False)
+        return pandas.DataFrame(series, copy=False)
+
+    def to_arrow(self):
+        """Transforms the data into an Apache Arrow Table, with a column per flattened column name. Numeric and date
+        columns are copied from the list in bulk, and string columns become dictionary arrays. Columns of other values
+        that Arrow can't put in a single type, such as a mix of numbers and strings, become string columns, with the
+        values that aren't strings as JSON.
+
+        :rtype: pyarrow.Table
+        """
+        try:
+            import pyarrow
+        except ImportError as exc:
+            raise ImportError("The 'pyarrow' package could not be imported") from exc
+        arrays = {}
+        for name, column in self._columns.items():
+            values, valid = column.to_numpy()
+            mask = ~valid
+            if column.kind == "string":
+                arrays[name] = pyarrow.DictionaryArray.from_arrays(
+                    pyarrow.array(values, mask=mask, type=pyarrow.int32()), pyarrow.array(column.categories)
+                )
+            elif column.kind == "datetime":
+                arrays[name] = pyarrow.array(values, mask=mask, type=pyarrow.timestamp("us", tz="UTC"))
+            elif column.kind in ("int", "float", "bool"):
+                arrays[name] = pyarrow.array(values, mask=mask)
+            else:
+                arrays[name] = _object_array(pyarrow, list(values))
+        return pyarrow.table(arrays)
+
+    def to_parquet(self, path, **writer_options):
+        """Writes the data to a Parquet file.
+
+        :param path: The path to the Parquet file.
+        :type path: str
+        :param writer_options: Additional options for `pyarrow.parquet.write_table`, such as `compression`.
+        """
+        import pyarrow.parquet
+
+        pyarrow.parquet.write_table(self.to_arrow(), path, **writer_options)
+
+
+class ColumnarRow(Mapping):
+    """A read-only, dict-like view of an entity in a ColumnarEntityList."""
+
+    __slots__ = ("_entity_list", "_index")
+
+    def __init__(self, entity_list, index):
+        self._entity_list = entity_list
+        self._index = index
+
+    def to_dict(self):
+        """Gets the entity as a nested dict, like the one returned by the API.
+
+        :rtype: dict
+        """
+        entity = {}
+        for name, column in self._entity_list._columns.items():
+            if column.valid[self._index]:
+                _unflatten(entity, name, column.get(self._index))
+        return entity
+
+    def __getitem__(self, key):
+        columns = self._entity_list._columns
+        column = columns.get(key)
+        if column is not None:
+            if column.valid[self._index]:
+                return column.get(self._index)
+            raise KeyError(key)
+        prefix = key + "."
+        nested = {}
+        for name, column in columns.items():
+            if name.startswith(prefix) and column.valid[self._index]:
+                _unflatten(nested, name[len(prefix):], column.get(self._index))
+        if not nested:
+            raise KeyError(key)
+        return nested
+
+    def __iter__(self):
+        return iter(self.to_dict())
+
+    def __len__(self):
+        return len(self.to_dict())
+
+    def __repr__(self):
+        return repr(self.to_dict())
+
+
+def _object_array(pyarrow, values):
+    """Converts a list of values to an Arrow array, falling back to strings when they don't fit in a single type.
+
+    :param values: The values of a column, with None for missing values.
+    :type values: list
+    """
+    try:
+        return pyarrow.array(values)
+    except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError):
+        return pyarrow.array(
+            [value if value is None or isinstance(value, str) else json_serialize(value) for value in values],
+            type=pyarrow.string(),
+        )
+
+
+def _flatten(entity, prefix, flattened):
+    for key, value in entity.items():
+        name = prefix + key
+        if isinstance(value, dict) and value:
+            _flatten(value, name + ".", flattened)
+        else:
+            flattened[name] = value
+
+
+def _unflatten(entity, name, value):
+    *parents, key = name.split(".")
+    for parent in parents:
+        entity = entity.setdefault(parent, {})
+    entity[key] = value
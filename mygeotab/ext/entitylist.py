@@ -1,8 +1,14 @@
 # -*- coding: utf-8 -*-
 
+import functools
 from collections import UserList
+from datetime import datetime, timezone
 from mygeotab import api
 
+from . import tables
+
+MAX_CATEGORY_RATIO = 0.5
+
 
 class API(api.API):
     """An experimental wrapper around the base MyGeotab API class that adds some helper methods to results when
@@ -24,6 +30,74 @@ class API(api.API):
         return EntityList(super().get(type_name, **parameters), type_name=type_name)
 
 
+def _get_path(entity, path):
+    """Gets the value at a dotted path in an entity, such as `device.id`.
+
+    :return: The value, or None if any part of the path is missing.
+    """
+    value = entity
+    for key in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def _sort_value(value, reverse):
+    """Gets a sort key that can be compared with the sort key of any other value."""
+    if value is None:
+        return (-1,) if reverse else (4,)
+    if isinstance(value, (int, float)):
+        return (0, value)
+    if isinstance(value, str):
+        return (1, value.lower())
+    if isinstance(value, datetime):
+        return (2, value if value.tzinfo else value.replace(tzinfo=timezone.utc))
+    return (3, str(value))
+
+
+def _sort_order(order, values, reverse):
+    """Sorts the indexes of the entities by their values.
+
+    :param order: The current order of the entity indexes.
+    :type order: list(int)
+    :param values: The value of each entity, by entity index.
+    :type values: list
+    :param reverse: If true, reverse the sort direction.
+    :type reverse: bool
+    :return: The new order of the entity indexes.
+    :rtype: list(int)
+    """
+    value_types = set(map(type, values))
+    if len(order) > 1 and value_types <= {int, float}:
+        try:
+            import numpy
+
+            ordered_values = numpy.asarray(values, dtype=numpy.int64 if value_types == {int} else numpy.float64)[order]
+        except (ImportError, OverflowError):
+            ordered_values = None
+        if ordered_values is not None:
+            if reverse:
+                # Sort the reversed values and flip the result, so equal values keep their order
+                positions = (len(order) - 1 - numpy.argsort(ordered_values[::-1], kind="stable"))[::-1]
+            else:
+                positions = numpy.argsort(ordered_values, kind="stable")
+            return numpy.asarray(order)[positions].tolist()
+    sort_values = [_sort_value(value, reverse) for value in values]
+    return sorted(order, key=sort_values.__getitem__, reverse=reverse)
+
+
+def _invalidates_indexes(method):
+    """Wraps a UserList method that changes the list, so it clears the cached indexes."""
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        self._indexes = {}
+        return method(self, *args, **kwargs)
+
+    return wrapper
+
+
 class EntityList(UserList):
     """The customized result list"""
 
@@ -37,6 +111,7 @@ class EntityList(UserList):
         """
         super(EntityList, self).__init__(data)
         self.type_name = type_name
+        self._indexes = {}
 
     def _repr_pretty_(self, p, cycle):
         """The pretty printer for IPython"""
@@ -87,23 +162,80 @@ class EntityList(UserList):
         inst.__dict__["data"] = self.__dict__["data"][:]
         return inst
 
-    def sort_by(self, key, reverse=False):
-        """Returns an EntityList, sorted by a provided key.
+    __setitem__ = _invalidates_indexes(UserList.__setitem__)
+    __delitem__ = _invalidates_indexes(UserList.__delitem__)
+    __iadd__ = _invalidates_indexes(UserList.__iadd__)
+    __imul__ = _invalidates_indexes(UserList.__imul__)
+    append = _invalidates_indexes(UserList.append)
+    insert = _invalidates_indexes(UserList.insert)
+    pop = _invalidates_indexes(UserList.pop)
+    remove = _invalidates_indexes(UserList.remove)
+    clear = _invalidates_indexes(UserList.clear)
+    extend = _invalidates_indexes(UserList.extend)
+    sort = _invalidates_indexes(UserList.sort)
+    reverse = _invalidates_indexes(UserList.reverse)
+
+    @property
+    def by_id(self):
+        """Gets the entities by id. Shortcut for `index_by("id")`.
+
+        :rtype: dict
+        """
+        return self.index_by("id")
 
-        :param key: The key to sort the data with.
+    def index_by(self, key):
+        """Gets the entities by the value of a key. If several entities have the same value, the last one is kept.
+        The index is built on first use and kept until the list is changed. Changes to the entities themselves
+        aren't detected, so don't change the indexed values of entities in the list.
+
+        :param key: The key to index the data with. Use dots for nested keys, such as `device.id`.
         :type key: str
+        :rtype: dict
+        """
+        cache_key = ("index", key)
+        index = self._indexes.get(cache_key)
+        if index is None:
+            index = self._indexes[cache_key] = {_get_path(entity, key): entity for entity in self.data}
+        return index
+
+    def group_by(self, key):
+        """Groups the entities by the value of a key. The groups are built on first use and kept until the list is
+        changed.
+
+        :param key: The key to group the data with. Use dots for nested keys, such as `device.id`.
+        :type key: str
+        :return: The EntityList of each value, in the order the values first appear.
+        :rtype: dict
+        """
+        cache_key = ("group", key)
+        groups = self._indexes.get(cache_key)
+        if groups is None:
+            grouped_data = {}
+            for entity in self.data:
+                grouped_data.setdefault(_get_path(entity, key), []).append(entity)
+            groups = {value: self.__class__(data, self.type_name) for value, data in grouped_data.items()}
+            self._indexes[cache_key] = groups
+        return groups
+
+    def sort_by(self, key, reverse=False):
+        """Returns an EntityList, sorted by one or more keys. Strings are compared without case, missing values always
+        come last, and values of different types are grouped by type (numbers, then strings, then dates) rather than
+        failing to compare. The sort is stable.
+
+        :param key: The key to sort the data with, or a list of keys to sort by in order of priority. Use dots for
+                    nested keys, such as `device.id`.
+        :type key: str or list(str)
         :param reverse: If true, reverse the sort direction.
         :type reverse: bool
         :rtype: EntityList
         """
-
-        def sort_by_key(entity):
-            prop = entity[key]
-            if isinstance(prop, str):
-                return prop.lower()
-            return prop
-
-        return self.__class__(sorted(self.data, key=sort_by_key, reverse=reverse), type_name=self.type_name)
+        keys = [key] if isinstance(key, str) else list(key)
+        order = list(range(len(self.data)))
+        # Sort by the least important key first, relying on the sort being stable
+        for sort_key in reversed(keys):
+            values = [_get_path(entity, sort_key) for entity in self.data]
+            order = _sort_order(order, values, reverse)
+        return self.__class__([self.data[index] for index in order], type_name=self.type_name)
 
     @property
     def first(self):
@@ -131,17 +263,23 @@ class EntityList(UserList):
         assert data_length == 1, "Expecting one entity, but {} entities were returned".format(data_length)
         return self.first
 
-    def to_dataframe(self, normalize=False):
+    def to_dataframe(self, normalize=False, typed=False):
         """Transforms the data into a pandas DataFrame
 
         :param normalize: Whether or not to normalize any nested objects in the results into distinct columns.
         :type normalize: bool
+        :param typed: Whether or not to build typed, normalized columns in a single pass over the data: dates become
+                      UTC datetime columns, numbers become numeric columns, and strings that repeat (like
+                      `device.id`) become categoricals. This is much faster than `normalize` on large results.
+        :type typed: bool
         :rtype: pandas.DataFrame
         """
         try:
             import pandas
         except ImportError as exc:
             raise ImportError("The 'pandas' package could not be imported") from exc
+        if typed:
+            return _typed_dataframe(pandas, self.data)
         if normalize:
             try:
                 return pandas.json_normalize(self.data)
@@ -151,3 +289,110 @@ class EntityList(UserList):
                 return json_normalize(self.data)
 
         return pandas.DataFrame.from_dict(self.data)
+
+    def to_arrow(self, schema=None):
+        """Transforms the data into an Apache Arrow Table. Nested entities become struct columns, and dates become
+        UTC timestamp columns.
+
+        :param schema: The schema of the table. By default, it is inferred from the data.
+        :type schema: pyarrow.Schema or None
+        :rtype: pyarrow.Table
+        """
+        return tables.entities_to_arrow(self.data, schema=schema)
+
+    def to_parquet(self, path, schema=None, row_group_size=tables.DEFAULT_ROW_GROUP_SIZE, **writer_options):
+        """Writes the data to a Parquet file, one row group at a time.
+
+        :param path: The path to the Parquet file.
+        :type path: str
+        :param schema: The schema of the file. By default, it is inferred from the entities, and widened as later row
+                       groups have new columns.
+        :type schema: pyarrow.Schema or None
+        :param row_group_size: The number of entities per row group.
+        :type row_group_size: int
+        :param writer_options: Additional options for `pyarrow.parquet.ParquetWriter`, such as `compression`.
+        :return: The number of entities written.
+        :rtype: int
+        """
+        return tables.write_parquet(self.data, path, schema=schema, row_group_size=row_group_size, **writer_options)
+
+
+def _collect_columns(data):
+    """Flattens entities into lists of values, by dotted column name, in a single pass.
+
+    :param data: The list of entities.
+    :type data: list[dict]
+    :rtype: dict
+    """
+    length = len(data)
+    columns = {}
+
+    def collect(index, entity, prefix):
+        for key, value in entity.items():
+            if value.__class__ is dict and value:
+                collect(index, value, prefix + key + ".")
+                continue
+            column = columns.get(prefix + key)
+            if column is None:
+                column = columns[prefix + key] = [None] * length
+            column[index] = value
+
+    for index, entity in enumerate(data):
+        for key, value in entity.items():
+            if value.__class__ is dict and value:
+                # Most nested values are references to other entities, like `device: {id}`
+                collect(index, value, key + ".")
+                continue
+            column = columns.get(key)
+            if column is None:
+                column = columns[key] = [None] * length
+            column[index] = value
+    return columns
+
+
+def _typed_column(pandas, values):
+    """Converts a list of values to the narrowest pandas-compatible column that holds them all.
+
+    :param values: The values of a column, with None for missing values.
+    :type values: list
+    """
+    import numpy
+
+    value_types = set(map(type, values))
+    has_nulls = type(None) in value_types
+    value_types.discard(type(None))
+    if not value_types:
+        return _object_column(numpy, values)
+    if value_types <= {int, float}:
+        if value_types == {int} and not has_nulls:
+            try:
+                return numpy.array(values, dtype=numpy.int64)
+            except OverflowError:
+                # Integers that don't fit in int64 are kept exactly, as Python ints
+                return _object_column(numpy, values)
+        return numpy.array(values, dtype=numpy.float64)
+    if value_types == {bool}:
+        return pandas.array(values, dtype="boolean") if has_nulls else numpy.array(values, dtype=numpy.bool_)
+    if all(issubclass(value_type, datetime) for value_type in value_types):
+        return pandas.to_datetime(values, utc=True)
+    if value_types == {str} and len(set(values)) <= MAX_CATEGORY_RATIO * len(values):
+        return pandas.Categorical(values)
+    return _object_column(numpy, values)
+
+
+def _object_column(numpy, values):
+    """Builds a 1-dimensional object array of the values. Unlike `numpy.array`, this keeps list values, like the
+    groups of a Device, as elements instead of turning lists of the same length into a second dimension.
+
+    :param values: The values of a column.
+    :type values: list
+    """
+    column = numpy.empty(len(values), dtype=object)
+    column[:] = values
+    return column
+
+
+def _typed_dataframe(pandas, data):
+    """Builds a DataFrame with typed, normalized columns from a list of entities."""
+    columns = _collect_columns(data)
+    return pandas.DataFrame({name: _typed_column(pandas, values) for name, values in columns.items()}, copy=False)
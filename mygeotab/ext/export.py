@@ -0,0 +1,355 @@
+# -*- coding: utf-8 -*-
+
+"""
+mygeotab.ext.export
+~~~~~~~~~~~~~~~~~~~
+
+Streams every entity of a type to a file, one page at a time, with NDJSON, CSV and Parquet sinks.
+"""
+
+import abc
+import csv
+import logging
+import os
+from datetime import datetime
+
+from mygeotab import dates
+from mygeotab.serializers import json_serialize
+
+from . import tables
+from .columnar import _flatten
+
+DEFAULT_PAGE_SIZE = 5000
+FORMATS = ("ndjson", "csv", "parquet")
+
+_log = logging.getLogger(__name__)
+
+
+class ExportSink(object):
+    """The abstract ExportSink to override. Sinks are also context managers, which close the sink on exit."""
+
+    __metaclass__ = abc.ABCMeta
+
+    @abc.abstractmethod
+    def write(self, entities):
+        """Writes a page of entities.
+
+        :param entities: The entities.
+        :type entities: list[dict]
+        """
+        return
+
+    def flush(self):
+        """Makes the entities written so far durable, if the sink can.
+
+        :return: True if every entity written so far is durable, and the export can be resumed after them.
+        :rtype: bool
+        """
+        return False
+
+    def close(self):
+        """Finishes writing, and closes the sink."""
+        return
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class NDJSONSink(ExportSink):
+    """Writes entities as newline-delimited JSON, one entity per line."""
+
+    def __init__(self, path, append=False):
+        """Initializes the NDJSONSink object.
+
+        :param path: The path to the file.
+        :type path: str
+        :param append: If True, entities are added to the end of an existing file, to resume an export.
+        :type append: bool
+        """
+        self.path = path
+        self._file = open(path, "a" if append else "w", encoding="utf-8", newline="\n")
+
+    def write(self, entities):
+        self._file.writelines(json_serialize(entity) + "\n" for entity in entities)
+
+    def flush(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return True
+
+    def close(self):
+        self._file.close()
+
+
+class CSVSink(ExportSink):
+    """Writes entities as CSV rows. Nested entities are flattened into columns with dotted names, such as `device.id`,
+    dates are written in ISO 8601 format, and lists are written as JSON.
+    """
+
+    def __init__(self, path, columns=None, append=False):
+        """Initializes the CSVSink object.
+
+        :param path: The path to the file.
+        :type path: str
+        :param columns: The columns to write. By default, these are the columns of the first page of entities, or the
+                        header of the existing file when appending. Other columns are left out, with a warning.
+        :type columns: list(str) or None
+        :param append: If True, rows are added to the end of an existing file, to resume an export.
+        :type append: bool
+        """
+        self.path = path
+        if append and columns is None and os.path.exists(path):
+            with open(path, encoding="utf-8", newline="") as existing:
+                columns = next(csv.reader(existing), None)
+        self.columns = columns
+        write_header = not (append and os.path.exists(path) and os.path.getsize(path) > 0)
+        self._file = open(path, "a" if append else "w", encoding="utf-8", newline="")
+        self._writer = None
+        self._write_header = write_header
+        self._left_out_columns = set()
+
+    @staticmethod
+    def _format(value):
+        if isinstance(value, datetime):
+            return dates.format_iso_datetime(value)
+        if isinstance(value, (list, dict)):
+            return json_serialize(value)
+        return value
+
+    def write(self, entities):
+        rows = []
+        for entity in entities:
+            row = {}
+            _flatten(entity, "", row)
+            rows.append(row)
+        if self._writer is None:
+            if self.columns is None:
+                self.columns = list(dict.fromkeys(name for row in rows for name in row))
+            self._writer = csv.DictWriter(self._file, self.columns, extrasaction="ignore")
+            self._left_out_columns.update(self.columns)
+            if self._write_header:
+                self._writer.writeheader()
+        left_out = {name for row in rows for name in row}.difference(self._left_out_columns)
+        if left_out:
+            # The header is already written, so columns seen after the first page can't be added to it
+            self._left_out_columns.update(left_out)
+            _log.warning(
+                "Columns left out of %s, as they are not in its header: %s", self.path, ", ".join(sorted(left_out))
+            )
+        self._writer.writerows({name: self._format(value) for name, value in row.items()} for row in rows)
+
+    def flush(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return True
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetSink(ExportSink):
+    """Writes entities to Parquet files, one row group at a time. This requires the optional `pyarrow` package.
+
+    A Parquet file can only be read once it is closed, so an export can only be resumed after a file was completed.
+    Set `rows_per_file` to split the export into several files (`trips.parquet`, `trips.1.parquet`, ...), each of which
+    can be resumed after.
+    """
+
+    def __init__(
+        self,
+        path,
+        schema=None,
+        append=False,
+        row_group_size=tables.DEFAULT_ROW_GROUP_SIZE,
+        rows_per_file=None,
+        **writer_options,
+    ):
+        """Initializes the ParquetSink object.
+
+        :param path: The path to the first file.
+        :type path: str
+        :param schema: The schema of the files. By default, it is inferred from the entities, and widened as later row
+                       groups have new columns.
+        :type schema: pyarrow.Schema or None
+        :param append: If True, the existing files are kept, and entities are written to the next unused file name, to
+                       resume an export.
+        :type append: bool
+        :param row_group_size: The number of entities per row group.
+        :type row_group_size: int
+        :param rows_per_file: The number of entities after which a new file is started. By default, a single file is
+                              written.
+        :type rows_per_file: int or None
+        :param writer_options: Additional options for `pyarrow.parquet.ParquetWriter`, such as `compression`.
+        """
+        self.pyarrow = tables._import_pyarrow()
+        self.path = path
+        self.schema = schema
+        self.row_group_size = row_group_size
+        self.rows_per_file = rows_per_file
+        self.writer_options = writer_options
+        self.paths = []
+        self._part = 0
+        if append:
+            while os.path.exists(self._part_path(self._part)):
+                self._part += 1
+        self._writer = None
+        self._inferred_schema = None
+        self._file_rows = 0
+        self._buffer = []
+
+    def _part_path(self, part):
+        if part == 0:
+            return self.path
+        root, extension = os.path.splitext(self.path)
+        return "{}.{}{}".format(root, part, extension)
+
+    def _write_row_group(self):
+        if not self._buffer:
+            return
+        if self._writer is None:
+            path = self._part_path(self._part)
+            # Each file starts with the schema of the previous one, so they all have the same columns when possible
+            self._writer = tables._ParquetFileWriter(
+                self.pyarrow,
+                path,
+                self.schema or self._inferred_schema,
+                widen_schema=self.schema is None,
+                **self.writer_options,
+            )
+            self.paths.append(path)
+        self._writer.write(self._buffer)
+        self._inferred_schema = self._writer.schema
+        self._buffer = []
+
+    def _close_file(self):
+        self._write_row_group()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            self._part += 1
+        self._file_rows = 0
+
+    def write(self, entities):
+        for entity in entities:
+            self._buffer.append(entity)
+            self._file_rows += 1
+            if len(self._buffer) >= self.row_group_size:
+                self._write_row_group()
+            if self.rows_per_file and self._file_rows >= self.rows_per_file:
+                self._close_file()
+
+    def flush(self):
+        # Files are only durable once closed, so this is only True right after a file was completed
+        return self._writer is None and not self._buffer
+
+    def close(self):
+        self._close_file()
+        if not self.paths and self.schema is not None:
+            path = self._part_path(self._part)
+            self.pyarrow.parquet.write_table(self.schema.empty_table(), path, **self.writer_options)
+            self.paths.append(path)
+
+
+def open_sink(path, format=None, append=False, **options):
+    """Creates the sink for a file.
+
+    :param path: The path to the file.
+    :type path: str
+    :param format: The file format, one of `FORMATS`. By default, it is taken from the extension of the path.
+    :type format: str or None
+    :param append: If True, entities are added after the ones already exported, to resume an export.
+    :type append: bool
+    :param options: Additional options for the sink.
+    :raise ValueError: Raises when the format is not supported.
+    :rtype: ExportSink
+    """
+    if format is None:
+        format = os.path.splitext(path)[1].lstrip(".").lower()
+        format = {"json": "ndjson", "jsonl": "ndjson", "pq": "parquet"}.get(format, format)
+    if format == "ndjson":
+        return NDJSONSink(path, append=append, **options)
+    if format == "csv":
+        return CSVSink(path, append=append, **options)
+    if format == "parquet":
+        return ParquetSink(path, append=append, **options)
+    raise ValueError("Unsupported export format '{}'. Use one of: {}".format(format, ", ".join(FORMATS)))
+
+
+def iter_pages(client_api, type_name, search=None, page_size=DEFAULT_PAGE_SIZE, last_id=None):
+    """Gets every entity of a type, one page at a time, in order of id.
+
+    :param client_api: The MyGeotab API object.
+    :param type_name: The type of entity.
+    :type type_name: str
+    :param search: The search object.
+    :type search: dict or None
+    :param page_size: The number of entities to get per call.
+    :type page_size: int
+    :param last_id: The id of the entity to start after. By default, this starts from the first entity.
+    :type last_id: str or None
+    :rtype: Iterator[list[dict]]
+    """
+    while True:
+        sort = dict(sortBy="id", sortDirection="asc")
+        if last_id is not None:
+            sort.update(offset=last_id, lastId=last_id)
+        page = client_api.call("Get", typeName=type_name, search=search or {}, resultsLimit=page_size, sort=sort)
+        if not page:
+            return
+        yield page
+        if len(page) < page_size:
+            return
+        last_id = page[-1]["id"]
+
+
+def export_entities(
+    client_api,
+    type_name,
+    sink,
+    search=None,
+    page_size=DEFAULT_PAGE_SIZE,
+    checkpoint_store=None,
+    checkpoint_key=None,
+    progress=None,
+):
+    """Exports every entity of a type to a sink. Only one page of entities is held in memory at a time.
+
+    If a checkpoint store is given, the id of the last durable entity is saved to it, and the export resumes after
+    that entity. Entities written after the last checkpoint may be exported again when resuming.
+
+    :param client_api: The MyGeotab API object.
+    :param type_name: The type of entity.
+    :type type_name: str
+    :param sink: The ExportSink to write to (see `open_sink()`). It is closed once the export is complete.
+    :type sink: ExportSink
+    :param search: The search object.
+    :type search: dict or None
+    :param page_size: The number of entities to get per call.
+    :type page_size: int
+    :param checkpoint_store: The CheckpointStore to save the progress of the export to.
+    :type checkpoint_store: CheckpointStore or None
+    :param checkpoint_key: The name of the export in the checkpoint store. By default, this is `export:<type_name>`.
+    :type checkpoint_key: str or None
+    :param progress: A function called with the number of entities exported so far, after every page.
+    :type progress: callable or None
+    :return: The number of entities exported.
+    :rtype: int
+    """
+    checkpoint_key = checkpoint_key or "export:{}".format(type_name)
+    last_id = checkpoint_store.load(checkpoint_key) if checkpoint_store is not None else None
+    count = 0
+    with sink:
+        for page in iter_pages(client_api, type_name, search, page_size, last_id):
+            sink.write(page)
+            count += len(page)
+            last_id = page[-1]["id"]
+            if sink.flush() and checkpoint_store is not None:
+                checkpoint_store.save(checkpoint_key, last_id)
+            if progress is not None:
+                progress(count)
+    if checkpoint_store is not None and last_id is not None:
+        checkpoint_store.save(checkpoint_key, last_id)
+    return count
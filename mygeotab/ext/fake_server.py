@@ -0,0 +1,478 @@
+# -*- coding: utf-8 -*-
+
+"""
+mygeotab.ext.fake_server
+~~~~~~~~~~~~~~~~~~~~~~~~
+
+A local stand-in for a MyGeotab server, with synthetic data, for benchmarks and offline testing.
+"""
+
+import asyncio
+import copy
+import random
+import socket
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from threading import Event, Lock, Thread
+from time import monotonic
+
+import click
+from aiohttp import web
+
+from mygeotab import dates
+from mygeotab.serializers import json_deserialize, json_serialize
+
+DEFAULT_ENTITY_COUNT = 1000
+DEFAULT_FEED_LIMIT = 50000
+_START_DATE = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def generate_entity(type_name, index):
+    """Generates a synthetic entity. The same type and index always generate the same entity.
+
+    :param type_name: The type of entity.
+    :type type_name: str
+    :param index: The index of the entity, which is used for its id.
+    :type index: int
+    :rtype: dict
+    """
+    entity_id = "b{:08X}".format(index + 1)
+    date_time = _START_DATE + timedelta(seconds=index)
+    device = dict(id="b{:X}".format(index % 100 + 1))
+    if type_name == "LogRecord":
+        return dict(
+            id=entity_id,
+            dateTime=date_time,
+            device=device,
+            latitude=43.45 + (index % 1000) / 10000.0,
+            longitude=-79.68 - (index % 1000) / 10000.0,
+            speed=float(index % 120),
+        )
+    if type_name == "StatusData":
+        return dict(
+            id=entity_id,
+            dateTime=date_time,
+            device=device,
+            diagnostic=dict(id="DiagnosticEngineSpeedId"),
+            controller="ControllerNoneId",
+            data=float(index % 3000),
+            version="{:016x}".format(index + 1),
+        )
+    if type_name == "Device":
+        return dict(
+            id=entity_id,
+            name="Vehicle {}".format(index + 1),
+            serialNumber="G9{:010d}".format(index + 1),
+            groups=[dict(id="GroupCompanyId")],
+            activeFrom=_START_DATE,
+            activeTo=datetime(2050, 1, 1, tzinfo=timezone.utc),
+            version="{:016x}".format(index + 1),
+        )
+    return dict(id=entity_id, name="{} {}".format(type_name, index + 1), version="{:016x}".format(index + 1))
+
+
+class FakeServerError(Exception):
+    """An error to return to the client, as a MyGeotab JSON-RPC error."""
+
+    def __init__(self, name, message):
+        """Initializes the FakeServerError object.
+
+        :param name: The name of the server exception, such as `InvalidUserException`.
+        :param message: The message of the error.
+        """
+        super(FakeServerError, self).__init__(message)
+        self.name = name
+        self.message = message
+
+    def to_response(self):
+        """Gets the JSON-RPC error response.
+
+        :rtype: dict
+        """
+        error = dict(name=self.name, message=self.message)
+        return dict(error=dict(message=self.message, name="JSONRPCError", errors=[error]))
+
+
+class FakeServer(object):
+    """A local stand-in for a MyGeotab server, which speaks the JSON-RPC API over HTTP (on `/apiv1`) on a background
+    thread. Unlike mocked requests, calls to it go through real sockets and HTTP clients.
+
+    It supports `Authenticate`, `ExtendSession`, `GetVersion`, `Get`, `GetCountOf`, `GetFeed`, `Add`, `Set`,
+    `Remove` and `ExecuteMultiCall`. Every type starts with `entity_count` synthetic entities (see
+    `generate_entity()`), and changes made with `Add` and `Set` show up in the data feed of the type. Latency, errors
+    and rate limits can be injected to test how clients cope with them.
+
+    Use it as a context manager, and pass its `url` as the server of the API object.
+    """
+
+    def __init__(
+        self,
+        host="127.0.0.1",
+        port=0,
+        database="fakedb",
+        entity_count=DEFAULT_ENTITY_COUNT,
+        users=None,
+        latency=0,
+        error_rate=0,
+        error_name="DbUnavailableException",
+        rate_limit=None,
+        seed=None,
+    ):
+        """Initializes the FakeServer object.
+
+        :param host: The host to listen on.
+        :type host: str
+        :param port: The port to listen on. By default, a free port is picked.
+        :type port: int
+        :param database: The name of the database.
+        :type database: str
+        :param entity_count: The number of synthetic entities of each type.
+        :type entity_count: int
+        :param users: The passwords of the users allowed to authenticate, by username. By default, anyone can.
+        :type users: dict or None
+        :param latency: The time to wait before responding (in seconds), or a (minimum, maximum) tuple to wait a
+                        random time in between.
+        :type latency: float or tuple(float, float)
+        :param error_rate: The fraction of calls that fail with an `error_name` error, from 0 to 1.
+        :type error_rate: float
+        :param error_name: The name of the server exception of the injected errors.
+        :type error_name: str
+        :param rate_limit: The maximum number of calls of each method per period, as a (calls, period in seconds) tuple.
+                           Calls over the limit fail with an `OverLimitException`, like MyGeotab's API rate limits.
+        :type rate_limit: tuple(int, float) or None
+        :param seed: The seed of the random latency and errors, to make them repeatable.
+        :type seed: int or None
+        """
+        self.host = host
+        self.port = port
+        self.database = database
+        self.entity_count = entity_count
+        self.users = users
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_name = error_name
+        self.rate_limit = rate_limit
+        self.requests = 0
+        self.calls = {}
+        self._random = random.Random(seed)
+        self._lock = Lock()
+        self._stores = {}
+        self._feeds = {}
+        self._next_ids = {}
+        self._sessions = set()
+        self._call_times = {}
+        self._failures = deque()
+        self._loop = None
+        self._runner = None
+        self._thread = None
+
+    @property
+    def url(self):
+        """The URL of the API, such as `http://127.0.0.1:8080/apiv1`.
+
+        :rtype: str
+        """
+        return "http://{}:{}/apiv1".format(self.host, self.port)
+
+    def _store(self, type_name):
+        store = self._stores.get(type_name)
+        if store is None:
+            entities = [generate_entity(type_name, index) for index in range(self.entity_count)]
+            store = self._stores[type_name] = {entity["id"]: entity for entity in entities}
+            self._feeds[type_name] = list(entities)
+            self._next_ids[type_name] = self.entity_count
+        return store
+
+    def entities(self, type_name):
+        """Gets the current entities of a type.
+
+        :param type_name: The type of entity.
+        :type type_name: str
+        :rtype: list[dict]
+        """
+        with self._lock:
+            return list(self._store(type_name).values())
+
+    def fail_next(self, name, message=None, count=1):
+        """Makes the next calls fail with an error.
+
+        :param name: The name of the server exception, such as `InvalidUserException`.
+        :type name: str
+        :param message: The message of the error.
+        :type message: str or None
+        :param count: The number of calls to fail.
+        :type count: int
+        """
+        with self._lock:
+            self._failures.extend([FakeServerError(name, message or "Injected {}".format(name))] * count)
+
+    def expire_sessions(self):
+        """Expires every session, so calls fail with an `InvalidUserException` until clients authenticate again."""
+        with self._lock:
+            self._sessions.clear()
+
+    def _authenticate(self, params):
+        username = params.get("userName")
+        if self.users is not None and (username not in self.users or self.users[username] != params.get("password")):
+            raise FakeServerError("InvalidUserException", "Incorrect login credentials")
+        session_id = "fake-session-{}".format(len(self._sessions) + 1)
+        self._sessions.add(session_id)
+        credentials = dict(userName=username, sessionId=session_id, database=params.get("database") or self.database)
+        return dict(credentials=credentials, path="ThisServer")
+
+    def _check_session(self, params):
+        credentials = params.get("credentials") or {}
+        if credentials.get("sessionId") not in self._sessions:
+            raise FakeServerError("InvalidUserException", "Incorrect login credentials")
+
+    @staticmethod
+    def _matches(entity, search):
+        for key, value in search.items():
+            if key == "fromDate":
+                if entity.get("dateTime") is not None and entity["dateTime"] < _parse_date(value):
+                    return False
+            elif key == "toDate":
+                if entity.get("dateTime") is not None and entity["dateTime"] > _parse_date(value):
+                    return False
+            elif key == "deviceSearch":
+                device_id = (value or {}).get("id")
+                if device_id is not None and (entity.get("device") or {}).get("id") != device_id:
+                    return False
+            elif isinstance(value, (str, int, float, bool)) and key in entity and entity[key] != value:
+                return False
+        return True
+
+    def _search(self, params):
+        store = self._store(params.get("typeName"))
+        search = params.get("search") or {}
+        if search.get("id"):
+            entity = store.get(search["id"])
+            return [entity] if entity is not None else []
+        entities = [entity for entity in store.values() if self._matches(entity, search)]
+        sort = params.get("sort") or {}
+        if sort.get("sortBy") == "id":
+            descending = sort.get("sortDirection") == "desc"
+            entities.sort(key=lambda entity: entity["id"], reverse=descending)
+            last_id = sort.get("lastId")
+            if last_id is not None:
+                if descending:
+                    entities = [entity for entity in entities if entity["id"] < last_id]
+                else:
+                    entities = [entity for entity in entities if entity["id"] > last_id]
+        return entities
+
+    def _get(self, params):
+        entities = self._search(params)
+        results_limit = params.get("resultsLimit")
+        return entities[:results_limit] if results_limit else entities
+
+    def _get_count_of(self, params):
+        return len(self._search(params))
+
+    def _get_feed(self, params):
+        type_name = params.get("typeName")
+        self._store(type_name)
+        feed = self._feeds[type_name]
+        start = int(params.get("fromVersion") or "0", 16)
+        end = start + min(params.get("resultsLimit") or DEFAULT_FEED_LIMIT, DEFAULT_FEED_LIMIT)
+        data = feed[start:end]
+        return dict(data=data, toVersion="{:016x}".format(start + len(data)))
+
+    def _add(self, params):
+        type_name = params.get("typeName")
+        store = self._store(type_name)
+        entity = copy.deepcopy(params.get("entity") or {})
+        self._next_ids[type_name] += 1
+        entity["id"] = "b{:08X}".format(self._next_ids[type_name])
+        store[entity["id"]] = entity
+        self._feeds[type_name].append(entity)
+        return entity["id"]
+
+    def _set(self, params):
+        type_name = params.get("typeName")
+        store = self._store(type_name)
+        entity = params.get("entity") or {}
+        entity_id = entity.get("id")
+        current = store.get(entity_id)
+        if current is None:
+            raise FakeServerError("InvalidOperationException", "The entity '{}' does not exist".format(entity_id))
+        updated = dict(current, **copy.deepcopy(entity))
+        store[updated["id"]] = updated
+        self._feeds[type_name].append(updated)
+
+    def _remove(self, params):
+        store = self._store(params.get("typeName"))
+        entity_id = (params.get("entity") or {}).get("id")
+        if store.pop(entity_id, None) is None:
+            raise FakeServerError("InvalidOperationException", "The entity '{}' does not exist".format(entity_id))
+
+    def _execute_multi_call(self, params):
+        return [self._dispatch(call["method"], call.get("params") or {}) for call in params.get("calls", [])]
+
+    def _dispatch(self, method, params):
+        handler = {
+            "Add": self._add,
+            "ExecuteMultiCall": self._execute_multi_call,
+            "Get": self._get,
+            "GetCountOf": self._get_count_of,
+            "GetFeed": self._get_feed,
+            "GetVersion": lambda params: "0.0.0",
+            "Remove": self._remove,
+            "Set": self._set,
+        }.get(method)
+        if handler is None:
+            raise FakeServerError("MissingMethodException", "The method '{}' could not be found.".format(method))
+        return handler(params)
+
+    def _check_rate_limit(self, method):
+        if not self.rate_limit:
+            return
+        limit, period = self.rate_limit
+        now = monotonic()
+        call_times = self._call_times.setdefault(method, deque())
+        while call_times and call_times[0] <= now - period:
+            call_times.popleft()
+        if len(call_times) >= limit:
+            raise FakeServerError(
+                "OverLimitException", "API calls quota exceeded. Maximum admitted {} per {}s.".format(limit, period)
+            )
+        call_times.append(now)
+
+    def call(self, method, params):
+        """Runs an API call, with the injected errors and rate limits, but without the latency.
+
+        :param method: The method name.
+        :type method: str
+        :param params: The parameters of the call.
+        :type params: dict
+        :raise FakeServerError: Raises when the call fails.
+        :return: The result of the call.
+        """
+        with self._lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+            if self._failures:
+                raise self._failures.popleft()
+            self._check_rate_limit(method)
+            if method == "Authenticate":
+                return self._authenticate(params)
+            if method == "ExtendSession":
+                return self._check_session(dict(credentials=params))
+            if self.error_rate and self._random.random() < self.error_rate:
+                raise FakeServerError(self.error_name, "Injected {}".format(self.error_name))
+            if method != "GetVersion":
+                # Like the real server, this answers the version without a session
+                self._check_session(params)
+            return self._dispatch(method, params)
+
+    def _next_latency(self):
+        if isinstance(self.latency, (tuple, list)):
+            with self._lock:
+                return self._random.uniform(*self.latency)
+        return self.latency
+
+    async def _handle(self, request):
+        self.requests += 1
+        body = json_deserialize(await request.text())
+        latency = self._next_latency()
+        if latency:
+            await asyncio.sleep(latency)
+        try:
+            response = dict(result=self.call(body.get("method"), body.get("params") or {}))
+        except FakeServerError as error:
+            response = error.to_response()
+        return web.Response(text=json_serialize(response), content_type="application/json")
+
+    def start(self):
+        """Starts the server on a background thread.
+
+        :raise OSError: Raises when the server can't listen on its host and port.
+        :return: The server.
+        :rtype: FakeServer
+        """
+        listening = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            listening.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            listening.bind((self.host, self.port))
+        except OSError:
+            listening.close()
+            raise
+        self.port = listening.getsockname()[1]
+        started = Event()
+        errors = []
+        self._loop = asyncio.new_event_loop()
+
+        async def serve():
+            app = web.Application()
+            app.router.add_post("/apiv1", self._handle)
+            self._runner = web.AppRunner(app, access_log=None)
+            await self._runner.setup()
+            await web.SockSite(self._runner, listening).start()
+
+        def run():
+            asyncio.set_event_loop(self._loop)
+            try:
+                self._loop.run_until_complete(serve())
+            except BaseException as exception:
+                # Raised again by start(), so callers don't get a server that isn't running
+                errors.append(exception)
+                self._loop.close()
+                return
+            finally:
+                started.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self._runner.cleanup())
+            self._loop.close()
+
+        self._thread = Thread(target=run, daemon=True)
+        self._thread.start()
+        started.wait()
+        if errors:
+            self._thread.join()
+            self._thread = None
+            listening.close()
+            raise errors[0]
+        return self
+
+    def stop(self):
+        """Stops the server."""
+        if self._thread is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+def _parse_date(value):
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if isinstance(value, datetime):
+        return dates.localize_datetime(value)
+    return value
+
+
+@click.command(help="Run a local stand-in MyGeotab server with synthetic data")
+@click.option("--host", default="127.0.0.1")
+@click.option("--port", type=click.IntRange(0, 65535), default=8080)
+@click.option("--entities", type=click.IntRange(min=0), default=DEFAULT_ENTITY_COUNT, help="Entities of each type")
+@click.option("--latency", type=click.FloatRange(min=0), default=0, help="The response delay in seconds")
+@click.option("--error-rate", type=click.FloatRange(0, 1), default=0, help="The fraction of calls that fail")
+@click.option("--rate-limit", type=(int, float), default=None, help="The calls allowed per method per period")
+def main(host, port, entities, latency, error_rate, rate_limit):
+    fake_server = FakeServer(
+        host=host, port=port, entity_count=entities, latency=latency, error_rate=error_rate, rate_limit=rate_limit
+    )
+    with fake_server:
+        click.echo("Serving the MyGeotab API on {} (press Ctrl+C to stop)".format(fake_server.url))
+        try:
+            Event().wait()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
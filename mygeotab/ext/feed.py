@@ -8,12 +8,27 @@ A simple data feed wrapper, written as an extension to the MyGeotab API object.
 """
 
 import abc
+import contextvars
+import multiprocessing
+import pickle
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timezone
+from queue import Full, Queue
 from threading import Thread
-from time import sleep
+from time import sleep, time
 
 from mygeotab import api
+from mygeotab.hooks import inject_context, run_operation
 from requests.exceptions import ConnectionError
 
+DEFAULT_RESULTS_LIMIT = 50000
+# The field holding the time of each record, for the types where it isn't `dateTime`. Trips enter the feed once they
+# stop, so they are timed by their `stop`.
+RECORD_TIME_KEYS = {"Trip": "stop", "ExceptionEvent": "activeFrom"}
+
+_STOP = object()
+
 
 class DataFeedListener(object):
     """The abstract DataFeedListener to override"""
@@ -44,7 +59,19 @@ class DataFeed(object):
     from DataFeedListener to pass in.
     """
 
-    def __init__(self, client_api, listener, type_name, interval, search=None, results_limit=None):
+    def __init__(
+        self,
+        client_api,
+        listener,
+        type_name,
+        interval,
+        search=None,
+        results_limit=None,
+        adaptive=False,
+        max_interval=None,
+        checkpoint_store=None,
+        checkpoint_key=None,
+    ):
         """Initializes the DataFeed object.
 
         :param client_api: The MyGeotab API object.
@@ -53,6 +80,13 @@ class DataFeed(object):
         :param interval: The data retrieval interval (in seconds).
         :param search: The search object.
         :param results_limit: The maximum number of records to return.
+        :param adaptive: If True, poll again immediately when a full page of results was returned, and back off
+                         exponentially (up to `max_interval`) while no results are returned.
+        :param max_interval: The longest interval (in seconds) to back off to in adaptive mode. By default, this is
+                             eight times the `interval`.
+        :param checkpoint_store: The CheckpointStore to save the version to after the listener receives each batch.
+                                 The feed resumes from the saved version when started.
+        :param checkpoint_key: The name of the feed in the checkpoint store. By default, this is the `type_name`.
         """
         self.client_api = client_api
         self.listener = listener
@@ -60,29 +94,106 @@ class DataFeed(object):
         self.interval = interval
         self.search = search
         self.results_limit = results_limit
+        self.adaptive = adaptive
+        self.max_interval = max_interval if max_interval is not None else interval * 8
+        self.current_interval = interval
+        self.stats = FeedStats(record_time_key(type_name))
+        self.checkpoint_store = checkpoint_store
+        self.checkpoint_key = checkpoint_key or type_name
         self.running = False
         self._version = None
         self._thread = None
 
+    def _fetch(self):
+        """Gets the next batch of data from the feed.
+
+        :return: The batch of data.
+        :rtype: list
+        """
+        from_version = self._version
+        result = self.client_api.call(
+            "GetFeed",
+            type_name=self.type_name,
+            search=self.search,
+            from_version=from_version,
+            results_limit=self.results_limit,
+        )
+        self._version = result["toVersion"]
+        self.stats.update(result["data"], from_version, self._version)
+        return result["data"]
+
+    def _operation(self):
+        """Gets the operation around a poll, for the instrumentation hooks of the API object."""
+        return run_operation(
+            _hooks(self.client_api), "DataFeed.poll", type_name=self.type_name, feed=self.checkpoint_key
+        )
+
+    def _describe_poll(self, operation):
+        """Adds the progress of the feed to the operation of a poll, if there are hooks."""
+        if operation is not None:
+            operation.attributes.update(
+                to_version=self._version,
+                records=self.stats.last_batch_size,
+                lag=self.stats.lag,
+                version_rate=self.stats.version_rate,
+            )
+
+    def _checkpoint(self, version):
+        """Saves the version to the checkpoint store, if there is one.
+
+        :param version: The version of the feed, once all the data up to it was processed.
+        """
+        if self.checkpoint_store is not None:
+            self.checkpoint_store.save(self.checkpoint_key, version)
+
+    def _poll(self):
+        """Gets the next batch of data from the feed and sends it to the listener.
+
+        :return: The batch of data.
+        :rtype: list
+        """
+        with self._operation() as operation:
+            data = self._fetch()
+            version = self._version
+            self._describe_poll(operation)
+            self.listener.on_data(data)
+            self._checkpoint(version)
+        return data
+
+    def _next_interval(self, data):
+        """Gets the time to wait before polling again.
+
+        :param data: The last batch of data, or None if the last poll failed.
+        :return: The time to wait (in seconds).
+        :rtype: float
+        """
+        if not self.adaptive or data is None:
+            return self.interval
+        page_size = self.results_limit or DEFAULT_RESULTS_LIMIT
+        if len(data) >= page_size:
+            # More data is waiting on the server
+            self.current_interval = self.interval
+            return 0
+        if not data:
+            self.current_interval = min(self.current_interval * 2, self.max_interval)
+        else:
+            self.current_interval = self.interval
+        return self.current_interval
+
     def _run(self):
         """Runner for the Data Feed."""
         while self.running:
+            data = None
             try:
-                result = self.client_api.call(
-                    "GetFeed",
-                    type_name=self.type_name,
-                    search=self.search,
-                    from_version=self._version,
-                    results_limit=self.results_limit,
-                )
-                self._version = result["toVersion"]
-                self.listener.on_data(result["data"])
+                data = self._poll()
             except (api.MyGeotabException, ConnectionError) as exception:
                 if self.listener.on_error(exception) is False:
                     break
             if not self.running:
                 break
-            sleep(self.interval)
+            wait = self._next_interval(data)
+            if wait > 0:
+                sleep(wait)
         self.running = False
 
     def start(self, threaded=True):
@@ -90,9 +201,404 @@ class DataFeed(object):
 
         :param threaded: If True, run in a separate thread.
         """
+        if self.checkpoint_store is not None:
+            self._version = self.checkpoint_store.load(self.checkpoint_key) or self._version
+        self.running = True
+        if threaded:
+            self._thread = Thread(target=self._run)
+            self._thread.start()
+        else:
+            self._run()
+
+
+class PipelinedDataFeed(DataFeed):
+    """A data feed that fetches the next batch of data while the listener processes the current one. Fetched batches
+    wait in a bounded queue, so fetching pauses whenever the listener falls behind. Batches can also be processed by
+    several worker threads or processes at once, in which case the version is only checkpointed once every batch
+    before it was processed.
+    """
+
+    def __init__(
+        self,
+        client_api,
+        listener,
+        type_name,
+        interval,
+        search=None,
+        results_limit=None,
+        queue_size=2,
+        workers=1,
+        executor="thread",
+        **kwargs,
+    ):
+        """Initializes the PipelinedDataFeed object.
+
+        :param client_api: The MyGeotab API object.
+        :param listener: The custom DataFeedListener object.
+        :param type_name: The type of entity.
+        :param interval: The data retrieval interval (in seconds).
+        :param search: The search object.
+        :param results_limit: The maximum number of records to return.
+        :param queue_size: The number of fetched batches that can wait for the listener.
+        :param workers: The number of batches the listener can process at the same time. If more than one, the
+                        listener's `on_data` must be thread-safe.
+        :param executor: Either "thread" or "process". With "process", batches are processed by a pool of `workers`
+                         processes, each holding a copy of the listener, so CPU-bound listeners aren't limited by the
+                         GIL. The listener and the data must then be picklable, changes the listener makes to itself
+                         stay in the worker processes, and `on_error` is still called in this process.
+        :param kwargs: Additional DataFeed options (`adaptive`, `max_interval`, `checkpoint_store`, `checkpoint_key`).
+        """
+        if queue_size < 1:
+            raise ValueError("`queue_size` must be at least 1")
+        if workers < 1:
+            raise ValueError("`workers` must be at least 1")
+        if executor not in ("thread", "process"):
+            raise ValueError("`executor` must be either 'thread' or 'process'")
+        if executor == "process":
+            try:
+                pickle.dumps(listener)
+            except Exception as exc:
+                raise ValueError("The listener must be picklable to be used in a process pool") from exc
+        super().__init__(
+            client_api, listener, type_name, interval, search=search, results_limit=results_limit, **kwargs
+        )
+        self.queue_size = queue_size
+        self.workers = workers
+        self.executor = executor
+        self.error = None
+        self._queue = None
+        self._consumer = None
+
+    def _create_executor(self):
+        """Creates the executor to process batches with.
+
+        :return: The executor, or None to process batches on the consumer thread.
+        :rtype: concurrent.futures.Executor or None
+        """
+        if self.executor == "process":
+            # The feed is already multi-threaded, which isn't safe to fork
+            return ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_process_listener,
+                initargs=(self.listener,),
+            )
+        if self.workers == 1:
+            return None
+        return ThreadPoolExecutor(max_workers=self.workers)
+
+    def _submit(self, executor, data, context):
+        """Sends a batch of data to the listener on the executor, in the context it was fetched in.
+
+        :rtype: concurrent.futures.Future
+        """
+        if self.executor == "process":
+            return executor.submit(_process_batch, data, context.run(inject_context, _hooks(self.client_api)))
+        return executor.submit(context.run, self.listener.on_data, data)
+
+    def _complete(self, pending, max_pending):
+        """Checkpoints processed batches in the order they were fetched. Waits on the oldest batch while more than
+        `max_pending` batches are being processed.
+
+        :param pending: The (future, version) pairs of the batches being processed, oldest first.
+        :param max_pending: The number of batches that can still be processing when this returns.
+        """
+        while pending and (len(pending) > max_pending or pending[0][0].done()):
+            future, version = pending.popleft()
+            future.result()
+            self._checkpoint(version)
+
+    def _consume(self):
+        """Runner for the processing stage of the Data Feed."""
+        executor = self._create_executor()
+        pending = deque()
+        try:
+            while True:
+                item = self._queue.get()
+                if item is _STOP:
+                    break
+                data, version, context = item
+                if executor is None:
+                    context.run(self.listener.on_data, data)
+                    self._checkpoint(version)
+                else:
+                    pending.append((self._submit(executor, data, context), version))
+                    self._complete(pending, self.workers)
+            self._complete(pending, 0)
+        except Exception as exception:
+            self.error = exception
+            self.running = False
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True, cancel_futures=True)
+
+    def _put(self, item):
+        """Adds an item to the queue, waiting for space while the processing stage is running.
+
+        :return: True if the item was added, False if the processing stage stopped.
+        :rtype: bool
+        """
+        while self._consumer.is_alive():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except Full:
+                continue
+        return False
+
+    def _run(self):
+        """Runner for the fetching stage of the Data Feed."""
+        self.error = None
+        self._queue = Queue(maxsize=self.queue_size)
+        self._consumer = Thread(target=self._consume)
+        self._consumer.start()
+        try:
+            while self.running:
+                data = None
+                try:
+                    with self._operation() as operation:
+                        data = self._fetch()
+                        self._describe_poll(operation)
+                        # Batches are processed in the context of the poll that fetched them
+                        context = contextvars.copy_context()
+                except (api.MyGeotabException, ConnectionError) as exception:
+                    if self.listener.on_error(exception) is False:
+                        break
+                if data is not None and not self._put((data, self._version, context)):
+                    break
+                if not self.running:
+                    break
+                wait = self._next_interval(data)
+                if wait > 0:
+                    sleep(wait)
+        finally:
+            self._put(_STOP)
+            self._consumer.join()
+            self.running = False
+        if self.error is not None:
+            raise self.error
+
+
+_process_listener = None
+
+
+def _init_process_listener(listener):
+    """Keeps the copy of the listener sent to a worker process."""
+    global _process_listener
+    _process_listener = listener
+
+
+def _process_batch(data, carrier=None):
+    """Sends a batch of data to the listener of a worker process, continuing the trace of the poll that fetched it."""
+    if not carrier:
+        _process_listener.on_data(data)
+        return
+    from mygeotab.ext.tracing import attached_context
+
+    with attached_context(carrier):
+        _process_listener.on_data(data)
+
+
+def _hooks(client_api):
+    """Gets the instrumentation hooks of an API object, if it has any."""
+    return getattr(client_api, "hooks", None)
+
+
+class MultiDataFeed(object):
+    """Follows several data feeds at once, polling every feed in a single `ExecuteMultiCall` request per interval.
+    Each feed keeps its own version and delivers its results to its own DataFeedListener.
+    """
+
+    def __init__(self, client_api, interval, checkpoint_store=None):
+        """Initializes the MultiDataFeed object.
+
+        :param client_api: The MyGeotab API object.
+        :param interval: The data retrieval interval (in seconds).
+        :param checkpoint_store: The CheckpointStore to save the version of each feed to after its listener receives
+                                 each batch. Feeds resume from their saved versions when started.
+        """
+        self.client_api = client_api
+        self.interval = interval
+        self.checkpoint_store = checkpoint_store
+        self.feeds = []
+        self.running = False
+        self._thread = None
+
+    def add_feed(self, listener, type_name, search=None, results_limit=None, from_version=None, checkpoint_key=None):
+        """Adds a feed to be polled alongside the others.
+
+        :param listener: The custom DataFeedListener object for this feed.
+        :param type_name: The type of entity.
+        :param search: The search object.
+        :param results_limit: The maximum number of records to return.
+        :param from_version: The version to start the feed from. If None, the feed starts from the beginning.
+        :param checkpoint_key: The name of the feed in the checkpoint store. By default, this is the `type_name`.
+        :return: The feed cursor, holding the current version of the feed.
+        :rtype: FeedCursor
+        """
+        cursor = FeedCursor(listener, type_name, search, results_limit, from_version, checkpoint_key)
+        self.feeds.append(cursor)
+        return cursor
+
+    def _tick(self):
+        """Polls all the feeds once.
+
+        :return: If True, keep polling. If False, stop the data feed.
+        :rtype: bool
+        """
+        with run_operation(_hooks(self.client_api), "MultiDataFeed.poll", feeds=len(self.feeds)):
+            try:
+                results = self.client_api.multi_call([("GetFeed", cursor.get_params()) for cursor in self.feeds])
+            except (api.MyGeotabException, ConnectionError) as exception:
+                keep_running = True
+                for cursor in self.feeds:
+                    if cursor.listener.on_error(exception) is False:
+                        keep_running = False
+                return keep_running
+            for cursor, result in zip(self.feeds, results, strict=True):
+                cursor.stats.update(result["data"], cursor.version, result["toVersion"])
+                cursor.version = result["toVersion"]
+                cursor.listener.on_data(result["data"])
+                if self.checkpoint_store is not None:
+                    self.checkpoint_store.save(cursor.checkpoint_key, cursor.version)
+            return True
+
+    def _run(self):
+        """Runner for the Multi Data Feed."""
+        while self.running:
+            if not self._tick():
+                break
+            if not self.running:
+                break
+            sleep(self.interval)
+        self.running = False
+
+    def start(self, threaded=True):
+        """Start the data feeds.
+
+        :param threaded: If True, run in a separate thread.
+        """
+        if not self.feeds:
+            raise Exception("At least one feed must be added before starting")
+        if self.checkpoint_store is not None:
+            for cursor in self.feeds:
+                cursor.version = self.checkpoint_store.load(cursor.checkpoint_key) or cursor.version
         self.running = True
         if threaded:
             self._thread = Thread(target=self._run)
             self._thread.start()
         else:
             self._run()
+
+
+class FeedCursor(object):
+    """The position of a single feed followed by a MultiDataFeed."""
+
+    def __init__(self, listener, type_name, search=None, results_limit=None, version=None, checkpoint_key=None):
+        """Initializes the FeedCursor object.
+
+        :param listener: The custom DataFeedListener object.
+        :param type_name: The type of entity.
+        :param search: The search object.
+        :param results_limit: The maximum number of records to return.
+        :param version: The last version received from the server.
+        :param checkpoint_key: The name of the feed in a checkpoint store. By default, this is the `type_name`.
+        """
+        self.listener = listener
+        self.type_name = type_name
+        self.search = search
+        self.results_limit = results_limit
+        self.version = version
+        self.checkpoint_key = checkpoint_key or type_name
+        self.stats = FeedStats(record_time_key(type_name))
+
+    def get_params(self):
+        """The parameters for the next `GetFeed` call of this feed.
+
+        :rtype: dict
+        """
+        return dict(
+            typeName=self.type_name, search=self.search, fromVersion=self.version, resultsLimit=self.results_limit
+        )
+
+
+class FeedStats(object):
+    """Progress and lag metrics of a data feed."""
+
+    def __init__(self, time_key="dateTime"):
+        """Initializes the FeedStats object.
+
+        :param time_key: The field holding the time of each record (see `record_time_key()`).
+        """
+        self.time_key = time_key
+        self.polls = 0
+        self.records = 0
+        self.last_batch_size = 0
+        self.last_poll_time = None
+        self.last_record_time = None
+        self.version_rate = None
+
+    def update(self, data, from_version, to_version):
+        """Records the result of a poll.
+
+        :param data: The batch of data received.
+        :param from_version: The version the poll started from.
+        :param to_version: The version returned by the server.
+        """
+        now = time()
+        previous_poll_time = self.last_poll_time
+        self.polls += 1
+        self.records += len(data)
+        self.last_batch_size = len(data)
+        self.last_poll_time = now
+        if data:
+            record_time = _record_time(data[-1], self.time_key)
+            if record_time is not None:
+                self.last_record_time = record_time
+        progress = _version_distance(from_version, to_version)
+        if previous_poll_time is not None and progress is not None and now > previous_poll_time:
+            self.version_rate = progress / (now - previous_poll_time)
+
+    @property
+    def lag(self):
+        """The time between now and the date of the newest record received (in seconds), if known.
+
+        :rtype: float or None
+        """
+        if self.last_record_time is None:
+            return None
+        last_record_time = self.last_record_time
+        if not last_record_time.tzinfo:
+            last_record_time = last_record_time.replace(tzinfo=timezone.utc)
+        return (datetime.now(timezone.utc) - last_record_time).total_seconds()
+
+
+def record_time_key(type_name):
+    """The field holding the time of each record of a type, which orders the records of a feed and measures its lag.
+
+    :param type_name: The type of entity.
+    :type type_name: str
+    :rtype: str
+    """
+    return RECORD_TIME_KEYS.get(type_name, "dateTime")
+
+
+def _record_time(entity, time_key):
+    """The time of a record, or None if it has none.
+
+    :rtype: datetime or None
+    """
+    record_time = entity.get(time_key) if isinstance(entity, dict) else None
+    return record_time if isinstance(record_time, datetime) else None
+
+
+def _version_distance(from_version, to_version):
+    """The number of versions between two feed versions, which are hexadecimal strings.
+
+    :return: The distance, or None if either version could not be parsed.
+    :rtype: int or None
+    """
+    try:
+        return int(to_version, 16) - int(from_version, 16)
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+
+"""
+mygeotab.ext.metrics
+~~~~~~~~~~~~~~~~~~~~
+
+Prometheus metrics of the calls made by the API objects, and of the data feeds using them. This requires the optional
+`prometheus_client` package.
+"""
+
+from mygeotab.hooks import CallHook
+
+DEFAULT_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+PHASES = ("serialize", "network", "deserialize")
+
+
+def _import_prometheus_client():
+    try:
+        import prometheus_client
+    except ImportError as exc:
+        raise ImportError("The 'prometheus_client' package could not be imported") from exc
+    return prometheus_client
+
+
+def _exception_name(exception):
+    """The name of the server exception (such as `InvalidUserException`), or of the exception class."""
+    return getattr(exception, "name", None) or type(exception).__name__
+
+
+class PrometheusHook(CallHook):
+    """Records Prometheus metrics for each call, labelled by method and type name:
+
+    - `mygeotab_requests_total`: the number of calls.
+    - `mygeotab_errors_total`: the number of failed calls, also labelled by exception name.
+    - `mygeotab_request_duration_seconds`: the latency of the calls.
+    - `mygeotab_request_phase_duration_seconds`: the time spent serializing, on the network and deserializing.
+    - `mygeotab_request_bytes_total` and `mygeotab_response_bytes_total`: the size of the requests and responses.
+    - `mygeotab_entities_total`: the number of entities returned.
+    - `mygeotab_reauthentications_total`: the number of times an expired session was authenticated again.
+
+    And for each poll of a `DataFeed`, labelled by feed (its checkpoint key, by default its type name):
+
+    - `mygeotab_feed_records_total`: the number of records received.
+    - `mygeotab_feed_lag_seconds`: the time between the last poll and the date of the newest record received.
+    - `mygeotab_feed_version_rate`: the rate at which the feed version moves forward (in versions per second).
+    """
+
+    def __init__(self, registry=None, namespace="mygeotab", buckets=DEFAULT_BUCKETS):
+        """Initializes the PrometheusHook object, and registers its metrics.
+
+        :param registry: The registry to register the metrics with. By default, the global registry.
+        :type registry: prometheus_client.CollectorRegistry or None
+        :param namespace: The prefix of the metric names.
+        :type namespace: str
+        :param buckets: The buckets of the latency histograms (in seconds).
+        :type buckets: tuple(float)
+        """
+        prometheus_client = _import_prometheus_client()
+        if registry is None:
+            registry = prometheus_client.REGISTRY
+        labels = ("method", "type_name")
+        options = dict(namespace=namespace, registry=registry)
+        self.requests = prometheus_client.Counter("requests", "The number of calls to the API.", labels, **options)
+        self.errors = prometheus_client.Counter(
+            "errors", "The number of failed calls to the API.", labels + ("exception",), **options
+        )
+        self.latency = prometheus_client.Histogram(
+            "request_duration_seconds", "The time the calls to the API took.", labels, buckets=buckets, **options
+        )
+        self.phase_latency = prometheus_client.Histogram(
+            "request_phase_duration_seconds",
+            "The time spent in each phase of the calls to the API.",
+            labels + ("phase",),
+            buckets=buckets,
+            **options,
+        )
+        self.bytes_sent = prometheus_client.Counter(
+            "request_bytes", "The size of the requests to the API.", labels, **options
+        )
+        self.bytes_received = prometheus_client.Counter(
+            "response_bytes", "The size of the responses from the API.", labels, **options
+        )
+        self.entities = prometheus_client.Counter(
+            "entities", "The number of entities returned by the API.", labels, **options
+        )
+        self.reauthentications = prometheus_client.Counter(
+            "reauthentications", "The number of times an expired session was authenticated again.", **options
+        )
+        self.feed_records = prometheus_client.Counter(
+            "feed_records", "The number of records received by the data feed.", ("feed",), **options
+        )
+        self.feed_lag = prometheus_client.Gauge(
+            "feed_lag_seconds", "The time between now and the newest record of the data feed.", ("feed",), **options
+        )
+        self.feed_version_rate = prometheus_client.Gauge(
+            "feed_version_rate", "The rate at which the version of the data feed moves forward.", ("feed",), **options
+        )
+
+    def after_call(self, call_info):
+        """Records the metrics of the call.
+
+        :param call_info: The details of the call.
+        :type call_info: mygeotab.hooks.CallInfo
+        """
+        method, type_name = call_info.method, call_info.type_name or ""
+        self.requests.labels(method, type_name).inc()
+        self.latency.labels(method, type_name).observe(call_info.total_time)
+        for phase in PHASES:
+            self.phase_latency.labels(method, type_name, phase).observe(getattr(call_info, phase + "_time"))
+        self.bytes_sent.labels(method, type_name).inc(call_info.bytes_sent)
+        self.bytes_received.labels(method, type_name).inc(call_info.bytes_received)
+        if call_info.result_count:
+            self.entities.labels(method, type_name).inc(call_info.result_count)
+        if call_info.exception is not None:
+            self.errors.labels(method, type_name, _exception_name(call_info.exception)).inc()
+        if method == "Authenticate" and call_info.retries:
+            self.reauthentications.inc()
+
+    def after_operation(self, operation_info):
+        """Records the progress of a data feed poll.
+
+        :param operation_info: The details of the operation.
+        :type operation_info: mygeotab.hooks.OperationInfo
+        """
+        if operation_info.name != "DataFeed.poll" or operation_info.exception is not None:
+            return
+        attributes = operation_info.attributes
+        feed = attributes.get("feed") or attributes.get("type_name") or ""
+        self.feed_records.labels(feed).inc(attributes.get("records") or 0)
+        if attributes.get("lag") is not None:
+            self.feed_lag.labels(feed).set(attributes["lag"])
+        if attributes.get("version_rate") is not None:
+            self.feed_version_rate.labels(feed).set(attributes["version_rate"])
+
+
+__all__ = ["PrometheusHook"]
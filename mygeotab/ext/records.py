@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+
+"""
+mygeotab.ext.records
+~~~~~~~~~~~~~~~~~~~~
+
+Memory-compact records for well-known MyGeotab types, written as an extension to the MyGeotab API object.
+"""
+
+from collections.abc import MutableMapping
+
+from mygeotab import api
+
+RECORD_FIELDS = {
+    "LogRecord": ("id", "dateTime", "device", "latitude", "longitude", "speed"),
+    "StatusData": ("id", "dateTime", "device", "diagnostic", "controller", "data", "version"),
+    "FaultData": (
+        "id",
+        "dateTime",
+        "device",
+        "diagnostic",
+        "controller",
+        "count",
+        "failureMode",
+        "faultState",
+        "malfunctionLamp",
+        "redStopLamp",
+        "amberWarningLamp",
+        "protectWarningLamp",
+        "dismissDateTime",
+        "dismissUser",
+        "version",
+    ),
+    "Trip": (
+        "id",
+        "device",
+        "driver",
+        "start",
+        "stop",
+        "nextTripStart",
+        "distance",
+        "drivingDuration",
+        "idlingDuration",
+        "stopDuration",
+        "stopPoint",
+        "maximumSpeed",
+        "averageSpeed",
+        "version",
+    ),
+    "ExceptionEvent": (
+        "id",
+        "activeFrom",
+        "activeTo",
+        "device",
+        "driver",
+        "rule",
+        "diagnostic",
+        "distance",
+        "duration",
+        "state",
+        "lastModifiedDateTime",
+        "version",
+    ),
+}
+
+
+class Record(MutableMapping):
+    """The base class of the generated record classes. Records store well-known fields in slots, rather than in a dict,
+    and store any other field in a separate dict. Records can be used like the dicts returned by the API.
+    """
+
+    __slots__ = ("_extra",)
+    _type_name = None
+    _fields = ()
+    _field_set: "frozenset[str]" = frozenset()
+
+    def __init__(self, entity=None, **fields):
+        self._extra = None
+        if entity:
+            self.update(entity)
+        if fields:
+            self.update(fields)
+
+    def __getitem__(self, key):
+        if key in self._field_set:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self._extra is None:
+            raise KeyError(key)
+        return self._extra[key]
+
+    def __setitem__(self, key, value):
+        if key in self._field_set:
+            setattr(self, key, value)
+            return
+        if self._extra is None:
+            self._extra = {}
+        self._extra[key] = value
+
+    def __delitem__(self, key):
+        if key in self._field_set:
+            try:
+                delattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+            return
+        if self._extra is None:
+            raise KeyError(key)
+        del self._extra[key]
+
+    def __iter__(self):
+        for field in self._fields:
+            if hasattr(self, field):
+                yield field
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return "{}({!r})".format(self._type_name, dict(self))
+
+    def __reduce__(self):
+        return _rebuild_record, (self._type_name, self._fields, dict(self))
+
+
+_record_classes: "dict[tuple, type[Record]]" = {}
+
+
+def record_class(type_name, fields=None):
+    """Gets the record class for a type, creating it on first use.
+
+    :param type_name: The type of entity.
+    :type type_name: str
+    :param fields: The fields to store in slots. By default, these are the well-known fields of the type in
+                   `RECORD_FIELDS`.
+    :type fields: tuple(str) or None
+    :rtype: type
+    """
+    fields = tuple(fields if fields is not None else RECORD_FIELDS.get(type_name, ()))
+    cache_key = (type_name, fields)
+    cls = _record_classes.get(cache_key)
+    if cls is None:
+        # Fields that would hide a method of the record are kept with the other fields instead
+        slot_fields = tuple(field for field in fields if field.isidentifier() and not hasattr(Record, field))
+        cls = type(
+            type_name + "Record",
+            (Record,),
+            dict(__slots__=slot_fields, _type_name=type_name, _fields=slot_fields, _field_set=frozenset(slot_fields)),
+        )
+        _record_classes[cache_key] = cls
+    return cls
+
+
+def _rebuild_record(type_name, fields, entity):
+    return record_class(type_name, fields)(entity)
+
+
+def to_records(type_name, entities, fields=None):
+    """Converts entities to records. Entities of types without well-known fields are returned unchanged.
+
+    :param type_name: The type of entity.
+    :type type_name: str
+    :param entities: The entities.
+    :type entities: Iterable[dict]
+    :param fields: The fields to store in slots. By default, these are the well-known fields of the type in
+                   `RECORD_FIELDS`.
+    :type fields: tuple(str) or None
+    :rtype: list
+    """
+    if fields is None and type_name not in RECORD_FIELDS:
+        return list(entities)
+    cls = record_class(type_name, fields)
+    return [cls(entity) for entity in entities]
+
+
+class API(api.API):
+    """An experimental wrapper around the base MyGeotab API class that returns results from `get()` as records, for
+    the types in `RECORD_FIELDS`.
+    """
+
+    def get(self, type_name, **parameters):
+        """Gets entities using the API. Shortcut for using call() with the 'Get' method. Entities of the types in
+        `RECORD_FIELDS` are returned as records.
+
+        :param type_name: The type of entity.
+        :type type_name: str
+        :param parameters: Additional parameters to send.
+        :raise MyGeotabException: Raises when an exception occurs on the MyGeotab server.
+        :raise TimeoutException: Raises when the request does not respond after some time.
+        :return: The results from the server.
+        :rtype: list
+        """
+        return to_records(type_name, super().get(type_name, **parameters))
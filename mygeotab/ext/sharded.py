@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+
+"""
+mygeotab.ext.sharded
+~~~~~~~~~~~~~~~~~~~~
+
+A data feed split into shards by device or device group, so several feed cursors can be followed in parallel.
+"""
+
+import asyncio
+import contextvars
+import heapq
+from concurrent.futures import ThreadPoolExecutor
+from threading import Thread
+from time import sleep
+
+from mygeotab import api, dates
+from mygeotab.hooks import run_operation
+from requests.exceptions import ConnectionError
+
+from .feed import DEFAULT_RESULTS_LIMIT, FeedCursor, _hooks, _record_time, record_time_key
+
+DEFAULT_MAX_WORKERS = 32
+
+
+def shard_by_groups(group_ids, search=None):
+    """Creates one shard per device group.
+
+    :param group_ids: The ids of the device groups.
+    :type group_ids: list(str)
+    :param search: The search object shared by all the shards.
+    :type search: dict or None
+    :return: The shard searches, by shard name.
+    :rtype: dict
+    """
+    return {group_id: dict(search or {}, deviceSearch=dict(groups=[dict(id=group_id)])) for group_id in group_ids}
+
+
+def shard_by_devices(device_ids, search=None):
+    """Creates one shard per device.
+
+    :param device_ids: The ids of the devices.
+    :type device_ids: list(str)
+    :param search: The search object shared by all the shards.
+    :type search: dict or None
+    :return: The shard searches, by shard name.
+    :rtype: dict
+    """
+    return {device_id: dict(search or {}, deviceSearch=dict(id=device_id)) for device_id in device_ids}
+
+
+def _sort_key(time_key):
+    """The key that orders records by their time, with the records that have none first."""
+
+    def sort_key(entity):
+        record_time = _record_time(entity, time_key)
+        return record_time if record_time is not None else dates.MIN_DATE
+
+    return sort_key
+
+
+class ShardedDataFeed(object):
+    """Follows a data feed split into shards, each with its own search, version and checkpoint. All the shards are
+    fetched in parallel on every interval, either on threads or as asyncio tasks. Create a listener that inherits from
+    DataFeedListener to pass in.
+    """
+
+    def __init__(
+        self,
+        client_api,
+        listener,
+        type_name,
+        interval,
+        shards,
+        results_limit=None,
+        merge=False,
+        checkpoint_store=None,
+        max_workers=None,
+    ):
+        """Initializes the ShardedDataFeed object.
+
+        :param client_api: The MyGeotab API object. To run with `run_async()`, this must be the asynchronous API.
+        :param listener: The custom DataFeedListener object.
+        :param type_name: The type of entity.
+        :param interval: The data retrieval interval (in seconds).
+        :param shards: The search object of each shard, by shard name (see `shard_by_groups()` and
+                       `shard_by_devices()`).
+        :param results_limit: The maximum number of records to return per shard.
+        :param merge: If True, the batches of all the shards are merged into a single batch, ordered by the time of
+                      the records (see `mygeotab.ext.feed.record_time_key()`), before being sent to the listener.
+                      Otherwise, the listener receives each shard's batch on its own.
+        :param checkpoint_store: The CheckpointStore to save the version of each shard to, once its data was sent
+                                 to the listener. Shards resume from their saved versions when started.
+        :param max_workers: The number of shards to fetch at the same time, on threads or as asyncio tasks. By default,
+                            all of them, up to `DEFAULT_MAX_WORKERS`.
+        """
+        if not shards:
+            raise ValueError("At least one shard is required")
+        self.client_api = client_api
+        self.listener = listener
+        self.type_name = type_name
+        self.interval = interval
+        self.results_limit = results_limit
+        self.merge = merge
+        self.checkpoint_store = checkpoint_store
+        self.max_workers = max_workers or min(DEFAULT_MAX_WORKERS, len(shards))
+        self.cursors = [
+            FeedCursor(
+                listener,
+                type_name,
+                search,
+                results_limit,
+                checkpoint_key="{}:{}".format(type_name, name),
+            )
+            for name, search in shards.items()
+        ]
+        self.running = False
+        self._thread = None
+
+    def _fetch(self, cursor):
+        return self.client_api.call("GetFeed", **cursor.get_params())
+
+    async def _fetch_async(self, cursor, semaphore):
+        async with semaphore:
+            return await self.client_api.call_async("GetFeed", **cursor.get_params())
+
+    def _deliver(self, results):
+        """Sends the fetched batches to the listener, then moves every shard to its new version.
+
+        :param results: The `GetFeed` result of every shard, in the same order as the cursors.
+        :return: True if any shard returned a full page of data.
+        :rtype: bool
+        """
+        if self.merge:
+            sort_key = _sort_key(record_time_key(self.type_name))
+            batches = [sorted(result["data"], key=sort_key) for result in results]
+            self.listener.on_data(list(heapq.merge(*batches, key=sort_key)))
+        else:
+            for result in results:
+                self.listener.on_data(result["data"])
+        page_size = self.results_limit or DEFAULT_RESULTS_LIMIT
+        full_page = False
+        for cursor, result in zip(self.cursors, results, strict=True):
+            cursor.stats.update(result["data"], cursor.version, result["toVersion"])
+            cursor.version = result["toVersion"]
+            if self.checkpoint_store is not None:
+                self.checkpoint_store.save(cursor.checkpoint_key, cursor.version)
+            full_page = full_page or len(result["data"]) >= page_size
+        return full_page
+
+    def _operation(self):
+        return run_operation(
+            _hooks(self.client_api), "ShardedDataFeed.poll", type_name=self.type_name, shards=len(self.cursors)
+        )
+
+    def _load_checkpoints(self):
+        if self.checkpoint_store is not None:
+            for cursor in self.cursors:
+                cursor.version = self.checkpoint_store.load(cursor.checkpoint_key) or cursor.version
+
+    def _run(self):
+        """Runner for the Sharded Data Feed."""
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while self.running:
+                full_page = False
+                try:
+                    with self._operation():
+                        # Each shard is fetched in a copy of the context of the poll
+                        futures = [
+                            executor.submit(contextvars.copy_context().run, self._fetch, cursor)
+                            for cursor in self.cursors
+                        ]
+                        full_page = self._deliver([future.result() for future in futures])
+                except (api.MyGeotabException, ConnectionError) as exception:
+                    if self.listener.on_error(exception) is False:
+                        break
+                if not self.running:
+                    break
+                if not full_page:
+                    sleep(self.interval)
+        self.running = False
+
+    def start(self, threaded=True):
+        """Start the data feed, fetching the shards on threads.
+
+        :param threaded: If True, run in a separate thread.
+        """
+        self._load_checkpoints()
+        self.running = True
+        if threaded:
+            self._thread = Thread(target=self._run)
+            self._thread.start()
+        else:
+            self._run()
+
+    async def run_async(self):
+        """Runs the data feed, fetching the shards as asyncio tasks. Returns once the feed is stopped."""
+        self._load_checkpoints()
+        self.running = True
+        semaphore = asyncio.Semaphore(self.max_workers)
+        while self.running:
+            full_page = False
+            try:
+                with self._operation():
+                    results = await asyncio.gather(*[self._fetch_async(cursor, semaphore) for cursor in self.cursors])
+                    full_page = self._deliver(results)
+            except (api.MyGeotabException, ConnectionError) as exception:
+                if self.listener.on_error(exception) is False:
+                    break
+            if not self.running:
+                break
+            if not full_page:
+                await asyncio.sleep(self.interval)
+        self.running = False
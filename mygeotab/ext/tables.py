@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+
+"""
+mygeotab.ext.tables
+~~~~~~~~~~~~~~~~~~~
+
+Apache Arrow and Parquet helpers for MyGeotab entities. These require the optional `pyarrow` package.
+"""
+
+import os
+from itertools import islice
+
+from mygeotab.serializers import ReferenceInterner
+
+DEFAULT_ROW_GROUP_SIZE = 100000
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as exc:
+        raise ImportError("The 'pyarrow' package could not be imported") from exc
+    return pyarrow
+
+
+def _zoned_type(pyarrow, data_type):
+    """Replaces timestamps without a time zone with UTC timestamps, as MyGeotab dates are always in UTC."""
+    if pyarrow.types.is_timestamp(data_type) and data_type.tz is None:
+        return pyarrow.timestamp(data_type.unit, tz="UTC")
+    if pyarrow.types.is_struct(data_type):
+        return pyarrow.struct([field.with_type(_zoned_type(pyarrow, field.type)) for field in data_type])
+    if pyarrow.types.is_list(data_type):
+        return pyarrow.list_(data_type.value_field.with_type(_zoned_type(pyarrow, data_type.value_type)))
+    return data_type
+
+
+def _reference_keys(pyarrow, schema):
+    """Gets the names of the struct fields of a schema which hold references, like `driver: {id}`."""
+    if schema is None:
+        return set()
+    return {
+        field.name for field in schema if pyarrow.types.is_struct(field.type) and field.type.get_field_index("id") >= 0
+    }
+
+
+def _normalize_references(entities, reference_keys=()):
+    """Wraps references given as a plain id, like `"driver": "UnknownDriverId"`, into `{"id": ...}`, so they fit in
+    the same struct column as the other references. The entities with such references are copied, not changed.
+
+    :param entities: The entities.
+    :type entities: list[dict]
+    :param reference_keys: More keys holding references, besides the well-known ones and those of the entities.
+    :type reference_keys: Iterable[str]
+    :rtype: list[dict]
+    """
+    keys = set(ReferenceInterner.REFERENCE_KEYS).union(reference_keys)
+    for entity in entities:
+        keys.update(key for key, value in entity.items() if isinstance(value, dict) and "id" in value)
+    normalized = []
+    for entity in entities:
+        ids = [key for key in keys if isinstance(entity.get(key), str)]
+        if ids:
+            entity = dict(entity)
+            for key in ids:
+                entity[key] = {"id": entity[key]}
+        normalized.append(entity)
+    return normalized
+
+
+def _infer_schema(pyarrow, entities):
+    if not entities:
+        return pyarrow.schema([])
+    # Infer a struct from every entity, as `Table.from_pylist` only looks at the keys of the first one
+    entity_type = pyarrow.array(entities).type
+    return pyarrow.schema([field.with_type(_zoned_type(pyarrow, field.type)) for field in entity_type])
+
+
+def infer_schema(entities):
+    """Infers the Arrow schema of entities. Nested entities, like `device: {id}`, become struct columns, and dates
+    become UTC timestamp columns.
+
+    :param entities: The entities.
+    :type entities: list[dict]
+    :rtype: pyarrow.Schema
+    """
+    return _infer_schema(_import_pyarrow(), _normalize_references(entities))
+
+
+def entities_to_arrow(entities, schema=None):
+    """Transforms entities into an Arrow table.
+
+    :param entities: The entities.
+    :type entities: list[dict]
+    :param schema: The schema of the table. By default, it is inferred from the entities.
+    :type schema: pyarrow.Schema or None
+    :rtype: pyarrow.Table
+    """
+    pyarrow = _import_pyarrow()
+    entities = _normalize_references(list(entities), _reference_keys(pyarrow, schema))
+    return pyarrow.Table.from_pylist(entities, schema=schema or _infer_schema(pyarrow, entities))
+
+
+def iter_chunks(entities, size):
+    """Splits entities into lists of at most `size` entities, consuming them one chunk at a time.
+
+    :param entities: The entities.
+    :type entities: Iterable[dict]
+    :param size: The maximum number of entities per chunk.
+    :type size: int
+    :rtype: Iterator[list[dict]]
+    """
+    iterator = iter(entities)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class _ParquetFileWriter(object):
+    """Writes entities to a Parquet file, one row group at a time.
+
+    Without a given schema, the schema is inferred from the first row group, and widened when later row groups have
+    new columns, or values in columns that were all null so far. As the schema of a Parquet file can't change once
+    written, the row groups written so far are then copied to a new file with the wider schema, one at a time.
+    """
+
+    def __init__(self, pyarrow, path, schema=None, widen_schema=None, **writer_options):
+        self.pyarrow = pyarrow
+        self.path = path
+        self.schema = schema
+        # A schema given by the caller is used as is, unless it's only the starting point
+        self.widen_schema = schema is None if widen_schema is None else widen_schema
+        self.writer_options = writer_options
+        self._writer = None
+
+    def _widen(self, entities):
+        chunk_schema = _infer_schema(self.pyarrow, entities)
+        if self.schema is None:
+            self.schema = chunk_schema
+            return
+        try:
+            schema = self.pyarrow.unify_schemas([self.schema, chunk_schema], promote_options="permissive")
+        except (self.pyarrow.ArrowTypeError, self.pyarrow.ArrowInvalid) as exc:
+            raise ValueError("The entities don't fit the schema of the previous row groups: {}".format(exc)) from exc
+        if schema.equals(self.schema):
+            return
+        self.schema = schema
+        if self._writer is not None:
+            self._writer.close()
+            previous_path = self.path + ".previous"
+            os.replace(self.path, previous_path)
+            self._writer = self.pyarrow.parquet.ParquetWriter(self.path, schema, **self.writer_options)
+            previous_file = self.pyarrow.parquet.ParquetFile(previous_path)
+            for index in range(previous_file.num_row_groups):
+                rows = previous_file.read_row_group(index).to_pylist()
+                self._writer.write_table(self.pyarrow.Table.from_pylist(rows, schema=schema))
+            previous_file.close()
+            os.remove(previous_path)
+
+    def write(self, entities):
+        """Writes a row group.
+
+        :param entities: The entities.
+        :type entities: list[dict]
+        :raise ValueError: Raises when the entities don't fit the schema inferred so far, such as a column of numbers
+                           with a string.
+        """
+        entities = _normalize_references(entities, _reference_keys(self.pyarrow, self.schema))
+        if self.widen_schema:
+            self._widen(entities)
+        if self._writer is None:
+            self._writer = self.pyarrow.parquet.ParquetWriter(self.path, self.schema, **self.writer_options)
+        self._writer.write_table(self.pyarrow.Table.from_pylist(entities, schema=self.schema))
+
+    @property
+    def started(self):
+        """Whether the file was created, with at least one row group.
+
+        :rtype: bool
+        """
+        return self._writer is not None
+
+    def close(self):
+        """Closes the file, if it was created."""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+def write_parquet(entities, path, schema=None, row_group_size=DEFAULT_ROW_GROUP_SIZE, **writer_options):
+    """Writes entities to a Parquet file, one row group at a time. Only one row group of entities is held in memory, so
+    a generator can be passed in to write more entities than fit in memory.
+
+    :param entities: The entities.
+    :type entities: Iterable[dict]
+    :param path: The path to the Parquet file.
+    :type path: str
+    :param schema: The schema of the file. By default, it is inferred from the entities: from the first row group,
+                   widened as later row groups have new columns or values in columns that were all null.
+    :type schema: pyarrow.Schema or None
+    :param row_group_size: The number of entities per row group.
+    :type row_group_size: int
+    :param writer_options: Additional options for `pyarrow.parquet.ParquetWriter`, such as `compression`.
+    :raise ValueError: Raises when a row group doesn't fit the schema inferred from the previous ones.
+    :return: The number of entities written.
+    :rtype: int
+    """
+    pyarrow = _import_pyarrow()
+    writer = _ParquetFileWriter(pyarrow, path, schema, **writer_options)
+    count = 0
+    try:
+        for chunk in iter_chunks(entities, row_group_size):
+            writer.write(chunk)
+            count += len(chunk)
+    finally:
+        writer.close()
+    if count == 0 and schema is not None:
+        pyarrow.parquet.write_table(schema.empty_table(), path, **writer_options)
+    return count
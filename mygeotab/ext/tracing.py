@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+
+"""
+mygeotab.ext.tracing
+~~~~~~~~~~~~~~~~~~~~
+
+OpenTelemetry spans for the calls and operations made by the API objects. This requires the optional
+`opentelemetry-api` package, and an OpenTelemetry SDK to export the spans.
+"""
+
+import contextvars
+import functools
+from contextlib import contextmanager
+
+from mygeotab.hooks import CallHook
+
+
+def _import_opentelemetry():
+    try:
+        from opentelemetry import context, propagate, trace
+    except ImportError as exc:
+        raise ImportError("The 'opentelemetry-api' package could not be imported") from exc
+    return context, propagate, trace
+
+
+def _nanoseconds(timestamp):
+    return int(timestamp * 1e9)
+
+
+def _span_attributes(attributes):
+    """Keeps the attributes OpenTelemetry can record, prefixed with `mygeotab.`."""
+    return {
+        "mygeotab." + key: value
+        for key, value in attributes.items()
+        if isinstance(value, (str, bool, int, float))
+    }
+
+
+class TracingHook(CallHook):
+    """Creates a client span for each call, named like `MyGeotab Get`, and an internal span for each operation, such
+    as a data feed poll. Spans are current while they last, so calls made during an operation (and the spans of
+    instrumented HTTP clients during a call) are nested under them. Each call of an `ExecuteMultiCall` gets a child
+    span of the multi-call, spanning the whole request.
+    """
+
+    def __init__(self, tracer=None, tracer_provider=None):
+        """Initializes the TracingHook object.
+
+        :param tracer: The tracer to create the spans with. By default, a `mygeotab` tracer from the provider.
+        :type tracer: opentelemetry.trace.Tracer or None
+        :param tracer_provider: The provider of the default tracer. By default, the global provider.
+        :type tracer_provider: opentelemetry.trace.TracerProvider or None
+        """
+        self._context, self._propagate, self._trace = _import_opentelemetry()
+        if tracer is None:
+            from mygeotab import __version__
+
+            tracer = self._trace.get_tracer("mygeotab", __version__, tracer_provider=tracer_provider)
+        self.tracer = tracer
+
+    def _start(self, info, name, kind, attributes):
+        span = self.tracer.start_span(name, kind=kind, attributes=attributes, start_time=_nanoseconds(info.start_time))
+        token = self._context.attach(self._trace.set_span_in_context(span))
+        info.hook_state[self] = (span, token)
+
+    def _end(self, info):
+        """Detaches the span of a call or operation, and records its exception.
+
+        :return: The span, not yet ended, or None if it wasn't started.
+        """
+        state = info.hook_state.pop(self, None)
+        if state is None:
+            return None
+        span, token = state
+        self._context.detach(token)
+        if info.exception is not None:
+            span.record_exception(info.exception)
+            span.set_status(self._trace.Status(self._trace.StatusCode.ERROR, type(info.exception).__name__))
+        return span
+
+    def before_call(self, call_info):
+        """Starts the span of the call, and makes it current.
+
+        :param call_info: The details of the call.
+        :type call_info: mygeotab.hooks.CallInfo
+        """
+        attributes = {"rpc.system": "jsonrpc", "rpc.method": call_info.method, "mygeotab.retries": call_info.retries}
+        if call_info.type_name:
+            attributes["mygeotab.type_name"] = call_info.type_name
+        if call_info.server:
+            attributes["server.address"] = call_info.server
+        self._start(call_info, "MyGeotab {}".format(call_info.method), self._trace.SpanKind.CLIENT, attributes)
+
+    def after_call(self, call_info):
+        """Records the timings and sizes of the call on its span, and ends it.
+
+        :param call_info: The details of the call.
+        :type call_info: mygeotab.hooks.CallInfo
+        """
+        span = self._end(call_info)
+        if span is None:
+            return
+        span.set_attributes(
+            {
+                "mygeotab.serialize_time": call_info.serialize_time,
+                "mygeotab.network_time": call_info.network_time,
+                "mygeotab.deserialize_time": call_info.deserialize_time,
+                "mygeotab.bytes_sent": call_info.bytes_sent,
+                "mygeotab.bytes_received": call_info.bytes_received,
+            }
+        )
+        if call_info.status_code is not None:
+            span.set_attribute("http.response.status_code", call_info.status_code)
+        if call_info.result_count is not None:
+            span.set_attribute("mygeotab.result_count", call_info.result_count)
+        end_time = _nanoseconds(call_info.start_time + call_info.total_time)
+        if call_info.method == "ExecuteMultiCall":
+            self._add_multi_call_spans(span, call_info, end_time)
+        span.end(end_time=end_time)
+
+    def _add_multi_call_spans(self, span, call_info, end_time):
+        """Adds a child span for each call of a multi-call. The server doesn't report the time of each call, so they
+        all span the whole request.
+        """
+        calls = call_info.parameters.get("calls") or []
+        results = call_info.result if isinstance(call_info.result, list) else []
+        start_time = _nanoseconds(call_info.start_time)
+        parent = self._trace.set_span_in_context(span)
+        for index, sub_call in enumerate(calls):
+            method = sub_call.get("method")
+            attributes = {"rpc.system": "jsonrpc", "rpc.method": method, "mygeotab.multi_call.index": index}
+            type_name = (sub_call.get("params") or {}).get("typeName")
+            if type_name:
+                attributes["mygeotab.type_name"] = type_name
+            if index < len(results) and isinstance(results[index], list):
+                attributes["mygeotab.result_count"] = len(results[index])
+            child = self.tracer.start_span(
+                "MyGeotab {}".format(method),
+                context=parent,
+                kind=self._trace.SpanKind.INTERNAL,
+                attributes=attributes,
+                start_time=start_time,
+            )
+            child.end(end_time=end_time)
+
+    def before_operation(self, operation_info):
+        """Starts the span of the operation, and makes it current.
+
+        :param operation_info: The details of the operation.
+        :type operation_info: mygeotab.hooks.OperationInfo
+        """
+        attributes = _span_attributes(operation_info.attributes)
+        self._start(operation_info, operation_info.name, self._trace.SpanKind.INTERNAL, attributes)
+
+    def after_operation(self, operation_info):
+        """Records the attributes added during the operation on its span, and ends it.
+
+        :param operation_info: The details of the operation.
+        :type operation_info: mygeotab.hooks.OperationInfo
+        """
+        span = self._end(operation_info)
+        if span is None:
+            return
+        span.set_attributes(_span_attributes(operation_info.attributes))
+        span.end(end_time=_nanoseconds(operation_info.start_time + operation_info.total_time))
+
+    def inject_context(self, carrier):
+        """Adds the current trace context to the carrier, with the global propagator (W3C `traceparent` by default).
+
+        :param carrier: The dict to add to.
+        :type carrier: dict
+        """
+        self._propagate.inject(carrier)
+
+
+@contextmanager
+def attached_context(carrier):
+    """Continues the trace context of a carrier made by :func:`mygeotab.hooks.inject_context` in another process, so
+    spans created within it are nested under the span that was current when the carrier was made.
+
+    :param carrier: The carrier. If empty, nothing is done.
+    :type carrier: dict or None
+    """
+    if not carrier:
+        yield
+        return
+    context, propagate, _ = _import_opentelemetry()
+    token = context.attach(propagate.extract(carrier))
+    try:
+        yield
+    finally:
+        context.detach(token)
+
+
+def propagate_context(function):
+    """Wraps a function to run in a copy of the current context, to continue the current trace on another thread,
+    such as with `executor.submit(propagate_context(function), ...)`. This doesn't require OpenTelemetry.
+
+    :param function: The function to wrap.
+    :type function: callable
+    :return: The wrapped function.
+    :rtype: callable
+    """
+    context = contextvars.copy_context()
+
+    @functools.wraps(function)
+    def run_in_context(*args, **kwargs):
+        return context.copy().run(function, *args, **kwargs)
+
+    return run_in_context
+
+
+__all__ = ["TracingHook", "attached_context", "propagate_context"]
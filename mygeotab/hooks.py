@@ -0,0 +1,397 @@
+# -*- coding: utf-8 -*-
+
+"""
+mygeotab.hooks
+~~~~~~~~~~~~~~
+
+Instrumentation hooks, called before and after each call made by the API objects, and around operations made of
+several calls, such as a data feed poll.
+"""
+
+import logging
+from contextlib import nullcontext
+from time import perf_counter, time
+
+_log = logging.getLogger(__name__)
+
+# Secrets that hooks must never see, as they may log them or send them elsewhere
+_HIDDEN_PARAMETERS = frozenset(["credentials", "password", "sessionId"])
+
+_NO_HOOKS = nullcontext()
+
+
+class CallInfo(object):
+    """The details of a call to the API, filled in as the call is made.
+
+    Times are in seconds and sizes in bytes. Phases that weren't reached (for example, `deserialize_time` when the
+    request timed out) are left at 0.
+    """
+
+    def __init__(self, method, parameters, server=None, retries=0):
+        """Initializes the CallInfo object.
+
+        :param method: The method name.
+        :type method: str
+        :param parameters: The parameters of the call. The credentials, password and session id are left out.
+        :type parameters: dict
+        :param server: The server the call is made to.
+        :type server: str or None
+        :param retries: The number of times the call was retried after re-authenticating.
+        :type retries: int
+        """
+        self.method = method
+        self.parameters = {key: value for key, value in (parameters or {}).items() if key not in _HIDDEN_PARAMETERS}
+        self.type_name = self.parameters.get("typeName")
+        self.server = server
+        self.retries = retries
+        self.start_time = None
+        self.serialize_time = 0.0
+        self.network_time = 0.0
+        self.deserialize_time = 0.0
+        self.total_time = 0.0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.status_code = None
+        self.result = None
+        self.result_count = None
+        self.exception = None
+        self.hook_state = {}
+
+    @property
+    def succeeded(self):
+        """Whether the call returned a result.
+
+        :rtype: bool
+        """
+        return self.exception is None
+
+    def set_result(self, result):
+        """Sets the result of the call, and counts the entities it contains.
+
+        :param result: The result from the server.
+        """
+        self.result = result
+        if isinstance(result, list):
+            self.result_count = len(result)
+        elif isinstance(result, dict) and isinstance(result.get("data"), list):
+            self.result_count = len(result["data"])
+
+    def __repr__(self):
+        return "CallInfo(method={method}, type_name={type_name}, total_time={total_time:.3f})".format(
+            method=self.method, type_name=self.type_name, total_time=self.total_time
+        )
+
+
+class OperationInfo(object):
+    """The details of an operation grouping several calls, such as a data feed poll or an Altitude job."""
+
+    def __init__(self, name, attributes=None):
+        """Initializes the OperationInfo object.
+
+        :param name: The name of the operation, such as `DataFeed.poll`.
+        :type name: str
+        :param attributes: Details of the operation, such as the type name. Hooks may add to them.
+        :type attributes: dict or None
+        """
+        self.name = name
+        self.attributes = dict(attributes or {})
+        self.start_time = None
+        self.total_time = 0.0
+        self.exception = None
+        self.hook_state = {}
+
+    @property
+    def succeeded(self):
+        """Whether the operation completed without raising.
+
+        :rtype: bool
+        """
+        return self.exception is None
+
+    def __repr__(self):
+        return "OperationInfo(name={name}, total_time={total_time:.3f})".format(
+            name=self.name, total_time=self.total_time
+        )
+
+
+class CallHook(object):
+    """The hook to override to instrument calls and operations. Every method does nothing by default.
+
+    Hooks are called synchronously on the thread (or event loop) making the call, so they should be quick. Exceptions
+    raised by hooks are logged and don't affect the call.
+    """
+
+    def before_call(self, call_info):
+        """Called before the request is serialized and sent.
+
+        :param call_info: The details of the call. Only the method, parameters, server and retries are set.
+        :type call_info: CallInfo
+        """
+        return
+
+    def after_call(self, call_info):
+        """Called once the call returns or raises.
+
+        :param call_info: The details of the call, with the timings, sizes and result or exception set.
+        :type call_info: CallInfo
+        """
+        return
+
+    def before_operation(self, operation_info):
+        """Called when an operation starts, before any of its calls.
+
+        :param operation_info: The details of the operation.
+        :type operation_info: OperationInfo
+        """
+        return
+
+    def after_operation(self, operation_info):
+        """Called once an operation completes or raises.
+
+        :param operation_info: The details of the operation, with its time and exception set.
+        :type operation_info: OperationInfo
+        """
+        return
+
+    def inject_context(self, carrier):
+        """Adds the current context of the hook (such as a trace id) to a carrier dict, to continue it in another
+        process.
+
+        :param carrier: The picklable dict to add to.
+        :type carrier: dict
+        """
+        return
+
+
+class LoggingHook(CallHook):
+    """Logs a line for each call, with its timings and sizes."""
+
+    def __init__(self, logger=None, level=logging.DEBUG, slow_threshold=None):
+        """Initializes the LoggingHook object.
+
+        :param logger: The logger to use. By default, the `mygeotab.hooks` logger.
+        :type logger: logging.Logger or None
+        :param level: The level to log successful calls at.
+        :type level: int
+        :param slow_threshold: If set, calls taking longer than this (in seconds) are logged as warnings.
+        :type slow_threshold: float or None
+        """
+        self.logger = logger or _log
+        self.level = level
+        self.slow_threshold = slow_threshold
+
+    def after_call(self, call_info):
+        """Logs the call.
+
+        :param call_info: The details of the call.
+        :type call_info: CallInfo
+        """
+        level = self.level
+        if call_info.exception is not None:
+            level = logging.WARNING
+        elif self.slow_threshold is not None and call_info.total_time > self.slow_threshold:
+            level = logging.WARNING
+        if not self.logger.isEnabledFor(level):
+            return
+        self.logger.log(
+            level,
+            "%s%s: %.1f ms (serialize %.1f ms, network %.1f ms, deserialize %.1f ms), "
+            "%d bytes sent, %d bytes received, status %s, %s results, %d retries%s",
+            call_info.method,
+            "({})".format(call_info.type_name) if call_info.type_name else "",
+            call_info.total_time * 1000,
+            call_info.serialize_time * 1000,
+            call_info.network_time * 1000,
+            call_info.deserialize_time * 1000,
+            call_info.bytes_sent,
+            call_info.bytes_received,
+            call_info.status_code,
+            call_info.result_count,
+            call_info.retries,
+            ", raised {!r}".format(call_info.exception) if call_info.exception is not None else "",
+        )
+
+    def after_operation(self, operation_info):
+        """Logs the operation.
+
+        :param operation_info: The details of the operation.
+        :type operation_info: OperationInfo
+        """
+        level = self.level if operation_info.exception is None else logging.WARNING
+        if not self.logger.isEnabledFor(level):
+            return
+        self.logger.log(
+            level,
+            "%s %s: %.1f ms%s",
+            operation_info.name,
+            operation_info.attributes,
+            operation_info.total_time * 1000,
+            ", raised {!r}".format(operation_info.exception) if operation_info.exception is not None else "",
+        )
+
+
+class _HookRunner(object):
+    def __init__(self, hooks, info, kind):
+        self.hooks = hooks
+        self.info = info
+        self.kind = kind
+        self.start = None
+
+    def __enter__(self):
+        self.info.start_time = time()
+        self.start = perf_counter()
+        _notify(self.hooks, "before_" + self.kind, self.info)
+        return self.info
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.info.total_time = perf_counter() - self.start
+        if exc_value is not None:
+            self.info.exception = exc_value
+        _notify(self.hooks, "after_" + self.kind, self.info)
+        return False
+
+
+class _Phase(object):
+    __slots__ = ("call_info", "attribute", "start")
+
+    def __init__(self, call_info, attribute):
+        self.call_info = call_info
+        self.attribute = attribute
+        self.start = None
+
+    def __enter__(self):
+        self.start = perf_counter()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        setattr(self.call_info, self.attribute, perf_counter() - self.start)
+        return False
+
+
+class CallMeasurement(object):
+    """Records the timings, sizes and result of a call in its CallInfo, as the call is made."""
+
+    def __init__(self, call_info):
+        """Initializes the CallMeasurement object.
+
+        :param call_info: The details of the call to record in.
+        :type call_info: CallInfo
+        """
+        self.call_info = call_info
+
+    def phase(self, name):
+        """Gets a context manager that times a phase of the call, even if it raises.
+
+        :param name: The name of the phase: `serialize`, `network` or `deserialize`.
+        :type name: str
+        :rtype: contextlib.AbstractContextManager
+        """
+        return _Phase(self.call_info, name + "_time")
+
+    def record(self, **attributes):
+        """Records details of the call, such as `bytes_sent` or `status_code`.
+
+        :param attributes: The details, by CallInfo attribute name.
+        """
+        for name, value in attributes.items():
+            setattr(self.call_info, name, value)
+
+    def set_result(self, result):
+        """Records the result of the call.
+
+        :param result: The result from the server.
+        :return: The result.
+        """
+        self.call_info.set_result(result)
+        return result
+
+
+class _NoMeasurement(object):
+    """Measures nothing, for calls without hooks."""
+
+    def phase(self, name):
+        return _NO_HOOKS
+
+    def record(self, **attributes):
+        return
+
+    def set_result(self, result):
+        return result
+
+
+_NO_MEASUREMENT = _NoMeasurement()
+
+
+def measure_call(call_info):
+    """Gets the object recording the timings, sizes and result of a call made with `_query`.
+
+    :param call_info: The details of the call to record in. If None, nothing is measured.
+    :type call_info: CallInfo or None
+    :rtype: CallMeasurement
+    """
+    if call_info is None:
+        return _NO_MEASUREMENT
+    return CallMeasurement(call_info)
+
+
+def _notify(hooks, name, *args):
+    for hook in hooks:
+        try:
+            getattr(hook, name)(*args)
+        except Exception:
+            _log.exception("Instrumentation hook %r failed in %s", hook, name)
+
+
+def run_hooks(hooks, call_info):
+    """Gets a context manager that calls the hooks before and after the call made within it, and times the call.
+
+    :param hooks: The hooks to call.
+    :type hooks: list(CallHook)
+    :param call_info: The details of the call. If None, no hooks are called and nothing is measured.
+    :type call_info: CallInfo or None
+    :rtype: contextlib.AbstractContextManager
+    """
+    if call_info is None:
+        return _NO_HOOKS
+    return _HookRunner(hooks, call_info, "call")
+
+
+def run_operation(hooks, name, **attributes):
+    """Gets a context manager that calls the hooks when the operation made within it starts and ends.
+
+    :param hooks: The hooks to call, usually those of the API object making the calls.
+    :type hooks: list(CallHook) or None
+    :param name: The name of the operation, such as `DataFeed.poll`.
+    :type name: str
+    :param attributes: Details of the operation, such as the type name.
+    :rtype: contextlib.AbstractContextManager
+    """
+    if not hooks:
+        return _NO_HOOKS
+    return _HookRunner(hooks, OperationInfo(name, attributes), "operation")
+
+
+def inject_context(hooks):
+    """Gets the current context of the hooks, such as the current trace, to continue it in another process.
+
+    :param hooks: The hooks, usually those of the API object making the calls.
+    :type hooks: list(CallHook) or None
+    :return: A picklable dict, empty if no hook has a context to pass on.
+    :rtype: dict
+    """
+    carrier = {}
+    if hooks:
+        _notify(hooks, "inject_context", carrier)
+    return carrier
+
+
+__all__ = [
+    "CallHook",
+    "CallInfo",
+    "CallMeasurement",
+    "LoggingHook",
+    "OperationInfo",
+    "inject_context",
+    "measure_call",
+    "run_hooks",
+    "run_operation",
+]
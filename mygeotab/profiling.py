@@ -0,0 +1,278 @@
+# -*- coding: utf-8 -*-
+
+"""
+mygeotab.profiling
+~~~~~~~~~~~~~~~~~~
+
+An opt-in profiling mode, which profiles the calls made by the API objects (including serialization) and the data feed
+polls, and periodically writes the aggregated stats to a file.
+
+Turn it on without changing the application by setting the `MYGEOTAB_PROFILE` environment variable to `1` (or to the
+path of the stats file), or with `API(profile=True)`.
+"""
+
+import atexit
+import logging
+import os
+import sys
+import threading
+from time import monotonic
+
+from .hooks import CallHook
+
+PROFILE_ENV = "MYGEOTAB_PROFILE"
+PROFILE_INTERVAL_ENV = "MYGEOTAB_PROFILE_INTERVAL"
+PROFILER_ENV = "MYGEOTAB_PROFILER"
+
+DEFAULT_INTERVAL = 60
+PROFILERS = ("cprofile", "pyinstrument")
+
+_ENABLED_VALUES = frozenset(["1", "true", "yes", "on"])
+_DISABLED_VALUES = frozenset(["", "0", "false", "no", "off"])
+
+_log = logging.getLogger(__name__)
+
+_hooks_lock = threading.Lock()
+_hooks_by_path: "dict[str | None, ProfilingHook]" = {}
+
+
+class _CProfileBackend(object):
+    """Deterministic profiling with cProfile. Since Python 3.12, a single profiler sees every thread, so it is shared;
+    before that, each thread gets its own profiler.
+    """
+
+    shared = sys.version_info >= (3, 12)
+    extension = ".prof"
+
+    def __init__(self):
+        import cProfile
+        import pstats
+
+        self._cProfile = cProfile
+        self._pstats = pstats
+
+    def create(self):
+        return self._cProfile.Profile()
+
+    def start(self, profiler):
+        profiler.enable()
+
+    def stop(self, profiler):
+        profiler.disable()
+
+    def dump(self, profilers, path):
+        stats = None
+        for profiler in profilers:
+            if stats is None:
+                stats = self._pstats.Stats(profiler)
+            else:
+                stats.add(profiler)
+        if stats is not None:
+            stats.dump_stats(path)
+
+
+class _PyinstrumentBackend(object):
+    """Statistical profiling with pyinstrument, with a profiler per thread."""
+
+    shared = False
+    extension = ".pyisession"
+
+    def __init__(self):
+        try:
+            import pyinstrument
+            from pyinstrument.session import Session
+        except ImportError as exc:
+            raise ImportError("The 'pyinstrument' package could not be imported") from exc
+        self._pyinstrument = pyinstrument
+        self._Session = Session
+
+    def create(self):
+        return self._pyinstrument.Profiler(async_mode="disabled")
+
+    def start(self, profiler):
+        profiler.start()
+
+    def stop(self, profiler):
+        # Each session is combined with the previous ones
+        profiler.stop()
+
+    def dump(self, profilers, path):
+        session = None
+        for profiler in profilers:
+            last_session = profiler.last_session
+            if last_session is None:
+                continue
+            session = last_session if session is None else self._Session.combine(session, last_session)
+        if session is not None:
+            session.save(path)
+
+
+_BACKENDS = {"cprofile": _CProfileBackend, "pyinstrument": _PyinstrumentBackend}
+
+
+class _Slot(object):
+    def __init__(self, profiler):
+        self.profiler = profiler
+        self.depth = 0
+
+
+class ProfilingHook(CallHook):
+    """Profiles the calls and operations (such as data feed polls), and writes the stats aggregated since the start to
+    a file at most every `interval` seconds, and at exit.
+
+    The profiler runs while any call or operation is in progress, so on an event loop or with several threads, it also
+    sees what else runs at the same time. With cProfile, the file can be read with `pstats` or tools like snakeviz. With
+    pyinstrument, it is a session that can be rendered with `pyinstrument --load=<path>`.
+    """
+
+    def __init__(self, path=None, interval=DEFAULT_INTERVAL, profiler="cprofile"):
+        """Initializes the ProfilingHook object.
+
+        :param path: The file to write the stats to. By default, `mygeotab-<pid>.prof` (or `.pyisession`) in the
+                     current directory.
+        :type path: str or None
+        :param interval: The minimum time between writes of the stats (in seconds).
+        :type interval: float
+        :param profiler: The profiler, one of `PROFILERS`: `cprofile` for deterministic profiling, or `pyinstrument`
+                         (optional dependency) for lower overhead sampling.
+        :type profiler: str
+        :raise ValueError: Raises when the profiler is not supported.
+        """
+        backend = _BACKENDS.get(profiler)
+        if backend is None:
+            raise ValueError("Unsupported profiler '{}'. Use one of: {}".format(profiler, ", ".join(PROFILERS)))
+        self.backend = backend()
+        self.path = path or "mygeotab-{}{}".format(os.getpid(), self.backend.extension)
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._slots = {}
+        self._last_dump = monotonic()
+        self._failed = False
+        atexit.register(self.dump)
+
+    def close(self):
+        """Writes the stats, and stops writing them at exit. Profilers still running are left out."""
+        atexit.unregister(self.dump)
+        self.dump()
+
+    def _slot_key(self):
+        return None if self.backend.shared else threading.get_ident()
+
+    def _start(self):
+        with self._lock:
+            key = self._slot_key()
+            slot = self._slots.get(key)
+            if slot is None:
+                slot = self._slots[key] = _Slot(self.backend.create())
+            if slot.depth == 0 and not self._failed:
+                try:
+                    self.backend.start(slot.profiler)
+                except ValueError as exc:
+                    # Another profiler is already active
+                    self._failed = True
+                    _log.warning("Profiling is disabled: %s", exc)
+            slot.depth += 1
+
+    def _stop(self):
+        with self._lock:
+            slot = self._slots.get(self._slot_key())
+            if slot is None or slot.depth == 0:
+                return
+            slot.depth -= 1
+            if slot.depth == 0 and not self._failed:
+                self.backend.stop(slot.profiler)
+        if monotonic() - self._last_dump >= self.interval:
+            self.dump()
+
+    def dump(self):
+        """Writes the stats aggregated since the start to the file. Profilers still running are left out until the
+        next write.
+        """
+        with self._lock:
+            self._last_dump = monotonic()
+            profilers = [slot.profiler for slot in self._slots.values() if slot.depth == 0]
+            if not profilers or self._failed:
+                return
+            temporary_path = self.path + ".tmp"
+            try:
+                self.backend.dump(profilers, temporary_path)
+                if os.path.exists(temporary_path):
+                    os.replace(temporary_path, self.path)
+            except (IOError, OSError) as exc:
+                _log.warning("Could not write the profile to %s: %s", self.path, exc)
+
+    def before_call(self, call_info):
+        """Starts profiling, if it isn't already running.
+
+        :param call_info: The details of the call.
+        :type call_info: mygeotab.hooks.CallInfo
+        """
+        self._start()
+
+    def after_call(self, call_info):
+        """Stops profiling once no call or operation is in progress, and writes the stats if it's time to.
+
+        :param call_info: The details of the call.
+        :type call_info: mygeotab.hooks.CallInfo
+        """
+        self._stop()
+
+    def before_operation(self, operation_info):
+        """Starts profiling, if it isn't already running.
+
+        :param operation_info: The details of the operation.
+        :type operation_info: mygeotab.hooks.OperationInfo
+        """
+        self._start()
+
+    def after_operation(self, operation_info):
+        """Stops profiling once no call or operation is in progress, and writes the stats if it's time to.
+
+        :param operation_info: The details of the operation.
+        :type operation_info: mygeotab.hooks.OperationInfo
+        """
+        self._stop()
+
+
+def get_profiling_hook(profile=None):
+    """Gets the profiling hook to use for an API object. The hook is shared by every API object writing to the same
+    file, since only one profiler can run at a time.
+
+    :param profile: True to profile to the default file, the path of the file, or False not to profile. If None, the
+                    `MYGEOTAB_PROFILE` environment variable is used in the same way (`1` or a path). The
+                    `MYGEOTAB_PROFILE_INTERVAL` and `MYGEOTAB_PROFILER` environment variables set the interval
+                    between writes and the profiler.
+    :type profile: bool or str or None
+    :return: The profiling hook, or None if profiling is off.
+    :rtype: ProfilingHook or None
+    """
+    if profile is None:
+        profile = os.environ.get(PROFILE_ENV, "")
+        if profile.strip().lower() in _DISABLED_VALUES:
+            return None
+        if profile.strip().lower() in _ENABLED_VALUES:
+            profile = True
+    if not profile:
+        return None
+    path = profile if isinstance(profile, str) else None
+    interval = float(os.environ.get(PROFILE_INTERVAL_ENV) or DEFAULT_INTERVAL)
+    profiler = os.environ.get(PROFILER_ENV) or "cprofile"
+    with _hooks_lock:
+        hook = _hooks_by_path.get(path)
+        if hook is None:
+            hook = _hooks_by_path[path] = ProfilingHook(path, interval, profiler)
+        return hook
+
+
+def clear_profiling_hooks():
+    """Closes the profiling hooks shared by the API objects, so the next API objects get new ones. API objects that
+    already have a hook keep profiling with it, but its stats are no longer written at exit.
+    """
+    with _hooks_lock:
+        hooks = list(_hooks_by_path.values())
+        _hooks_by_path.clear()
+    for hook in hooks:
+        hook.close()
+
+
+__all__ = ["ProfilingHook", "clear_profiling_hooks", "get_profiling_hook"]
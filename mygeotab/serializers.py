@@ -9,8 +9,8 @@ JSON serialization and deserialization helper objects for the MyGeotab API.
 
 import json
 import re
-
-import arrow
+import sys
+from collections.abc import Mapping
 
 from . import dates
 
@@ -33,9 +33,20 @@ def json_serialize(obj):
     return json.dumps(obj, default=object_serializer, separators=(",", ":"))
 
 
-def json_deserialize(json_str):
+def json_deserialize(json_str, intern_ids=False):
+    """Deserializes a JSON string from the MyGeotab API.
+
+    :param json_str: The JSON string.
+    :param intern_ids: If True, intern the strings of entity ids and share identical references to other entities
+                       (such as `{"id": "b12"}`) across the result. Shared references must not be changed in place.
+    """
     if use_rapidjson:
+        if intern_ids:
+            return rapidjson.loads(json_str, datetime_mode=DATETIME_MODE, object_hook=ReferenceInterner())
         return rapidjson.loads(json_str, datetime_mode=DATETIME_MODE)
+    if intern_ids:
+        interner = ReferenceInterner()
+        return json.loads(json_str, object_hook=lambda obj: interner(object_deserializer(obj)))
     return json.loads(json_str, object_hook=object_deserializer)
 
 
@@ -46,6 +57,9 @@ def object_serializer(obj):
     """
     if hasattr(obj, "isoformat"):
         return dates.format_iso_datetime(obj)
+    elif isinstance(obj, Mapping):
+        # Dict-like objects, such as the records from mygeotab.ext.records
+        return dict(obj)
     else:
         # Let the base class default method raise the TypeError
         return json.JSONEncoder.default(obj)
@@ -59,7 +73,40 @@ def object_deserializer(obj):
     for key, val in obj.items():
         if isinstance(val, str) and DATETIME_REGEX.search(val):
             try:
-                obj[key] = dates.localize_datetime(arrow.get(val).datetime)
-            except (ValueError, arrow.parser.ParserError):
+                obj[key] = dates.parse_iso_datetime(val)
+            except ValueError:
                 obj[key] = val
     return obj
+
+
+class ReferenceInterner(object):
+    """Helper to intern entity ids while deserializing, and to share identical references to other entities (objects
+    with only an id, like `{"id": "b12"}`). Large results repeat the same device and diagnostic ids many times.
+    """
+
+    REFERENCE_KEYS = frozenset(["device", "diagnostic", "driver", "rule", "user", "controller", "failureMode"])
+
+    def __init__(self):
+        """Initialize the ReferenceInterner with no known references."""
+        self._references = {}
+
+    def __call__(self, obj):
+        """Interns the ids in a deserialized dict.
+
+        :param obj: The dict.
+        :return: The dict, or the shared dict of an identical reference.
+        """
+        entity_id = obj.get("id")
+        if isinstance(entity_id, str):
+            entity_id = sys.intern(entity_id)
+            if len(obj) == 1:
+                reference = self._references.get(entity_id)
+                if reference is not None:
+                    return reference
+                self._references[entity_id] = obj
+            obj["id"] = entity_id
+        for key in self.REFERENCE_KEYS.intersection(obj):
+            # Some references are sent as a plain id, like "driver": "UnknownDriverId"
+            if isinstance(obj[key], str):
+                obj[key] = sys.intern(obj[key])
+        return obj
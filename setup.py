@@ -38,7 +38,12 @@ setup(
     description="A Python client for the MyGeotab SDK",
     long_description=f"{readme} \n\n {changelog}",
     long_description_content_type="text/x-rst",
-    extras_require={"notebook": ["pandas"]},
+    extras_require={
+        "notebook": ["pandas"],
+        "parquet": ["pyarrow"],
+        "metrics": ["prometheus_client"],
+        "tracing": ["opentelemetry-api"],
+    },
     test_suite="tests",
     include_package_data=True,
     packages=packages,
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from mygeotab.ext.fake_server import FakeServer
+from mygeotab.ext.feed import DataFeedListener
+
+FAKE_SERVER_ENTITY_COUNT = 25
+
+
+class StoppingListener(DataFeedListener):
+    """Records the batches, then stops the feed once it has seen `stop_after` of them.
+
+    :param stop_after: The number of batches to process before stopping the feed.
+    :type stop_after: int
+    :param tracer: If given, each batch is recorded inside a "process" span of this OpenTelemetry tracer.
+    """
+
+    def __init__(self, stop_after=1, tracer=None):
+        self.stop_after = stop_after
+        self.tracer = tracer
+        self.feed = None
+        self.batches = []
+
+    def on_data(self, data):
+        if self.tracer is not None:
+            with self.tracer.start_as_current_span("process"):
+                self.batches.append(data)
+        else:
+            self.batches.append(data)
+        if len(self.batches) >= self.stop_after:
+            self.feed.running = False
+
+    def on_error(self, error):
+        return False
+
+
+@pytest.fixture(scope="module")
+def fake_server(request):
+    """A fake MyGeotab server shared by the tests of a module. A module can set `FAKE_SERVER_ENTITY_COUNT` to change
+    the number of entities it serves.
+    """
+    entity_count = getattr(request.module, "FAKE_SERVER_ENTITY_COUNT", FAKE_SERVER_ENTITY_COUNT)
+    with FakeServer(entity_count=entity_count) as server:
+        yield server
@@ -2,7 +2,7 @@
 
 import copy
 import sys
-from datetime import datetime
+from datetime import datetime, timezone
 from unittest.mock import MagicMock, patch
 
 import pytest
@@ -220,3 +220,229 @@ def get_entitylist(type_name="Device", second_device_name="Test Device"):
         ],
         type_name,
     )
+
+
+class TestEntityListArrow:
+    def test_to_arrow(self):
+        pyarrow = pytest.importorskip("pyarrow")
+        table = get_entitylist().to_arrow()
+        assert table.num_rows == 3
+        assert table.schema.field("dateTime").type == pyarrow.timestamp("us", tz="UTC")
+        assert pyarrow.types.is_struct(table.schema.field("location").type)
+        assert table.column("location").to_pylist()[2] == {"x": 123, "y": 456}
+        assert table.column("dateTime").to_pylist()[0] == datetime(2019, 5, 22, 2, 25, 33, tzinfo=timezone.utc)
+
+    def test_to_arrow_string_references(self):
+        pyarrow = pytest.importorskip("pyarrow")
+        trips = [{"id": "t1", "driver": "UnknownDriverId"}, {"id": "t2", "driver": {"id": "b12"}}]
+        table = EntityList(trips, "Trip").to_arrow()
+        assert pyarrow.types.is_struct(table.schema.field("driver").type)
+        assert table.column("driver").to_pylist() == [{"id": "UnknownDriverId"}, {"id": "b12"}]
+        assert trips[0]["driver"] == "UnknownDriverId"
+
+    def test_to_arrow_string_references_with_schema(self):
+        pyarrow = pytest.importorskip("pyarrow")
+        schema = pyarrow.schema([("id", pyarrow.string()), ("engine", pyarrow.struct([("id", pyarrow.string())]))])
+        table = EntityList([{"id": "t1", "engine": "NoEngineId"}], "Trip").to_arrow(schema=schema)
+        assert table.column("engine").to_pylist() == [{"id": "NoEngineId"}]
+
+    def test_to_parquet_row_groups(self, tmp_path):
+        pytest.importorskip("pyarrow")
+        import pyarrow.parquet
+
+        path = str(tmp_path / "devices.parquet")
+        entitylist = get_entitylist()
+        schema = entitylist.to_arrow().schema
+        assert entitylist.to_parquet(path, schema=schema, row_group_size=2) == 3
+        parquet_file = pyarrow.parquet.ParquetFile(path)
+        assert parquet_file.num_row_groups == 2
+        assert parquet_file.read().column("id").to_pylist() == ["NoDeviceId", "b823", "b456"]
+
+    def test_to_parquet_widens_null_columns(self, tmp_path):
+        pytest.importorskip("pyarrow")
+        import pyarrow.parquet
+
+        path = str(tmp_path / "trips.parquet")
+        trips = [
+            {"id": "t1", "driver": None, "engineHours": None},
+            {"id": "t2", "driver": None, "engineHours": None},
+            {"id": "t3", "driver": {"id": "b12"}, "engineHours": 12.5},
+        ]
+        assert EntityList(trips, "Trip").to_parquet(path, row_group_size=2) == 3
+        parquet_file = pyarrow.parquet.ParquetFile(path)
+        assert parquet_file.num_row_groups == 2
+        table = parquet_file.read()
+        assert table.schema.field("engineHours").type == pyarrow.float64()
+        assert table.column("driver").to_pylist() == [None, None, {"id": "b12"}]
+        assert table.column("engineHours").to_pylist() == [None, None, 12.5]
+
+    def test_to_parquet_adds_later_columns(self, tmp_path):
+        pytest.importorskip("pyarrow")
+        import pyarrow.parquet
+
+        path = str(tmp_path / "trips.parquet")
+        trips = [{"id": "t1"}, {"id": "t2", "distance": 3.5}, {"id": "t3", "driver": "UnknownDriverId"}]
+        EntityList(trips, "Trip").to_parquet(path, row_group_size=1)
+        table = pyarrow.parquet.read_table(path)
+        assert table.column_names == ["id", "distance", "driver"]
+        assert table.column("distance").to_pylist() == [None, 3.5, None]
+        assert table.column("driver").to_pylist() == [None, None, {"id": "UnknownDriverId"}]
+
+    def test_to_parquet_raises_for_incompatible_columns(self, tmp_path):
+        pytest.importorskip("pyarrow")
+        trips = [{"id": "t1", "distance": 3.5}, {"id": "t2", "distance": "far"}]
+        with pytest.raises(ValueError, match="distance"):
+            EntityList(trips, "Trip").to_parquet(str(tmp_path / "trips.parquet"), row_group_size=1)
+
+    def test_to_arrow_raises_import_error_when_no_pyarrow(self):
+        with patch.dict(sys.modules, {"pyarrow": None}):
+            with pytest.raises(ImportError, match="pyarrow"):
+                get_entitylist().to_arrow()
+
+
+class TestEntityListTypedDataFrame:
+    def test_typed_columns(self):
+        pandas = pytest.importorskip("pandas")
+        entitylist = EntityList(
+            [
+                {"id": "a1", "dateTime": datetime(2024, 1, 1, tzinfo=timezone.utc), "device": {"id": "b1"}, "data": 1},
+                {"id": "a2", "dateTime": datetime(2024, 1, 2), "device": {"id": "b1"}, "data": 2.5},
+                {"id": "a3", "dateTime": None, "device": {"id": "b2"}, "data": None, "flag": True},
+                {"id": "a4", "dateTime": datetime(2024, 1, 3), "device": {"id": "b1"}, "data": 4},
+            ],
+            "StatusData",
+        )
+        dataframe = entitylist.to_dataframe(typed=True)
+        assert list(dataframe.columns) == ["id", "dateTime", "device.id", "data", "flag"]
+        assert str(dataframe["dateTime"].dt.tz) == "UTC"
+        assert pandas.isna(dataframe["dateTime"][2])
+        assert dataframe["dateTime"][1] == pandas.Timestamp("2024-01-02", tz="UTC")
+        assert dataframe["data"].dtype == "float64"
+        assert dataframe["data"].isna().tolist() == [False, False, True, False]
+        assert isinstance(dataframe["device.id"].dtype, pandas.CategoricalDtype)
+        assert not isinstance(dataframe["id"].dtype, pandas.CategoricalDtype)
+        assert dataframe["flag"].dtype == "boolean"
+
+    def test_typed_matches_normalize(self):
+        pandas = pytest.importorskip("pandas")
+        entitylist = get_entitylist()
+        typed = entitylist.to_dataframe(typed=True)
+        normalized = pandas.json_normalize(entitylist.data)
+        assert sorted(typed.columns) == sorted(normalized.columns)
+        assert typed["odometer"].tolist() == normalized["odometer"].tolist()
+        assert typed["location.x"].isna().tolist() == [True, True, False]
+
+    def test_typed_list_values(self):
+        pytest.importorskip("pandas")
+        entitylist = EntityList(
+            [
+                {"id": "b1", "groups": [{"id": "GroupCompanyId"}]},
+                {"id": "b2", "groups": [{"id": "GroupVehicleId"}]},
+            ],
+            "Device",
+        )
+        dataframe = entitylist.to_dataframe(typed=True)
+        assert dataframe["groups"].tolist() == [[{"id": "GroupCompanyId"}], [{"id": "GroupVehicleId"}]]
+
+    def test_typed_large_integers(self):
+        pytest.importorskip("pandas")
+        entitylist = EntityList([{"id": "a1", "data": 2**64}, {"id": "a2", "data": 1}], "StatusData")
+        dataframe = entitylist.to_dataframe(typed=True)
+        assert dataframe["data"].dtype == object
+        assert dataframe["data"].tolist() == [2**64, 1]
+
+
+def get_log_records():
+    return EntityList(
+        [
+            {"id": "a1", "device": {"id": "b1"}, "speed": 10},
+            {"id": "a2", "device": {"id": "b2"}, "speed": 20},
+            {"id": "a3", "device": {"id": "b1"}, "speed": 30},
+            {"id": "a4", "speed": 40},
+        ],
+        "LogRecord",
+    )
+
+
+class TestEntityListIndexes:
+    def test_by_id(self):
+        log_records = get_log_records()
+        assert log_records.by_id["a3"]["speed"] == 30
+        assert log_records.by_id is log_records.index_by("id")
+
+    def test_index_by_dotted_path(self):
+        index = get_log_records().index_by("device.id")
+        assert index["b1"]["id"] == "a3"
+        assert index[None]["id"] == "a4"
+
+    def test_group_by(self):
+        groups = get_log_records().group_by("device.id")
+        assert list(groups) == ["b1", "b2", None]
+        assert [entity["id"] for entity in groups["b1"]] == ["a1", "a3"]
+        assert isinstance(groups["b1"], EntityList)
+        assert groups["b1"].type_name == "LogRecord"
+
+    def test_mutation_invalidates_indexes(self):
+        log_records = get_log_records()
+        assert "a5" not in log_records.by_id
+        log_records.append({"id": "a5", "device": {"id": "b2"}})
+        assert "a5" in log_records.by_id
+        assert len(log_records.group_by("device.id")["b2"]) == 2
+        del log_records[0]
+        assert "a1" not in log_records.by_id
+        log_records[0] = {"id": "a9"}
+        assert "a9" in log_records.by_id
+        log_records.pop()
+        assert "a5" not in log_records.by_id
+        log_records.clear()
+        assert log_records.by_id == {}
+
+    def test_copy_has_independent_indexes(self):
+        log_records = get_log_records()
+        assert "a1" in log_records.by_id
+        log_records_copy = copy.copy(log_records)
+        log_records_copy.remove(log_records_copy[0])
+        assert "a1" not in log_records_copy.by_id
+        assert "a1" in log_records.by_id
+
+
+def get_trips():
+    return EntityList(
+        [
+            {"id": "t1", "device": {"id": "b2"}, "start": datetime(2024, 1, 1, 9), "distance": 5.0},
+            {"id": "t2", "device": {"id": "b1"}, "start": datetime(2024, 1, 1, 10), "distance": 2.0},
+            {"id": "t3", "device": {"id": "B1"}, "start": datetime(2024, 1, 1, 8), "distance": 5.0},
+            {"id": "t4", "start": datetime(2024, 1, 1, 7), "distance": None},
+            {"id": "t5", "device": {"id": "b2"}, "start": datetime(2024, 1, 1, 6, tzinfo=timezone.utc), "distance": 1},
+        ],
+        "Trip",
+    )
+
+
+def ids(entitylist):
+    return [entity["id"] for entity in entitylist]
+
+
+class TestEntityListSortBy:
+    def test_multiple_dotted_keys(self):
+        assert ids(get_trips().sort_by(["device.id", "start"])) == ["t3", "t2", "t5", "t1", "t4"]
+
+    def test_multiple_keys_reverse(self):
+        assert ids(get_trips().sort_by(["device.id", "start"], reverse=True)) == ["t1", "t5", "t2", "t3", "t4"]
+
+    def test_missing_values_last(self):
+        assert ids(get_trips().sort_by("distance"))[-1] == "t4"
+        assert ids(get_trips().sort_by("distance", reverse=True))[-1] == "t4"
+
+    def test_stable_numeric_sort(self):
+        trips = get_trips()[:3]
+        assert ids(trips.sort_by("distance")) == ["t2", "t1", "t3"]
+        assert ids(trips.sort_by("distance", reverse=True)) == ["t1", "t3", "t2"]
+
+    def test_mixed_types(self):
+        entitylist = EntityList([{"value": "b"}, {"value": 2}, {"value": datetime(2024, 1, 1)}, {"value": 1}], "Data")
+        assert [entity["value"] for entity in entitylist.sort_by("value")][:3] == [1, 2, "b"]
+
+    def test_sort_without_numpy(self):
+        with patch.dict(sys.modules, {"numpy": None}):
+            assert ids(get_trips()[:3].sort_by("distance", reverse=True)) == ["t1", "t3", "t2"]
@@ -1,10 +1,57 @@
-import requests_mock
+# -*- coding: utf-8 -*-
+
+"""Benchmarks of the hot paths of the library. These are marked with `performance`, so they don't run by default.
+
+Run them, and save the results as a baseline, with::
+
+    py.test -m performance --benchmark-autosave tests/test_api_performance.py
+
+Then compare a change against the latest saved baseline, failing if any mean time regressed by more than 25%::
+
+    py.test -m performance --benchmark-compare --benchmark-compare-fail=mean:25% tests/test_api_performance.py
+"""
+
+import asyncio
+import subprocess
+import sys
+from datetime import datetime, timezone
+
 import pytest
+import requests_mock
+
+from mygeotab import API, api, dates, serializers
+from mygeotab.ext.entitylist import EntityList
+from mygeotab.ext.fake_server import generate_entity
+from mygeotab.parameters import camelcaseify_parameters, convert_get_parameters
+from mygeotab.serializers import json_deserialize, json_serialize, object_deserializer
 
-from mygeotab import api, serializers
+pytestmark = pytest.mark.performance
 
+ENTITY_COUNT = 10000
+FAKE_SERVER_ENTITY_COUNT = ENTITY_COUNT
 
-@pytest.fixture(scope="session")
+
+@pytest.fixture(params=["rapidjson", "json"])
+def json_backend(request, monkeypatch):
+    if request.param == "rapidjson":
+        if not serializers.use_rapidjson:
+            pytest.skip("The 'python-rapidjson' package is not installed")
+    else:
+        monkeypatch.setattr(serializers, "use_rapidjson", False)
+    return request.param
+
+
+@pytest.fixture(scope="module")
+def status_data():
+    return [generate_entity("StatusData", index) for index in range(ENTITY_COUNT)]
+
+
+@pytest.fixture(scope="module")
+def status_data_json(status_data):
+    return json_serialize(dict(result=status_data))
+
+
+@pytest.fixture(scope="module")
 def mock_api():
     username = "mockuser"
     session_id = 1234
@@ -13,28 +60,109 @@ def mock_api():
     yield api.API(username, database=database, session_id=session_id, server="https://example.com")
 
 
-@pytest.mark.skip("Too slow to run automatically")
-class TestApiPerformance:
-    def test_timeout_large_json_rapidjson(self, mock_api, datadir, benchmark):
-        server = "https://example.com/apiv1"
-        json_response = (datadir / "big_nested_date_response.json").read_text()
+@pytest.fixture(scope="module")
+def fake_api(fake_server):
+    client_api = API("user@example.com", password="password", database="fakedb", server=fake_server.url)
+    client_api.authenticate()
+    return client_api
 
-        mock_api.timeout = 0.0001
 
-        with requests_mock.mock() as m:
-            m.post(server, text=json_response)
+@pytest.mark.benchmark(group="serialize")
+class TestSerializationPerformance:
+    def test_json_serialize(self, benchmark, json_backend, status_data):
+        benchmark(json_serialize, status_data)
+
+    def test_json_deserialize(self, benchmark, json_backend, status_data_json):
+        benchmark(json_deserialize, status_data_json)
 
-            benchmark(mock_api.get, "Data")
+    def test_json_deserialize_intern_ids(self, benchmark, json_backend, status_data_json):
+        benchmark(json_deserialize, status_data_json, intern_ids=True)
 
-    def test_timeout_large_json(self, mock_api, datadir, benchmark, monkeypatch):
-        server = "https://example.com/apiv1"
-        json_response = (datadir / "big_nested_date_response.json").read_text()
+    def test_object_deserializer_dates(self, benchmark):
+        obj = dict(dateTime="2024-01-01T00:00:10.000Z", activeFrom="2024-01-01T00:00:00Z", name="Vehicle 1")
+        benchmark(lambda: object_deserializer(dict(obj)))
 
-        mock_api.timeout = 0.0001
 
+@pytest.mark.benchmark(group="parameters")
+class TestParametersPerformance:
+    def test_camelcaseify_parameters(self, benchmark):
+        search = dict(from_date="2024-01-01", device_search=dict(id="b1"))
+        parameters = dict(type_name="StatusData", results_limit=5000, search=search)
+        benchmark(camelcaseify_parameters, parameters)
+
+    def test_convert_get_parameters(self, benchmark):
+        parameters = dict(results_limit=5000, sort=dict(sortBy="id"), fromDate="2024-01-01", deviceSearch=dict(id="b1"))
+        benchmark(convert_get_parameters, parameters)
+
+
+@pytest.mark.benchmark(group="dates")
+class TestDatesPerformance:
+    def test_format_iso_datetime(self, benchmark):
+        benchmark(dates.format_iso_datetime, datetime(2024, 1, 1, 12, 30, 15, 123456, tzinfo=timezone.utc))
+
+    def test_format_naive_iso_datetime(self, benchmark):
+        benchmark(dates.format_iso_datetime, datetime(2024, 1, 1, 12, 30, 15, 123456))
+
+    def test_parse_iso_datetime(self, benchmark):
+        benchmark(dates.parse_iso_datetime, "2024-01-01T12:30:15.123Z")
+
+    def test_format_iso_datetimes(self, benchmark, status_data):
+        benchmark(dates.format_iso_datetimes, [entity["dateTime"] for entity in status_data])
+
+    def test_format_iso_datetimes_numpy(self, benchmark, status_data):
+        numpy = pytest.importorskip("numpy")
+        date_times = [entity["dateTime"].replace(tzinfo=None) for entity in status_data]
+        values = numpy.array(date_times, dtype="datetime64[us]")
+        benchmark(dates.format_iso_datetimes, values)
+
+    def test_parse_iso_datetimes_numpy(self, benchmark, status_data):
+        numpy = pytest.importorskip("numpy")
+        values = numpy.array([dates.format_iso_datetime(entity["dateTime"]) for entity in status_data])
+        benchmark(dates.parse_iso_datetimes, values)
+
+
+@pytest.mark.benchmark(group="entitylist")
+class TestEntityListPerformance:
+    def test_to_dataframe(self, benchmark, status_data):
+        pytest.importorskip("pandas")
+        benchmark(EntityList(status_data, "StatusData").to_dataframe, normalize=True)
+
+    def test_to_dataframe_typed(self, benchmark, status_data):
+        pytest.importorskip("pandas")
+        benchmark(EntityList(status_data, "StatusData").to_dataframe, typed=True)
+
+    def test_sort_by(self, benchmark, status_data):
+        benchmark(EntityList(status_data, "StatusData").sort_by, ["device.id", "dateTime"])
+
+    def test_group_by(self, benchmark, status_data):
+        benchmark(lambda: EntityList(status_data, "StatusData").group_by("device.id"))
+
+
+@pytest.mark.benchmark(group="calls")
+class TestCallPerformance:
+    def test_get_mocked(self, benchmark, mock_api, json_backend, status_data_json):
         with requests_mock.mock() as m:
-            m.post(server, text=json_response)
+            m.post("https://example.com/apiv1", text=status_data_json)
+            benchmark(mock_api.get, "StatusData")
+
+    def test_get(self, benchmark, fake_api):
+        benchmark(fake_api.get, "StatusData", resultsLimit=1000)
+
+    def test_get_async(self, benchmark, fake_api):
+        async def get_concurrently():
+            return await asyncio.gather(*[fake_api.get_async("StatusData", resultsLimit=100) for _ in range(10)])
+
+        benchmark(lambda: asyncio.run(get_concurrently()))
+
+    def test_multi_call(self, benchmark, fake_api):
+        calls = [("Get", dict(typeName="StatusData", resultsLimit=100))] * 10
+        benchmark(fake_api.multi_call, calls)
 
-            monkeypatch.setattr(serializers, "use_rapidjson", False)
 
-            benchmark(mock_api.get, "Data")
+@pytest.mark.benchmark(group="import")
+class TestImportPerformance:
+    @pytest.mark.parametrize("statement", ["import mygeotab", "import mygeotab.cli", "from mygeotab import API"])
+    def test_import(self, benchmark, statement):
+        """Cold start time, including the start of the interpreter."""
+        command = [sys.executable, "-c", statement]
+        benchmark.pedantic(subprocess.run, args=(command,), kwargs=dict(check=True), rounds=5, warmup_rounds=1)
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from mygeotab import API, api
+from mygeotab.ext.bench import WORKLOADS, BenchResult, run_workload
+
+
+FAKE_SERVER_ENTITY_COUNT = 20
+
+
+@pytest.fixture(scope="module")
+def fake_api(fake_server):
+    client_api = API("user@example.com", password="password", database="fakedb", server=fake_server.url)
+    client_api.authenticate()
+    return client_api
+
+
+class TestBenchResult:
+    def test_percentiles(self):
+        result = BenchResult("get", [i / 1000.0 for i in range(100, 0, -1)], 2.0, 0, 4000, 1.0, 0.25)
+        assert result.percentile(50) == 0.05
+        assert result.percentile(99) == 0.099
+        assert result.percentile(100) == 0.1
+        assert result.requests_per_second == 50
+        assert result.bytes_per_second == 2000
+        assert result.transport_time == 0.75
+
+
+class TestRunWorkload:
+    @pytest.mark.parametrize("workload", WORKLOADS)
+    def test_workload(self, fake_api, workload):
+        result = run_workload(fake_api, workload, requests=4, entities=10, batch=2, concurrency=2)
+        assert len(result.latencies) == 4
+        assert result.bytes_received > 0
+        assert result.bytes_sent > 0
+        assert 0 <= result.serialization_time <= result.cpu_time
+
+    def test_removes_hook(self, fake_api):
+        json_deserialize = api.json_deserialize
+        run_workload(fake_api, "get", requests=1, entities=1)
+        assert api.json_deserialize is json_deserialize
+        assert fake_api.hooks == []
+
+    def test_unknown_workload(self, fake_api):
+        with pytest.raises(ValueError):
+            run_workload(fake_api, "upload")
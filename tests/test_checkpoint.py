@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+import pytest
+
+from mygeotab.ext.checkpoint import FileCheckpointStore, MemoryCheckpointStore, SQLiteCheckpointStore
+
+
+@pytest.fixture(params=["memory", "file", "sqlite"])
+def checkpoint_store(request, tmp_path):
+    if request.param == "file":
+        return FileCheckpointStore(str(tmp_path / "checkpoints.json"))
+    if request.param == "sqlite":
+        return SQLiteCheckpointStore(str(tmp_path / "checkpoints.db"))
+    return MemoryCheckpointStore()
+
+
+class TestCheckpointStores:
+    def test_load_missing_key(self, checkpoint_store):
+        assert checkpoint_store.load("LogRecord") is None
+
+    def test_save_and_load(self, checkpoint_store):
+        checkpoint_store.save("LogRecord", "0000000000000001")
+        checkpoint_store.save("StatusData", "00000000000000a2")
+        checkpoint_store.save("LogRecord", "0000000000000003")
+        assert checkpoint_store.load("LogRecord") == "0000000000000003"
+        assert checkpoint_store.load("StatusData") == "00000000000000a2"
+
+
+class TestFileCheckpointStore:
+    def test_persists_across_instances(self, tmp_path):
+        path = str(tmp_path / "checkpoints.json")
+        FileCheckpointStore(path).save("Trip", "0000000000000042")
+        assert FileCheckpointStore(path).load("Trip") == "0000000000000042"
+
+    def test_no_temp_files_left_behind(self, tmp_path):
+        store = FileCheckpointStore(str(tmp_path / "checkpoints.json"))
+        store.save("Trip", "0000000000000042")
+        assert os.listdir(str(tmp_path)) == ["checkpoints.json"]
+
+
+class TestSQLiteCheckpointStore:
+    def test_persists_across_instances(self, tmp_path):
+        path = str(tmp_path / "checkpoints.db")
+        SQLiteCheckpointStore(path, table="feeds").save("Trip", "0000000000000042")
+        assert SQLiteCheckpointStore(path, table="feeds").load("Trip") == "0000000000000042"
+
+    def test_invalid_table_name(self, tmp_path):
+        with pytest.raises(ValueError):
+            SQLiteCheckpointStore(str(tmp_path / "checkpoints.db"), table="feeds; DROP TABLE feeds")
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+
+import json
+from datetime import datetime, timezone
+from unittest.mock import MagicMock
+
+import pytest
+from click.testing import CliRunner
+
+from mygeotab import cli
+
+
+@pytest.fixture
+def client_api(monkeypatch):
+    client_api = MagicMock()
+    monkeypatch.setattr(cli, "_get_api", lambda *args: client_api)
+    monkeypatch.setattr(cli.Session, "load", lambda self, name=None: None)
+    return client_api
+
+
+def feed_batches(count):
+    """Returns a GetFeed side effect with `count` batches of two records, and then stops the feed like Ctrl+C."""
+    batches = iter(range(1, count + 1))
+
+    def get_feed(method, **parameters):
+        batch = next(batches, None)
+        if batch is None:
+            raise KeyboardInterrupt
+        record_time = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        data = [dict(id="a{}{}".format(batch, i), dateTime=record_time) for i in range(2)]
+        return dict(toVersion="{:016x}".format(batch), data=data)
+
+    return get_feed
+
+
+class TestFeedCommand:
+    def test_writes_batches_and_checkpoint(self, client_api, tmp_path):
+        client_api.call.side_effect = feed_batches(3)
+        output = str(tmp_path / "logs.ndjson")
+        result = CliRunner().invoke(cli.main, ["feed", "LogRecord", "-o", output, "--results-limit", "2"])
+        assert result.exit_code == 0
+        with open(output) as ndjson_file:
+            ids = [json.loads(line)["id"] for line in ndjson_file]
+        assert ids == ["a10", "a11", "a20", "a21", "a30", "a31"]
+        with open(output + ".checkpoint") as checkpoint_file:
+            assert json.load(checkpoint_file) == {"LogRecord": "0000000000000003"}
+        assert "LogRecord: 6 records" in result.output
+
+    def test_resumes_from_checkpoint(self, client_api, tmp_path):
+        output = str(tmp_path / "logs.ndjson")
+        with open(output + ".checkpoint", "w") as checkpoint_file:
+            json.dump({"LogRecord": "0000000000000007"}, checkpoint_file)
+        client_api.call.side_effect = feed_batches(1)
+        CliRunner().invoke(cli.main, ["feed", "LogRecord", "-o", output, "--results-limit", "2", "--quiet"])
+        assert client_api.call.call_args_list[0][1]["from_version"] == "0000000000000007"
+
+
+class TestExportCommand:
+    def test_export(self, client_api, tmp_path):
+        client_api.call.return_value = [dict(id="b1", name="Truck"), dict(id="b2", name="Van")]
+        output = str(tmp_path / "devices.csv")
+        result = CliRunner().invoke(cli.main, ["export", "Device", output, "--search", '{"name": "%"}'])
+        assert result.exit_code == 0
+        assert "Exported 2 entities" in result.output
+        assert client_api.call.call_args[1]["search"] == {"name": "%"}
+
+    def test_invalid_search(self, client_api, tmp_path):
+        result = CliRunner().invoke(cli.main, ["export", "Device", str(tmp_path / "devices.csv"), "--search", "[1]"])
+        assert result.exit_code != 0
+        assert "must be a JSON object" in result.output
+
+
+class TestBenchCommand:
+    def test_notes_sync_session_setup(self, monkeypatch):
+        monkeypatch.setattr(cli.Session, "load", lambda self, name=None: None)
+        result = CliRunner().invoke(cli.main, ["bench", "get", "async", "--requests", "2", "--entities", "5"])
+        assert result.exit_code == 0
+        assert result.output.startswith("get ")
+        assert "new HTTP session" in result.output
+
+    def test_json_output(self, monkeypatch):
+        monkeypatch.setattr(cli.Session, "load", lambda self, name=None: None)
+        result = CliRunner().invoke(cli.main, ["bench", "async", "--requests", "2", "--entities", "5", "--json"])
+        assert result.exit_code == 0
+        assert [workload["workload"] for workload in json.loads(result.output)] == ["async"]
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+
+from datetime import datetime, timezone, tzinfo
+from unittest.mock import patch
+
+import pytest
+
+from mygeotab.ext.columnar import API as ColumnarAPI
+from mygeotab.ext.columnar import ColumnarEntityList
+
+
+def get_log_records():
+    return [
+        {
+            "id": "a1",
+            "dateTime": datetime(2024, 1, 1, 12, 0, 0, 500000, tzinfo=timezone.utc),
+            "device": {"id": "b1"},
+            "latitude": 43.45,
+            "speed": 10,
+        },
+        {
+            "id": "a2",
+            "dateTime": datetime(2024, 1, 1, 12, 0, 30),
+            "device": {"id": "b2"},
+            "latitude": 43.46,
+            "speed": 12.5,
+            "isValid": True,
+        },
+        {"id": "a3", "device": {"id": "b1"}, "latitude": None, "speed": 0, "tags": ["x"]},
+    ]
+
+
+@pytest.fixture
+def columnar():
+    return ColumnarEntityList.from_entities(iter(get_log_records()), "LogRecord")
+
+
+class TestColumnarEntityList:
+    def test_columns_are_flattened(self, columnar):
+        assert len(columnar) == 3
+        assert columnar.type_name == "LogRecord"
+        assert columnar.columns == ["id", "dateTime", "device.id", "latitude", "speed", "isValid", "tags"]
+
+    def test_column_kinds(self, columnar):
+        columns = columnar._columns
+        assert columns["id"].kind == "string"
+        assert columns["dateTime"].kind == "datetime"
+        assert columns["speed"].kind == "float"
+        assert columns["isValid"].kind == "bool"
+        assert columns["tags"].kind == "object"
+
+    def test_repeated_strings_are_stored_once(self, columnar):
+        assert columnar._columns["device.id"].categories == ["b1", "b2"]
+
+    def test_column_values(self, columnar):
+        assert columnar.column("speed") == [10.0, 12.5, 0.0]
+        assert columnar.column("latitude") == [43.45, 43.46, None]
+        assert columnar.column("dateTime") == [
+            datetime(2024, 1, 1, 12, 0, 0, 500000, tzinfo=timezone.utc),
+            datetime(2024, 1, 1, 12, 0, 30, tzinfo=timezone.utc),
+            None,
+        ]
+
+    def test_row_views(self, columnar):
+        row = columnar[-1]
+        assert row["id"] == "a3"
+        assert row["device"] == {"id": "b1"}
+        assert row["device.id"] == "b1"
+        assert row.get("latitude") is None
+        assert row.to_dict() == {"id": "a3", "device": {"id": "b1"}, "speed": 0.0, "tags": ["x"]}
+        assert [row["id"] for row in columnar] == ["a1", "a2", "a3"]
+        with pytest.raises(IndexError):
+            columnar[3]
+
+    def test_mixed_values_fall_back_to_objects(self):
+        columnar = ColumnarEntityList.from_entities([{"value": 1}, {"value": "one"}], "Data")
+        assert columnar.column("value") == [1, "one"]
+
+    def test_to_dataframe(self, columnar):
+        pandas = pytest.importorskip("pandas")
+        dataframe = columnar.to_dataframe()
+        assert str(dataframe["dateTime"].dtype) == "datetime64[us, UTC]"
+        assert isinstance(dataframe["device.id"].dtype, pandas.CategoricalDtype)
+        assert dataframe["speed"].tolist() == [10.0, 12.5, 0.0]
+        assert dataframe["latitude"].isna().tolist() == [False, False, True]
+        assert pandas.isna(dataframe["dateTime"][2])
+
+    def test_to_arrow(self, columnar):
+        pyarrow = pytest.importorskip("pyarrow")
+        table = columnar.to_arrow()
+        assert table.schema.field("dateTime").type == pyarrow.timestamp("us", tz="UTC")
+        assert pyarrow.types.is_dictionary(table.schema.field("device.id").type)
+        assert table.column("latitude").null_count == 1
+        assert table.column("device.id").to_pylist() == ["b1", "b2", "b1"]
+
+    def test_to_arrow_mixed_values(self):
+        pyarrow = pytest.importorskip("pyarrow")
+        columnar = ColumnarEntityList.from_entities(
+            [{"value": 1}, {"value": "one"}, {"value": [1, 2]}, {"value": None}, {"id": "a5"}], "Data"
+        )
+        table = columnar.to_arrow()
+        assert table.schema.field("value").type == pyarrow.string()
+        assert table.column("value").to_pylist() == ["1", "one", "[1,2]", None, None]
+
+    def test_append_after_to_dataframe(self, columnar):
+        pytest.importorskip("pandas")
+        pytest.importorskip("pyarrow")
+        dataframe = columnar.to_dataframe()
+        table = columnar.to_arrow()
+        columnar.append({"id": "a4", "dateTime": datetime(2024, 1, 2), "speed": 5, "latitude": 43.47})
+        assert len(dataframe) == 3
+        assert table.num_rows == 3
+        assert columnar.to_arrow().column("id").to_pylist() == ["a1", "a2", "a3", "a4"]
+        assert columnar.to_dataframe()["speed"].tolist() == [10.0, 12.5, 0.0, 5.0]
+
+    def test_failed_append_changes_nothing(self, columnar):
+        class BrokenZone(tzinfo):
+            def utcoffset(self, dt):
+                raise ValueError("Broken time zone")
+
+        with pytest.raises(ValueError):
+            columnar.append({"id": "a4", "odometer": 100, "dateTime": datetime(2024, 1, 2, tzinfo=BrokenZone())})
+        assert len(columnar) == 3
+        assert "odometer" not in columnar.columns
+        assert all(len(column) == 3 for column in columnar._columns.values())
+        assert columnar.column("id") == ["a1", "a2", "a3"]
+
+    def test_large_integers_are_objects(self):
+        columnar = ColumnarEntityList.from_entities([{"value": 1}, {"value": 2**64}], "Data")
+        assert columnar._columns["value"].kind == "object"
+        assert columnar.column("value") == [1, 2**64]
+
+    def test_columnar_api_get(self):
+        with patch("mygeotab.api._query", return_value=get_log_records()):
+            columnar_api = ColumnarAPI("test@example.com", session_id="sid123", database="db")
+            result = columnar_api.get("LogRecord")
+        assert isinstance(result, ColumnarEntityList)
+        assert result.column("id") == ["a1", "a2", "a3"]
+
+
+def test_to_parquet(columnar, tmp_path):
+    pytest.importorskip("pyarrow")
+    import pyarrow.parquet
+
+    path = str(tmp_path / "logs.parquet")
+    columnar.to_parquet(path)
+    assert pyarrow.parquet.read_table(path).column("device.id").to_pylist() == ["b1", "b2", "b1"]
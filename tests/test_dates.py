@@ -1,7 +1,10 @@
 # -*- coding: utf-8 -*-
 
-from datetime import datetime
+import warnings
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
 
+import pytest
 import pytz
 
 from mygeotab import dates
@@ -64,6 +67,26 @@ class TestGetUtcDate:
         assert aus_date.day == check_date.day
         assert aus_date.hour == check_date.hour
 
+    def test_naive_datetime_to_default_utc(self):
+        date = datetime(2015, 3, 12, 2, 45, 34)
+        utc_date = dates.localize_datetime(date)
+        assert utc_date.tzinfo is timezone.utc
+        assert utc_date.replace(tzinfo=None) == date
+
+    def test_naive_datetime_to_zoneinfo(self):
+        date = datetime(2015, 7, 12, 2, 45, 34)
+        zoned_date = dates.localize_datetime(date, ZoneInfo("America/Toronto"))
+        assert zoned_date.tzinfo == ZoneInfo("America/Toronto")
+        assert zoned_date.utcoffset().total_seconds() == -4 * 3600
+        assert zoned_date.replace(tzinfo=None) == date
+
+    def test_utc_datetime_to_timezone_name(self):
+        date = datetime(2015, 1, 12, 2, 45, 34, tzinfo=timezone.utc)
+        zoned_date = dates.localize_datetime(date, "America/Toronto")
+        assert zoned_date == date
+        assert zoned_date.hour == 21
+        assert zoned_date.day == 11
+
 
 class TestFormatIsoDate:
     def test_format_naive_datetime(self):
@@ -120,3 +143,161 @@ class TestFormatIsoDate:
         check_fmt = "9999-12-31T23:59:59.999Z"
         fmt_date = dates.format_iso_datetime(date)
         assert fmt_date == check_fmt
+
+    def test_format_zoneinfo_datetime(self):
+        date = datetime(2015, 7, 12, 2, 45, 34, 987000, tzinfo=ZoneInfo("America/Toronto"))
+        check_fmt = "2015-07-12T06:45:34.987Z"
+        fmt_date = dates.format_iso_datetime(date)
+        assert fmt_date == check_fmt
+
+    def test_format_truncates_microseconds(self):
+        date = datetime(2015, 3, 12, 2, 45, 34, 987999, tzinfo=timezone.utc)
+        check_fmt = "2015-03-12T02:45:34.987Z"
+        fmt_date = dates.format_iso_datetime(date)
+        assert fmt_date == check_fmt
+
+    def test_format_far_future_date_zoneinfo_invalid(self):
+        date = datetime(9999, 12, 31, 23, 59, 58, 987000, tzinfo=ZoneInfo("America/Toronto"))
+        check_fmt = "9999-12-31T23:59:59.999Z"
+        fmt_date = dates.format_iso_datetime(date)
+        assert fmt_date == check_fmt
+
+
+class TestParseIsoDate:
+    def test_parse_utc_datetime(self):
+        date = dates.parse_iso_datetime("2015-03-12T02:45:34.987Z")
+        assert date == datetime(2015, 3, 12, 2, 45, 34, 987000, tzinfo=timezone.utc)
+        assert date.tzinfo is timezone.utc
+
+    def test_parse_without_fraction(self):
+        date = dates.parse_iso_datetime("2015-03-12T02:45:34Z")
+        assert date == datetime(2015, 3, 12, 2, 45, 34, tzinfo=timezone.utc)
+
+    def test_parse_naive_datetime_as_utc(self):
+        date = dates.parse_iso_datetime("2015-03-12T02:45:34")
+        assert date == datetime(2015, 3, 12, 2, 45, 34, tzinfo=timezone.utc)
+
+    def test_parse_offset_datetime(self):
+        date = dates.parse_iso_datetime("2015-03-12T02:45:34-04:00")
+        assert date == datetime(2015, 3, 12, 6, 45, 34, tzinfo=timezone.utc)
+        assert date.tzinfo is timezone.utc
+
+    def test_parse_rounds_long_fraction(self):
+        date = dates.parse_iso_datetime("2015-03-12T02:45:34.1234567Z")
+        assert date == datetime(2015, 3, 12, 2, 45, 34, 123457, tzinfo=timezone.utc)
+
+    def test_parse_into_timezone(self):
+        date = dates.parse_iso_datetime("2015-01-12T02:45:34.000Z", "America/Toronto")
+        assert date.tzinfo == ZoneInfo("America/Toronto")
+        assert date.hour == 21
+
+    def test_parse_min_date_in_timezone(self):
+        date = dates.parse_iso_datetime("0001-01-01T00:00:00.000Z", "America/Toronto")
+        assert date == dates.MIN_DATE
+
+    def test_parse_invalid(self):
+        with pytest.raises(ValueError):
+            dates.parse_iso_datetime("2015-13-12T02:45:34.000Z")
+
+
+class TestIsoDates:
+    def test_format_sequence(self):
+        values = [
+            datetime(2015, 3, 12, 2, 45, 34, 987654),
+            None,
+            datetime(2015, 7, 12, 2, 45, 34, tzinfo=ZoneInfo("America/Toronto")),
+        ]
+        assert dates.format_iso_datetimes(values) == ["2015-03-12T02:45:34.987Z", None, "2015-07-12T06:45:34.000Z"]
+
+    def test_parse_sequence(self):
+        values = ["2015-03-12T02:45:34.987Z", None]
+        parsed = dates.parse_iso_datetimes(values, "America/Toronto")
+        assert parsed == [datetime(2015, 3, 12, 2, 45, 34, 987000, tzinfo=timezone.utc), None]
+        assert parsed[0].tzinfo == ZoneInfo("America/Toronto")
+
+    def test_numpy(self):
+        numpy = pytest.importorskip("numpy")
+        values = numpy.array(
+            ["2015-03-12T02:45:34.987654", "NaT", "0000-01-01T00:00:00", "9999-12-31T23:59:59.999999"],
+            dtype="datetime64[us]",
+        )
+        formatted = dates.format_iso_datetimes(values)
+        assert formatted.tolist() == [
+            "2015-03-12T02:45:34.987Z",
+            None,
+            "0001-01-01T00:00:00.000Z",
+            "9999-12-31T23:59:59.999Z",
+        ]
+        parsed = dates.parse_iso_datetimes(numpy.array(["2015-03-12T02:45:34.987Z", "2015-03-12T02:45:34Z"]))
+        assert parsed.dtype == numpy.dtype("datetime64[us]")
+        assert parsed.tolist() == [datetime(2015, 3, 12, 2, 45, 34, 987000), datetime(2015, 3, 12, 2, 45, 34)]
+
+    def test_numpy_parse_offsets(self):
+        numpy = pytest.importorskip("numpy")
+        parsed = dates.parse_iso_datetimes(numpy.array(["2015-03-12T02:45:34-04:00", None], dtype=object))
+        assert parsed.dtype == numpy.dtype("datetime64[us]")
+        assert parsed[0] == numpy.datetime64("2015-03-12T06:45:34")
+        assert numpy.isnat(parsed[1])
+
+    def test_pandas(self):
+        pandas = pytest.importorskip("pandas")
+        values = pandas.Series(
+            [datetime(2015, 7, 12, 2, 45, 34, 987654, tzinfo=ZoneInfo("America/Toronto")), None],
+            index=["a", "b"],
+            name="dateTime",
+        )
+        formatted = dates.format_iso_datetimes(values)
+        assert formatted.tolist() == ["2015-07-12T06:45:34.987Z", None]
+        assert formatted.index.tolist() == ["a", "b"]
+        assert formatted.name == "dateTime"
+        parsed = dates.parse_iso_datetimes(formatted, "America/Toronto")
+        assert parsed["a"] == datetime(2015, 7, 12, 6, 45, 34, 987000, tzinfo=timezone.utc)
+        assert str(parsed.dt.tz) == "America/Toronto"
+        assert pandas.isna(parsed["b"])
+
+    def test_pandas_index(self):
+        pandas = pytest.importorskip("pandas")
+        values = pandas.DatetimeIndex(["2015-03-12T02:45:34.987"], name="dateTime")
+        formatted = dates.format_iso_datetimes(values)
+        assert isinstance(formatted, pandas.Index)
+        assert formatted.tolist() == ["2015-03-12T02:45:34.987Z"]
+        assert dates.parse_iso_datetimes(formatted).equals(values.tz_localize("UTC"))
+
+    def test_format_missing_values(self):
+        numpy = pytest.importorskip("numpy")
+        pandas = pytest.importorskip("pandas")
+        date = datetime(2015, 3, 12, 2, 45, 34, 987000)
+        missing = [None, pandas.NaT, numpy.datetime64("NaT", "us"), float("nan")]
+        expected = ["2015-03-12T02:45:34.987Z", None, None, None, None]
+        assert dates.format_iso_datetimes([date] + missing) == expected
+        assert dates.format_iso_datetimes(numpy.array([date] + missing, dtype=object)).tolist() == expected
+        assert dates.format_iso_datetimes(pandas.Series([date] + missing, dtype=object)).tolist() == expected
+        assert dates.format_iso_datetimes(pandas.Series([date, pandas.NaT])).tolist() == expected[:2]
+        assert dates.format_iso_datetimes(pandas.DatetimeIndex([date, pandas.NaT])).tolist() == expected[:2]
+        assert dates.format_iso_datetimes(numpy.array([date, "NaT"], dtype="datetime64[ms]")).tolist() == expected[:2]
+
+    def test_format_numpy_scalars(self):
+        numpy = pytest.importorskip("numpy")
+        values = numpy.array([numpy.datetime64("2015-03-12T02:45:34.9876"), numpy.datetime64("NaT", "s")], dtype=object)
+        assert dates.format_iso_datetimes(values).tolist() == ["2015-03-12T02:45:34.987Z", None]
+
+    def test_parse_missing_values(self):
+        numpy = pytest.importorskip("numpy")
+        pandas = pytest.importorskip("pandas")
+        values = ["2015-03-12T02:45:34.987Z", None, pandas.NaT, float("nan")]
+        parsed = dates.parse_iso_datetimes(values)
+        assert parsed == [datetime(2015, 3, 12, 2, 45, 34, 987000, tzinfo=timezone.utc), None, None, None]
+        parsed = dates.parse_iso_datetimes(numpy.array(values, dtype=object))
+        assert parsed[0] == numpy.datetime64("2015-03-12T02:45:34.987")
+        assert numpy.isnat(parsed[1:]).all()
+        assert dates.parse_iso_datetimes(pandas.Series(values)).isna().tolist() == [False, True, True, True]
+
+    def test_numpy_parse_matches_scalar(self):
+        numpy = pytest.importorskip("numpy")
+        values = ["2015-03-12T02:45:34.1234567Z", "2015-03-12T02:45:34-04:00", "2015-03-12T02:45:34.5+01:00"]
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            parsed = dates.parse_iso_datetimes(numpy.array(values))
+        expected = [numpy.datetime64(dates.parse_iso_datetime(value).replace(tzinfo=None), "us") for value in values]
+        assert parsed.tolist() == [value.item() for value in expected]
+        assert parsed[0] == numpy.datetime64("2015-03-12T02:45:34.123457")
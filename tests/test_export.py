@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+
+import csv
+import json
+from datetime import datetime, timezone
+from unittest.mock import MagicMock
+
+import pytest
+
+from mygeotab.ext.checkpoint import MemoryCheckpointStore
+from mygeotab.ext.export import CSVSink, NDJSONSink, ParquetSink, export_entities, iter_pages, open_sink
+
+
+def paged_api(count):
+    """Creates a client API that pages through `count` trips sorted by id, like the server."""
+    trips = [
+        dict(
+            id="b{:04d}".format(i),
+            device=dict(id="b{}".format(i % 3)),
+            start=datetime(2024, 1, 1, 0, i % 60, tzinfo=timezone.utc),
+            distance=float(i),
+        )
+        for i in range(count)
+    ]
+
+    def get(method, typeName, search, resultsLimit, sort):
+        last_id = sort.get("lastId")
+        remaining = [trip for trip in trips if last_id is None or trip["id"] > last_id]
+        return remaining[:resultsLimit]
+
+    client_api = MagicMock()
+    client_api.call.side_effect = get
+    return client_api
+
+
+class TestIterPages:
+    def test_pages_by_id(self):
+        client_api = paged_api(5)
+        pages = list(iter_pages(client_api, "Trip", page_size=2))
+        assert [len(page) for page in pages] == [2, 2, 1]
+        sort = client_api.call.call_args_list[1][1]["sort"]
+        assert sort == dict(sortBy="id", sortDirection="asc", offset="b0001", lastId="b0001")
+
+    def test_stops_after_full_last_page(self):
+        client_api = paged_api(4)
+        pages = list(iter_pages(client_api, "Trip", page_size=2))
+        assert [len(page) for page in pages] == [2, 2]
+        assert client_api.call.call_count == 3
+
+
+class TestSinks:
+    def test_ndjson(self, tmp_path):
+        path = str(tmp_path / "trips.ndjson")
+        count = export_entities(paged_api(5), "Trip", NDJSONSink(path), page_size=2)
+        assert count == 5
+        with open(path) as ndjson_file:
+            lines = [json.loads(line) for line in ndjson_file]
+        assert [line["id"] for line in lines] == ["b0000", "b0001", "b0002", "b0003", "b0004"]
+        assert lines[1]["start"] == "2024-01-01T00:01:00.000Z"
+
+    def test_csv_flattens_columns(self, tmp_path):
+        path = str(tmp_path / "trips.csv")
+        export_entities(paged_api(3), "Trip", CSVSink(path), page_size=2)
+        with open(path, newline="") as csv_file:
+            rows = list(csv.DictReader(csv_file))
+        assert list(rows[0]) == ["id", "device.id", "start", "distance"]
+        assert rows[2]["device.id"] == "b2"
+        assert rows[0]["start"] == "2024-01-01T00:00:00.000Z"
+
+    def test_parquet(self, tmp_path):
+        pyarrow_parquet = pytest.importorskip("pyarrow.parquet")
+        path = str(tmp_path / "trips.parquet")
+        sink = ParquetSink(path, row_group_size=2)
+        export_entities(paged_api(5), "Trip", sink, page_size=2)
+        parquet_file = pyarrow_parquet.ParquetFile(path)
+        assert parquet_file.metadata.num_rows == 5
+        assert parquet_file.metadata.num_row_groups == 3
+        assert parquet_file.schema_arrow.field("device").type.num_fields == 1
+
+    def test_parquet_rows_per_file(self, tmp_path):
+        pyarrow_parquet = pytest.importorskip("pyarrow.parquet")
+        path = str(tmp_path / "trips.parquet")
+        sink = ParquetSink(path, rows_per_file=2)
+        checkpoint_store = MemoryCheckpointStore()
+        export_entities(paged_api(5), "Trip", sink, page_size=2, checkpoint_store=checkpoint_store)
+        assert sink.paths == [path, str(tmp_path / "trips.1.parquet"), str(tmp_path / "trips.2.parquet")]
+        assert sum(pyarrow_parquet.read_metadata(part).num_rows for part in sink.paths) == 5
+
+    def test_csv_warns_of_left_out_columns(self, tmp_path, caplog):
+        path = str(tmp_path / "trips.csv")
+        with CSVSink(path) as sink:
+            sink.write([dict(id="b1", distance=1.0)])
+            sink.write([dict(id="b2", distance=2.0, driver=dict(id="b12"))])
+            sink.write([dict(id="b3", driver=dict(id="b13"))])
+        with open(path, newline="") as csv_file:
+            rows = list(csv.DictReader(csv_file))
+        assert list(rows[1]) == ["id", "distance"]
+        assert [record.getMessage() for record in caplog.records] == [
+            "Columns left out of {}, as they are not in its header: driver.id".format(path)
+        ]
+
+    def test_parquet_null_first_row_group(self, tmp_path):
+        pyarrow_parquet = pytest.importorskip("pyarrow.parquet")
+        path = str(tmp_path / "trips.parquet")
+        with ParquetSink(path, row_group_size=2, rows_per_file=4) as sink:
+            sink.write([dict(id="b1", driver=None), dict(id="b2", driver=None)])
+            sink.write([dict(id="b3", driver="UnknownDriverId", engineHours=5.0), dict(id="b4", driver=dict(id="b12"))])
+            sink.write([dict(id="b5")])
+        table = pyarrow_parquet.read_table(path)
+        assert table.column("driver").to_pylist() == [None, None, {"id": "UnknownDriverId"}, {"id": "b12"}]
+        assert table.column("engineHours").to_pylist() == [None, None, 5.0, None]
+        assert pyarrow_parquet.read_schema(sink.paths[1]).names == ["id", "driver", "engineHours"]
+
+    def test_open_sink_by_extension(self, tmp_path):
+        with open_sink(str(tmp_path / "trips.jsonl")) as sink:
+            assert isinstance(sink, NDJSONSink)
+        with open_sink(str(tmp_path / "trips.txt"), format="csv") as sink:
+            assert isinstance(sink, CSVSink)
+        with pytest.raises(ValueError):
+            open_sink(str(tmp_path / "trips.xlsx"))
+
+
+class FailingSink(NDJSONSink):
+    def __init__(self, path, fail_after, append=False):
+        super().__init__(path, append=append)
+        self.fail_after = fail_after
+        self.written = 0
+
+    def write(self, entities):
+        if self.written >= self.fail_after:
+            raise IOError("Disk full")
+        super().write(entities)
+        self.written += len(entities)
+
+
+class TestResume:
+    def test_resumes_after_checkpoint(self, tmp_path):
+        path = str(tmp_path / "trips.ndjson")
+        checkpoint_store = MemoryCheckpointStore()
+        with pytest.raises(IOError):
+            export_entities(paged_api(7), "Trip", FailingSink(path, 4), page_size=2, checkpoint_store=checkpoint_store)
+        assert checkpoint_store.load("export:Trip") == "b0003"
+        count = export_entities(
+            paged_api(7), "Trip", NDJSONSink(path, append=True), page_size=2, checkpoint_store=checkpoint_store
+        )
+        assert count == 3
+        with open(path) as ndjson_file:
+            ids = [json.loads(line)["id"] for line in ndjson_file]
+        assert ids == ["b{:04d}".format(i) for i in range(7)]
+        assert checkpoint_store.load("export:Trip") == "b0006"
+
+    def test_csv_append_keeps_header(self, tmp_path):
+        path = str(tmp_path / "trips.csv")
+        checkpoint_store = MemoryCheckpointStore()
+        export_entities(paged_api(2), "Trip", CSVSink(path), page_size=2, checkpoint_store=checkpoint_store)
+        export_entities(
+            paged_api(4), "Trip", CSVSink(path, append=True), page_size=2, checkpoint_store=checkpoint_store
+        )
+        with open(path, newline="") as csv_file:
+            rows = list(csv.DictReader(csv_file))
+        assert [row["id"] for row in rows] == ["b0000", "b0001", "b0002", "b0003"]
+
+    def test_parquet_append_writes_next_file(self, tmp_path):
+        pyarrow_parquet = pytest.importorskip("pyarrow.parquet")
+        path = str(tmp_path / "trips.parquet")
+        checkpoint_store = MemoryCheckpointStore()
+        export_entities(paged_api(2), "Trip", ParquetSink(path), page_size=2, checkpoint_store=checkpoint_store)
+        sink = ParquetSink(path, append=True)
+        export_entities(paged_api(5), "Trip", sink, page_size=2, checkpoint_store=checkpoint_store)
+        assert sink.paths == [str(tmp_path / "trips.1.parquet")]
+        assert pyarrow_parquet.read_metadata(sink.paths[0]).num_rows == 3
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+
+import time
+
+import pytest
+
+from mygeotab import API, AuthenticationException, MyGeotabException, server_call
+from mygeotab.ext import fake_server as fake_server_module
+from mygeotab.ext.fake_server import FakeServer
+
+
+@pytest.fixture
+def fake_api(fake_server):
+    client_api = API("user@example.com", password="password", database="fakedb", server=fake_server.url)
+    client_api.authenticate()
+    return client_api
+
+
+class TestFakeServer:
+    def test_authenticate(self, fake_api, fake_server):
+        assert fake_api.credentials.session_id.startswith("fake-session")
+        assert fake_api.credentials.server == fake_server.url
+
+    def test_get(self, fake_api):
+        devices = fake_api.get("Device", resultsLimit=10)
+        assert len(devices) == 10
+        assert devices[0]["id"] == "b00000001"
+        assert fake_api.get("Device", id="b00000003")[0]["name"] == "Vehicle 3"
+
+    def test_get_version_without_session(self, fake_server):
+        assert server_call("GetVersion", fake_server.url) == "0.0.0"
+        with pytest.raises(MyGeotabException) as excinfo:
+            server_call("Get", fake_server.url, typeName="Device")
+        assert excinfo.value.name == "InvalidUserException"
+
+    def test_get_sorted_by_id(self, fake_api):
+        sort = dict(sortBy="id", sortDirection="asc", offset="b00000014", lastId="b00000014")
+        devices = fake_api.get("Device", sort=sort)
+        assert [device["id"] for device in devices] == ["b00000015", "b00000016", "b00000017", "b00000018", "b00000019"]
+
+    def test_get_feed(self, fake_api):
+        result = fake_api.call("GetFeed", type_name="LogRecord", from_version="0000000000000014", results_limit=10)
+        assert len(result["data"]) == 5
+        assert result["toVersion"] == "0000000000000019"
+
+    def test_multi_call(self, fake_api):
+        version, devices = fake_api.multi_call([("GetVersion",), ("Get", dict(typeName="Device", resultsLimit=2))])
+        assert version == "0.0.0"
+        assert len(devices) == 2
+
+    @pytest.mark.asyncio
+    async def test_get_async(self, fake_api):
+        records = await fake_api.get_async("LogRecord", resultsLimit=3)
+        assert len(records) == 3
+
+    def test_unknown_method(self, fake_api):
+        with pytest.raises(MyGeotabException) as excinfo:
+            fake_api.call("DoSomething")
+        assert excinfo.value.name == "MissingMethodException"
+
+    def test_get_count_of(self, fake_api):
+        assert fake_api.call("GetCountOf", type_name="LogRecord", search=dict(deviceSearch=dict(id="b3"))) == 1
+
+    def test_get_by_date(self, fake_api):
+        search = dict(fromDate="2024-01-01T00:00:10Z", toDate="2024-01-01T00:00:12Z")
+        records = fake_api.get("LogRecord", search=search)
+        assert [record["id"] for record in records] == ["b0000000B", "b0000000C", "b0000000D"]
+
+
+class TestFakeServerChanges:
+    def test_add_set_remove(self, fake_api, fake_server):
+        device_id = fake_api.add("Device", dict(name="New truck", serialNumber="G9000000999"))
+        assert fake_api.get("Device", id=device_id)[0]["name"] == "New truck"
+        fake_api.set("Device", dict(id=device_id, name="Renamed truck"))
+        device = fake_api.get("Device", id=device_id)[0]
+        assert device["name"] == "Renamed truck"
+        assert device["serialNumber"] == "G9000000999"
+        fake_api.remove("Device", dict(id=device_id))
+        assert fake_api.get("Device", id=device_id) == []
+
+    def test_changes_in_feed(self, fake_api, fake_server):
+        end = fake_api.call("GetFeed", type_name="Zone", results_limit=50000)["toVersion"]
+        zone_id = fake_api.add("Zone", dict(name="Depot"))
+        fake_api.set("Zone", dict(id=zone_id, name="Main depot"))
+        result = fake_api.call("GetFeed", type_name="Zone", from_version=end)
+        assert [zone["name"] for zone in result["data"]] == ["Depot", "Main depot"]
+
+    def test_set_missing_entity(self, fake_api):
+        with pytest.raises(MyGeotabException) as excinfo:
+            fake_api.set("Device", dict(id="bFFFFFFFF", name="Missing"))
+        assert excinfo.value.name == "InvalidOperationException"
+
+
+class TestFakeServerFaults:
+    def test_users(self):
+        with FakeServer(entity_count=1, users={"user@example.com": "password"}) as server:
+            client_api = API("user@example.com", password="wrong", database="fakedb", server=server.url)
+            with pytest.raises(AuthenticationException):
+                client_api.authenticate()
+
+    def test_expired_session(self, fake_api, fake_server):
+        fake_server.expire_sessions()
+        with pytest.raises(AuthenticationException):
+            fake_api.get("Device", resultsLimit=1)
+
+    def test_extend_session(self, fake_api, fake_server):
+        credentials = fake_api.credentials
+        client_api = API(credentials.username, session_id=credentials.session_id, server=fake_server.url)
+        assert client_api.authenticate() is client_api.credentials
+        fake_server.expire_sessions()
+        with pytest.raises(AuthenticationException):
+            client_api.authenticate()
+
+    def test_fail_next(self, fake_api, fake_server):
+        fake_server.fail_next("DbUnavailableException", count=2)
+        for _ in range(2):
+            with pytest.raises(MyGeotabException) as excinfo:
+                fake_api.call("GetVersion")
+            assert excinfo.value.name == "DbUnavailableException"
+        assert fake_api.call("GetVersion") == "0.0.0"
+
+    def test_error_rate(self):
+        with FakeServer(entity_count=1, error_rate=0.5, seed=1) as server:
+            client_api = API("user@example.com", password="password", database="fakedb", server=server.url)
+            client_api.authenticate()
+            failures = 0
+            for _ in range(20):
+                try:
+                    client_api.call("GetVersion")
+                except MyGeotabException:
+                    failures += 1
+            assert 0 < failures < 20
+
+    def test_rate_limit(self):
+        with FakeServer(entity_count=1, rate_limit=(3, 60)) as server:
+            client_api = API("user@example.com", password="password", database="fakedb", server=server.url)
+            client_api.authenticate()
+            for _ in range(3):
+                client_api.call("GetVersion")
+            with pytest.raises(MyGeotabException) as excinfo:
+                client_api.call("GetVersion")
+            assert excinfo.value.name == "OverLimitException"
+
+    def test_start_raises_when_not_serving(self, monkeypatch):
+        async def fail(site):
+            raise OSError("Can't serve")
+
+        monkeypatch.setattr(fake_server_module.web.SockSite, "start", fail)
+        server = FakeServer(entity_count=1)
+        with pytest.raises(OSError, match="Can't serve"):
+            server.start()
+        server.stop()
+
+    def test_latency(self):
+        with FakeServer(entity_count=1, latency=0.1) as server:
+            client_api = API("user@example.com", password="password", database="fakedb", server=server.url)
+            start = time.perf_counter()
+            client_api.authenticate()
+            assert time.perf_counter() - start >= 0.1
@@ -0,0 +1,352 @@
+# -*- coding: utf-8 -*-
+
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+
+import pytest
+
+from mygeotab.exceptions import MyGeotabException
+from mygeotab.ext import feed
+from mygeotab.ext.checkpoint import MemoryCheckpointStore
+from mygeotab.ext.feed import DataFeed, DataFeedListener, MultiDataFeed, PipelinedDataFeed
+
+
+class RecordingListener(DataFeedListener):
+    def __init__(self, keep_running=True):
+        self.batches = []
+        self.errors = []
+        self.keep_running = keep_running
+
+    def on_data(self, data):
+        self.batches.append(data)
+
+    def on_error(self, error):
+        self.errors.append(error)
+        return self.keep_running
+
+
+class FileListener(DataFeedListener):
+    """A picklable listener that records the process each batch was handled in."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def on_data(self, data):
+        with open(self.path, "a") as output:
+            output.write("{} {}\n".format(os.getpid(), data[0]["id"]))
+
+    def on_error(self, error):
+        return False
+
+
+def feed_error():
+    return MyGeotabException({"errors": [{"name": "OverLimitException", "message": "Too many requests"}]})
+
+
+class TestMultiDataFeed:
+    def test_polls_all_feeds_in_one_multi_call(self):
+        client_api = MagicMock()
+        client_api.multi_call.return_value = [
+            {"toVersion": "0000000000000002", "data": [{"id": "a1"}]},
+            {"toVersion": "0000000000000005", "data": [{"id": "b1"}, {"id": "b2"}]},
+        ]
+        log_listener = RecordingListener()
+        status_listener = RecordingListener()
+        multi_feed = MultiDataFeed(client_api, interval=0)
+        log_cursor = multi_feed.add_feed(log_listener, "LogRecord", results_limit=1000)
+        status_cursor = multi_feed.add_feed(status_listener, "StatusData", from_version="0000000000000004")
+
+        assert multi_feed._tick() is True
+
+        client_api.multi_call.assert_called_once_with(
+            [
+                (
+                    "GetFeed",
+                    dict(typeName="LogRecord", search=None, fromVersion=None, resultsLimit=1000),
+                ),
+                (
+                    "GetFeed",
+                    dict(typeName="StatusData", search=None, fromVersion="0000000000000004", resultsLimit=None),
+                ),
+            ]
+        )
+        assert log_listener.batches == [[{"id": "a1"}]]
+        assert status_listener.batches == [[{"id": "b1"}, {"id": "b2"}]]
+        assert log_cursor.version == "0000000000000002"
+        assert status_cursor.version == "0000000000000005"
+
+    def test_next_tick_resumes_from_versions(self):
+        client_api = MagicMock()
+        client_api.multi_call.return_value = [{"toVersion": "0000000000000009", "data": []}]
+        multi_feed = MultiDataFeed(client_api, interval=0)
+        multi_feed.add_feed(RecordingListener(), "Trip")
+        multi_feed._tick()
+        multi_feed._tick()
+        second_calls = client_api.multi_call.call_args_list[1][0][0]
+        assert second_calls[0][1]["fromVersion"] == "0000000000000009"
+
+    def test_error_is_sent_to_every_listener(self):
+        client_api = MagicMock()
+        client_api.multi_call.side_effect = feed_error()
+        listeners = [RecordingListener(), RecordingListener(keep_running=False)]
+        multi_feed = MultiDataFeed(client_api, interval=0)
+        for listener in listeners:
+            multi_feed.add_feed(listener, "FaultData")
+        multi_feed.start(threaded=False)
+        assert client_api.multi_call.call_count == 1
+        assert all(len(listener.errors) == 1 for listener in listeners)
+        assert multi_feed.running is False
+
+    def test_start_without_feeds_raises(self):
+        with pytest.raises(Exception, match="At least one feed"):
+            MultiDataFeed(MagicMock(), interval=0).start(threaded=False)
+
+
+def feed_result(count, to_version="0000000000000010"):
+    return {"toVersion": to_version, "data": [{"id": "a{}".format(i)} for i in range(count)]}
+
+
+class TestAdaptiveDataFeed:
+    def test_fixed_interval_by_default(self):
+        data_feed = DataFeed(MagicMock(), RecordingListener(), "LogRecord", interval=10, results_limit=2)
+        assert data_feed._next_interval([{}, {}]) == 10
+        assert data_feed._next_interval([]) == 10
+
+    def test_full_page_polls_immediately(self):
+        data_feed = DataFeed(MagicMock(), RecordingListener(), "LogRecord", interval=10, results_limit=2, adaptive=True)
+        assert data_feed._next_interval([{}, {}]) == 0
+
+    def test_empty_pages_back_off_to_ceiling(self):
+        data_feed = DataFeed(MagicMock(), RecordingListener(), "LogRecord", interval=10, adaptive=True, max_interval=35)
+        assert [data_feed._next_interval([]) for _ in range(4)] == [20, 35, 35, 35]
+        assert data_feed._next_interval([{}]) == 10
+
+    def test_errors_use_base_interval(self):
+        data_feed = DataFeed(MagicMock(), RecordingListener(), "LogRecord", interval=10, adaptive=True)
+        data_feed._next_interval([])
+        assert data_feed._next_interval(None) == 10
+
+    def test_catches_up_without_sleeping(self, monkeypatch):
+        sleeps = []
+        monkeypatch.setattr(feed, "sleep", sleeps.append)
+        client_api = MagicMock()
+        client_api.call.side_effect = [feed_result(2), feed_result(2), feed_result(1), feed_error()]
+        listener = RecordingListener(keep_running=False)
+        data_feed = DataFeed(client_api, listener, "LogRecord", interval=10, results_limit=2, adaptive=True)
+        data_feed.start(threaded=False)
+        assert len(listener.batches) == 3
+        assert sleeps == [10]
+
+    def test_stats(self):
+        client_api = MagicMock()
+        record_time = datetime.now(timezone.utc) - timedelta(minutes=5)
+        record = {"id": "a1", "dateTime": record_time}
+        client_api.call.return_value = {"toVersion": "0000000000000020", "data": [record]}
+        data_feed = DataFeed(client_api, RecordingListener(), "LogRecord", interval=10)
+        data_feed._poll()
+        data_feed._poll()
+        assert data_feed.stats.polls == 2
+        assert data_feed.stats.records == 2
+        assert data_feed.stats.last_batch_size == 1
+        assert 299 < data_feed.stats.lag < 360
+        assert data_feed.stats.version_rate is not None
+
+    def test_stats_lag_of_trips(self):
+        client_api = MagicMock()
+        stop = datetime.now(timezone.utc) - timedelta(minutes=5)
+        trip = {"id": "a1", "start": stop - timedelta(hours=1), "stop": stop}
+        client_api.call.return_value = {"toVersion": "0000000000000020", "data": [trip]}
+        data_feed = DataFeed(client_api, RecordingListener(), "Trip", interval=10)
+        data_feed._poll()
+        assert 299 < data_feed.stats.lag < 360
+
+
+class TestDataFeedCheckpoint:
+    def test_saves_version_after_listener(self):
+        store = MemoryCheckpointStore()
+        client_api = MagicMock()
+        client_api.call.return_value = feed_result(1, "0000000000000011")
+        data_feed = DataFeed(client_api, RecordingListener(), "LogRecord", interval=0, checkpoint_store=store)
+        data_feed._poll()
+        assert store.load("LogRecord") == "0000000000000011"
+
+    def test_listener_failure_does_not_save_version(self):
+        store = MemoryCheckpointStore()
+        client_api = MagicMock()
+        client_api.call.return_value = feed_result(1, "0000000000000011")
+        listener = MagicMock()
+        listener.on_data.side_effect = RuntimeError("Listener failed")
+        data_feed = DataFeed(client_api, listener, "LogRecord", interval=0, checkpoint_store=store)
+        with pytest.raises(RuntimeError):
+            data_feed._poll()
+        assert store.load("LogRecord") is None
+
+    def test_resumes_from_saved_version(self):
+        store = MemoryCheckpointStore()
+        store.save("vehicle-logs", "0000000000000033")
+        client_api = MagicMock()
+        client_api.call.side_effect = feed_error()
+        data_feed = DataFeed(
+            client_api,
+            RecordingListener(keep_running=False),
+            "LogRecord",
+            interval=0,
+            checkpoint_store=store,
+            checkpoint_key="vehicle-logs",
+        )
+        data_feed.start(threaded=False)
+        assert client_api.call.call_args[1]["from_version"] == "0000000000000033"
+
+    def test_multi_feed_resumes_and_saves(self):
+        store = MemoryCheckpointStore()
+        store.save("StatusData", "0000000000000007")
+        client_api = MagicMock()
+        client_api.multi_call.side_effect = [
+            [feed_result(0, "0000000000000002"), feed_result(0, "0000000000000008")],
+            feed_error(),
+        ]
+        multi_feed = MultiDataFeed(client_api, interval=0, checkpoint_store=store)
+        multi_feed.add_feed(RecordingListener(keep_running=False), "LogRecord")
+        multi_feed.add_feed(RecordingListener(keep_running=False), "StatusData")
+        multi_feed.start(threaded=False)
+        first_calls = client_api.multi_call.call_args_list[0][0][0]
+        assert first_calls[1][1]["fromVersion"] == "0000000000000007"
+        assert store.load("LogRecord") == "0000000000000002"
+        assert store.load("StatusData") == "0000000000000008"
+
+
+class RecordingCheckpointStore(MemoryCheckpointStore):
+    def __init__(self):
+        super().__init__()
+        self.saved = []
+
+    def save(self, key, version):
+        self.saved.append(version)
+        super().save(key, version)
+
+
+def versioned_results(count):
+    return [
+        {"toVersion": "{:016x}".format(version), "data": [{"id": "b{}".format(version)}]}
+        for version in range(1, count + 1)
+    ]
+
+
+class TestPipelinedDataFeed:
+    def test_fetches_while_listener_processes(self):
+        fetched_ahead = threading.Event()
+        results = versioned_results(3)
+
+        def get_feed(*args, **kwargs):
+            if not results:
+                raise feed_error()
+            if len(results) == 1:
+                fetched_ahead.set()
+            return results.pop(0)
+
+        class SlowListener(RecordingListener):
+            def on_data(self, data):
+                if not self.batches:
+                    self.fetched_ahead = fetched_ahead.wait(5)
+                super().on_data(data)
+
+        client_api = MagicMock()
+        client_api.call.side_effect = get_feed
+        listener = SlowListener(keep_running=False)
+        data_feed = PipelinedDataFeed(client_api, listener, "LogRecord", interval=0, queue_size=2)
+        data_feed.start(threaded=False)
+        assert listener.fetched_ahead is True
+        assert len(listener.batches) == 3
+
+    def test_queue_bounds_fetching(self):
+        release = threading.Event()
+        client_api = MagicMock()
+        client_api.call.side_effect = versioned_results(10) + [feed_error()]
+
+        class BlockedListener(RecordingListener):
+            def on_data(self, data):
+                release.wait(5)
+                super().on_data(data)
+
+        listener = BlockedListener(keep_running=False)
+        data_feed = PipelinedDataFeed(client_api, listener, "LogRecord", interval=0, queue_size=1)
+        data_feed.start()
+        time.sleep(0.3)
+        # One batch processing, one waiting in the queue, and one waiting for space in the queue
+        assert client_api.call.call_count == 3
+        release.set()
+        data_feed._thread.join(5)
+        assert len(listener.batches) == 10
+
+    def test_workers_checkpoint_in_order(self):
+        store = RecordingCheckpointStore()
+        client_api = MagicMock()
+        client_api.call.side_effect = versioned_results(6) + [feed_error()]
+
+        class ReversedListener(RecordingListener):
+            def on_data(self, data):
+                # Earlier batches take longer, so they finish last
+                time.sleep(0.05 * (7 - int(data[0]["id"][1:])))
+                super().on_data(data)
+
+        data_feed = PipelinedDataFeed(
+            client_api,
+            ReversedListener(keep_running=False),
+            "LogRecord",
+            interval=0,
+            workers=3,
+            checkpoint_store=store,
+        )
+        data_feed.start(threaded=False)
+        assert store.saved == ["{:016x}".format(version) for version in range(1, 7)]
+
+    def test_listener_error_stops_feed(self):
+        client_api = MagicMock()
+        client_api.call.side_effect = versioned_results(100)
+        listener = MagicMock()
+        listener.on_data.side_effect = RuntimeError("Listener failed")
+        data_feed = PipelinedDataFeed(client_api, listener, "LogRecord", interval=0)
+        with pytest.raises(RuntimeError):
+            data_feed.start(threaded=False)
+        assert data_feed.running is False
+        assert isinstance(data_feed.error, RuntimeError)
+
+    def test_invalid_options(self):
+        with pytest.raises(ValueError):
+            PipelinedDataFeed(MagicMock(), RecordingListener(), "LogRecord", interval=0, queue_size=0)
+        with pytest.raises(ValueError):
+            PipelinedDataFeed(MagicMock(), RecordingListener(), "LogRecord", interval=0, workers=0)
+
+
+class TestProcessPoolDataFeed:
+    def test_batches_processed_in_worker_processes(self, tmp_path):
+        output_path = str(tmp_path / "batches.txt")
+        store = RecordingCheckpointStore()
+        client_api = MagicMock()
+        client_api.call.side_effect = versioned_results(5) + [feed_error()]
+        data_feed = PipelinedDataFeed(
+            client_api,
+            FileListener(output_path),
+            "LogRecord",
+            interval=0,
+            workers=2,
+            executor="process",
+            checkpoint_store=store,
+        )
+        data_feed.start(threaded=False)
+        with open(output_path) as output:
+            lines = [line.split() for line in output.read().splitlines()]
+        assert sorted(entity_id for _, entity_id in lines) == ["b1", "b2", "b3", "b4", "b5"]
+        assert all(int(pid) != os.getpid() for pid, _ in lines)
+        assert store.saved == ["{:016x}".format(version) for version in range(1, 6)]
+
+    def test_listener_must_be_picklable(self):
+        with pytest.raises(ValueError, match="picklable"):
+            PipelinedDataFeed(MagicMock(), threading.Lock(), "LogRecord", interval=0, executor="process")
+
+    def test_invalid_executor(self):
+        with pytest.raises(ValueError):
+            PipelinedDataFeed(MagicMock(), RecordingListener(), "LogRecord", interval=0, executor="fiber")
@@ -0,0 +1,278 @@
+# -*- coding: utf-8 -*-
+
+import logging
+
+import pytest
+
+from mygeotab import API, MyGeotabException
+from mygeotab.hooks import CallHook, CallInfo, LoggingHook, measure_call
+from tests.conftest import StoppingListener
+
+
+class RecordingHook(CallHook):
+    def __init__(self):
+        self.before = []
+        self.after = []
+        self.operations = []
+
+    def before_call(self, call_info):
+        self.before.append(call_info.method)
+
+    def after_call(self, call_info):
+        self.after.append(call_info)
+
+    def before_operation(self, operation_info):
+        self.before.append(operation_info.name)
+
+    def after_operation(self, operation_info):
+        self.operations.append(operation_info)
+
+
+class FailingHook(CallHook):
+    def before_call(self, call_info):
+        raise ValueError("Broken hook")
+
+
+@pytest.fixture
+def hook():
+    return RecordingHook()
+
+
+@pytest.fixture
+def fake_api(fake_server, hook):
+    return API("user@example.com", password="password", database="fakedb", server=fake_server.url, hooks=[hook])
+
+
+class TestCallInfo:
+    def test_hides_credentials(self):
+        call_info = CallInfo("Get", dict(typeName="Device", credentials=dict(sessionId="123"), password="secret"))
+        assert call_info.parameters == dict(typeName="Device")
+        assert call_info.type_name == "Device"
+
+    def test_hides_session_id(self):
+        call_info = CallInfo("ExtendSession", dict(database="fakedb", userName="user@example.com", sessionId="123"))
+        assert call_info.parameters == dict(database="fakedb", userName="user@example.com")
+
+    def test_counts_results(self):
+        call_info = CallInfo("GetFeed", dict(typeName="LogRecord"))
+        call_info.set_result(dict(toVersion="0000000000000001", data=[{}, {}]))
+        assert call_info.result_count == 2
+        call_info.set_result("b1")
+        assert call_info.result_count == 2
+
+
+class TestMeasureCall:
+    def test_records_phases(self):
+        call_info = CallInfo("Get", dict(typeName="Device"))
+        measurement = measure_call(call_info)
+        with pytest.raises(ValueError):
+            with measurement.phase("deserialize"):
+                raise ValueError("Bad JSON")
+        measurement.record(status_code=200, bytes_received=10)
+        assert measurement.set_result([{}]) == [{}]
+        assert call_info.deserialize_time > 0
+        assert call_info.status_code == 200
+        assert call_info.bytes_received == 10
+        assert call_info.result_count == 1
+
+    def test_without_call_info(self):
+        measurement = measure_call(None)
+        with measurement.phase("serialize"):
+            measurement.record(bytes_sent=10)
+        assert measurement.set_result("b1") == "b1"
+
+
+class TestHooks:
+    def test_call(self, fake_api, hook):
+        devices = fake_api.get("Device", resultsLimit=10)
+        assert hook.before == ["Authenticate", "Get"]
+        authenticate, call_info = hook.after
+        assert "password" not in authenticate.parameters
+        assert call_info.type_name == "Device"
+        assert call_info.status_code == 200
+        assert call_info.result_count == len(devices) == 10
+        assert call_info.bytes_sent > 0
+        assert call_info.bytes_received > call_info.bytes_sent
+        assert call_info.serialize_time > 0
+        assert call_info.network_time > 0
+        assert call_info.deserialize_time > 0
+        assert call_info.total_time >= call_info.network_time
+        assert call_info.succeeded
+
+    def test_never_sees_secrets(self, fake_server, hook, caplog):
+        caplog.set_level(logging.DEBUG, logger="mygeotab.hooks")
+        hooks = [hook, LoggingHook()]
+        authenticating_api = API("user@example.com", password="password", database="fakedb", server=fake_server.url)
+        credentials = authenticating_api.authenticate()
+        client_api = API(
+            "user@example.com",
+            session_id=credentials.session_id,
+            database="fakedb",
+            server=fake_server.url,
+            hooks=hooks,
+        )
+        client_api.authenticate()
+        client_api.get("Device", resultsLimit=1)
+        assert [call_info.method for call_info in hook.after] == ["ExtendSession", "Get"]
+        for call_info in hook.after:
+            assert "sessionId" not in call_info.parameters
+            assert "credentials" not in call_info.parameters
+            assert credentials.session_id not in repr(call_info.parameters)
+        assert credentials.session_id not in caplog.text
+
+    def test_exception(self, fake_api, fake_server, hook):
+        fake_api.authenticate()
+        fake_server.fail_next("ArgumentException", "Bad search")
+        with pytest.raises(MyGeotabException):
+            fake_api.get("Device")
+        call_info = hook.after[-1]
+        assert isinstance(call_info.exception, MyGeotabException)
+        assert not call_info.succeeded
+        assert call_info.result_count is None
+
+    def test_retries(self, fake_api, fake_server, hook):
+        fake_api.authenticate()
+        fake_server.expire_sessions()
+        fake_api.credentials.password = "password"
+        fake_api.get("Device", resultsLimit=1)
+        assert hook.before[-3:] == ["Get", "Authenticate", "Get"]
+        assert [call_info.retries for call_info in hook.after[-3:]] == [0, 1, 1]
+
+    @pytest.mark.asyncio
+    async def test_call_async(self, fake_api, hook):
+        await fake_api.get_async("Device", resultsLimit=5)
+        call_info = hook.after[-1]
+        assert call_info.method == "Get"
+        assert call_info.status_code == 200
+        assert call_info.result_count == 5
+        assert call_info.bytes_received > 0
+        assert call_info.network_time > 0
+
+    def test_failing_hook_does_not_break_call(self, fake_server, caplog):
+        client_api = API("user@example.com", password="password", database="fakedb", server=fake_server.url)
+        client_api.hooks.append(FailingHook())
+        assert len(client_api.get("Device", resultsLimit=2)) == 2
+        assert "Broken hook" in caplog.text
+
+    def test_operation(self, fake_api, hook):
+        with pytest.raises(MyGeotabException):
+            with fake_api.operation("Import", type_name="Device") as operation:
+                fake_api.get("Device", resultsLimit=1)
+                operation.attributes["count"] = 1
+                raise MyGeotabException(dict(errors=[dict(name="ArgumentException", message="Bad device")]))
+        assert hook.before == ["Import", "Authenticate", "Get"]
+        (operation_info,) = hook.operations
+        assert operation_info.attributes == dict(type_name="Device", count=1)
+        assert operation_info.total_time >= hook.after[-1].total_time
+        assert not operation_info.succeeded
+
+    def test_no_hooks(self, fake_server):
+        client_api = API("user@example.com", password="password", database="fakedb", server=fake_server.url)
+        assert client_api._new_call_info("Get", {}) is None
+        with client_api.operation("Import") as operation:
+            assert operation is None
+        assert len(client_api.get("Device", resultsLimit=2)) == 2
+
+
+class TestLoggingHook:
+    def test_logs_calls(self, fake_server, caplog):
+        caplog.set_level(logging.DEBUG, logger="mygeotab.hooks")
+        client_api = API(
+            "user@example.com", password="password", database="fakedb", server=fake_server.url, hooks=[LoggingHook()]
+        )
+        client_api.get("Device", resultsLimit=3)
+        record = caplog.records[-1]
+        assert record.levelno == logging.DEBUG
+        assert record.getMessage().startswith("Get(Device): ")
+        assert "3 results" in record.getMessage()
+
+    def test_logs_slow_calls_as_warnings(self, caplog):
+        call_info = CallInfo("Get", dict(typeName="Device"))
+        call_info.total_time = 2.0
+        LoggingHook(slow_threshold=1.0).after_call(call_info)
+        assert caplog.records[-1].levelno == logging.WARNING
+
+
+class TestPrometheusHook:
+    @pytest.fixture
+    def registry(self):
+        return pytest.importorskip("prometheus_client").CollectorRegistry()
+
+    @pytest.fixture
+    def metered_api(self, fake_server, registry):
+        from mygeotab.ext.metrics import PrometheusHook
+
+        return API(
+            "user@example.com",
+            password="password",
+            database="fakedb",
+            server=fake_server.url,
+            hooks=[PrometheusHook(registry=registry)],
+        )
+
+    def test_records_metrics(self, metered_api, registry):
+        metered_api.get("Device", resultsLimit=3)
+        metered_api.get("Device", resultsLimit=3)
+        labels = dict(method="Get", type_name="Device")
+        assert registry.get_sample_value("mygeotab_requests_total", labels) == 2
+        assert registry.get_sample_value("mygeotab_request_duration_seconds_count", labels) == 2
+        assert registry.get_sample_value("mygeotab_response_bytes_total", labels) > 0
+        assert registry.get_sample_value("mygeotab_entities_total", labels) == 6
+        network = dict(labels, phase="network")
+        assert registry.get_sample_value("mygeotab_request_phase_duration_seconds_count", network) == 2
+
+    def test_records_errors_and_reauthentications(self, metered_api, fake_server, registry):
+        metered_api.authenticate()
+        fake_server.fail_next("ArgumentException")
+        with pytest.raises(MyGeotabException):
+            metered_api.get("Device")
+        fake_server.expire_sessions()
+        metered_api.credentials.password = "password"
+        metered_api.get("Device", resultsLimit=1)
+        labels = dict(method="Get", type_name="Device")
+        assert registry.get_sample_value("mygeotab_errors_total", dict(labels, exception="ArgumentException")) == 1
+        assert registry.get_sample_value("mygeotab_errors_total", dict(labels, exception="InvalidUserException")) == 1
+        assert registry.get_sample_value("mygeotab_reauthentications_total") == 1
+
+    def test_records_feed_progress(self, metered_api, registry):
+        from mygeotab.ext.feed import DataFeed
+
+        listener = StoppingListener(stop_after=2)
+        listener.feed = DataFeed(metered_api, listener, "LogRecord", 0, results_limit=10)
+        listener.feed.start(threaded=False)
+        labels = dict(feed="LogRecord")
+        assert registry.get_sample_value("mygeotab_feed_records_total", labels) == 20
+        assert registry.get_sample_value("mygeotab_feed_lag_seconds", labels) > 0
+        assert registry.get_sample_value("mygeotab_feed_version_rate", labels) > 0
+
+
+class TestTracingHook:
+    def test_creates_spans(self, fake_server):
+        pytest.importorskip("opentelemetry.sdk")
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+        from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+        from opentelemetry.trace import StatusCode
+
+        from mygeotab.ext.tracing import TracingHook
+
+        exporter = InMemorySpanExporter()
+        tracer_provider = TracerProvider()
+        tracer_provider.add_span_processor(SimpleSpanProcessor(exporter))
+        client_api = API(
+            "user@example.com",
+            password="password",
+            database="fakedb",
+            server=fake_server.url,
+            hooks=[TracingHook(tracer_provider=tracer_provider)],
+        )
+        client_api.get("Device", resultsLimit=3)
+        fake_server.fail_next("ArgumentException")
+        with pytest.raises(MyGeotabException):
+            client_api.get("Device")
+        authenticate, get, failed = exporter.get_finished_spans()
+        assert authenticate.name == "MyGeotab Authenticate"
+        assert get.name == "MyGeotab Get"
+        assert get.attributes["mygeotab.type_name"] == "Device"
+        assert get.attributes["mygeotab.result_count"] == 3
+        assert failed.status.status_code == StatusCode.ERROR
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+
+import subprocess
+import sys
+
+import pytest
+
+import mygeotab
+
+SLOW_MODULES = ("aiohttp", "arrow", "asyncio", "pandas", "pyarrow")
+
+
+def imported_modules(statement):
+    """Runs an import statement in a new interpreter, and gets the slow modules it imported."""
+    script = "import sys\n{}\nprint(','.join(name for name in {!r} if name in sys.modules))".format(
+        statement, SLOW_MODULES
+    )
+    output = subprocess.run([sys.executable, "-c", script], check=True, capture_output=True, text=True).stdout
+    return [name for name in output.strip().split(",") if name]
+
+
+class TestLazyImports:
+    @pytest.mark.parametrize(
+        "statement", ["import mygeotab", "import mygeotab.cli", "from mygeotab.ext import DataFeed"]
+    )
+    def test_slow_modules_are_not_imported(self, statement):
+        assert imported_modules(statement) == []
+
+    def test_async_api_is_imported_on_first_use(self):
+        assert imported_modules("from mygeotab import API") == ["asyncio"]
+        assert mygeotab.API is mygeotab.api_async.API
+        assert "API" in dir(mygeotab)
+
+    def test_unknown_attribute(self):
+        with pytest.raises(AttributeError):
+            _ = mygeotab.Unknown
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+
+import pstats
+
+import pytest
+
+from mygeotab import API
+from mygeotab.ext.feed import DataFeed
+from mygeotab import profiling
+from mygeotab.profiling import ProfilingHook, clear_profiling_hooks, get_profiling_hook
+from tests.conftest import StoppingListener
+
+
+@pytest.fixture(autouse=True)
+def shared_hooks():
+    """Forgets the hooks that API objects shared during the test."""
+    yield
+    clear_profiling_hooks()
+
+
+def profiled_functions(path):
+    return {function for _, _, function in pstats.Stats(path).stats}
+
+
+class TestGetProfilingHook:
+    def test_off_by_default(self, monkeypatch):
+        monkeypatch.delenv("MYGEOTAB_PROFILE", raising=False)
+        assert get_profiling_hook() is None
+        monkeypatch.setenv("MYGEOTAB_PROFILE", "0")
+        assert get_profiling_hook() is None
+
+    def test_environment_variable(self, monkeypatch, tmp_path):
+        path = str(tmp_path / "calls.prof")
+        monkeypatch.setenv("MYGEOTAB_PROFILE", path)
+        monkeypatch.setenv("MYGEOTAB_PROFILE_INTERVAL", "5")
+        hook = get_profiling_hook()
+        assert hook.path == path
+        assert hook.interval == 5
+        assert get_profiling_hook() is hook
+        assert get_profiling_hook(False) is None
+        client_api = API("user@example.com", password="password", server="127.0.0.1")
+        assert client_api.hooks == [hook]
+
+    def test_default_path(self, monkeypatch):
+        monkeypatch.setenv("MYGEOTAB_PROFILE", "true")
+        assert get_profiling_hook().path.endswith(".prof")
+
+    def test_clear_profiling_hooks(self, tmp_path):
+        path = str(tmp_path / "calls.prof")
+        hook = get_profiling_hook(path)
+        clear_profiling_hooks()
+        assert profiling._hooks_by_path == {}
+        assert get_profiling_hook(path) is not hook
+
+    def test_unsupported_profiler(self):
+        with pytest.raises(ValueError):
+            ProfilingHook(profiler="perf")
+
+
+class TestProfilingHook:
+    def test_profiles_calls(self, fake_server, tmp_path):
+        path = str(tmp_path / "calls.prof")
+        client_api = API("user@example.com", password="password", server=fake_server.url, profile=path)
+        client_api.get("Device", resultsLimit=5)
+        client_api.hooks[0].dump()
+        functions = profiled_functions(path)
+        assert "_query" in functions
+        assert "json_serialize" in functions
+        assert "json_deserialize" in functions
+
+    def test_profiles_data_feed_polls(self, fake_server, tmp_path):
+        path = str(tmp_path / "feed.prof")
+        client_api = API("user@example.com", password="password", server=fake_server.url, profile=path)
+        listener = StoppingListener()
+        listener.feed = DataFeed(client_api, listener, "LogRecord", 0)
+        listener.feed.start(threaded=False)
+        client_api.hooks[0].dump()
+        functions = profiled_functions(path)
+        assert "_poll" not in functions  # The operation starts within the poll
+        assert "on_data" in functions
+        assert "_fetch" in functions
+
+    def test_writes_periodically(self, fake_server, tmp_path):
+        path = tmp_path / "calls.prof"
+        hook = ProfilingHook(str(path), interval=0)
+        client_api = API("user@example.com", password="password", server=fake_server.url, hooks=[hook])
+        client_api.get("Device", resultsLimit=1)
+        hook.close()
+        assert path.exists()
+
+    def test_pyinstrument(self, fake_server, tmp_path):
+        pytest.importorskip("pyinstrument")
+        from pyinstrument.session import Session
+
+        path = str(tmp_path / "calls.pyisession")
+        hook = ProfilingHook(path, profiler="pyinstrument")
+        client_api = API("user@example.com", password="password", server=fake_server.url, hooks=[hook])
+        for _ in range(3):
+            client_api.get("Device")
+        hook.close()
+        assert Session.load(path).duration > 0
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+
+import pickle
+import sys
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import pytest
+
+from mygeotab.ext.records import API as RecordsAPI
+from mygeotab.ext.records import Record, record_class, to_records
+from mygeotab.serializers import json_serialize
+
+
+def get_log_record():
+    return {
+        "id": "a1",
+        "dateTime": datetime(2024, 1, 1, tzinfo=timezone.utc),
+        "device": {"id": "b1"},
+        "latitude": 43.45,
+        "longitude": -79.68,
+        "speed": 56,
+    }
+
+
+class TestRecords:
+    def test_fields_are_slots(self):
+        record = to_records("LogRecord", [get_log_record()])[0]
+        assert isinstance(record, Record)
+        assert not hasattr(record, "__dict__")
+        assert record.latitude == 43.45
+        assert record._extra is None
+
+    def test_dict_like_access(self):
+        record = to_records("LogRecord", [get_log_record()])[0]
+        assert record["device"] == {"id": "b1"}
+        assert record.get("missing") is None
+        assert "speed" in record
+        assert record == get_log_record()
+        assert dict(record) == get_log_record()
+        assert len(record) == 6
+
+    def test_unknown_fields_are_kept(self):
+        entity = dict(get_log_record(), isValid=True)
+        record = to_records("LogRecord", [entity])[0]
+        assert record["isValid"] is True
+        assert list(record) == ["id", "dateTime", "device", "latitude", "longitude", "speed", "isValid"]
+
+    def test_set_and_delete(self):
+        record = to_records("LogRecord", [{"id": "a1"}])[0]
+        with pytest.raises(KeyError):
+            record["speed"]
+        record["speed"] = 10
+        record["note"] = "hello"
+        assert record["speed"] == 10
+        del record["speed"]
+        del record["note"]
+        assert dict(record) == {"id": "a1"}
+        with pytest.raises(KeyError):
+            del record["speed"]
+
+    def test_field_hiding_a_method_is_kept_as_extra(self):
+        record = record_class("Custom", ("id", "values"))({"id": "x1", "values": [1, 2]})
+        assert record["values"] == [1, 2]
+        assert list(record.values()) == ["x1", [1, 2]]
+
+    def test_unknown_type_is_unchanged(self):
+        entities = [{"id": "b1"}]
+        assert to_records("Device", entities) == entities
+        assert type(to_records("Device", entities)[0]) is dict
+
+    def test_record_classes_are_cached(self):
+        assert record_class("LogRecord") is record_class("LogRecord")
+
+    def test_pickle(self):
+        record = to_records("LogRecord", [dict(get_log_record(), isValid=True)])[0]
+        unpickled = pickle.loads(pickle.dumps(record))
+        assert type(unpickled) is type(record)
+        assert unpickled == record
+
+    def test_serialize(self):
+        record = to_records("LogRecord", [{"id": "a1", "speed": 10}])[0]
+        assert json_serialize({"entity": record}) == '{"entity":{"id":"a1","speed":10}}'
+
+    def test_smaller_than_dict(self):
+        record = to_records("LogRecord", [get_log_record()])[0]
+        assert sys.getsizeof(record) < sys.getsizeof(get_log_record())
+
+    def test_records_api_get(self):
+        with patch("mygeotab.api._query", return_value=[get_log_record()]):
+            records_api = RecordsAPI("test@example.com", session_id="sid123", database="db")
+            result = records_api.get("LogRecord")
+        assert isinstance(result[0], Record)
+        assert result[0]["id"] == "a1"
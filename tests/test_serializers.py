@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 
+import sys
 from datetime import date, datetime
 
 import pytest
@@ -95,3 +96,33 @@ class TestDeserialization:
         assert utc_date.year == check_date.year
         assert utc_date.month == check_date.month
         assert utc_date.day == check_date.day
+
+
+class TestInternIds:
+    def test_shares_references(self):
+        data_str = '[{"id": "a1", "device": {"id": "b1"}}, {"id": "a2", "device": {"id": "b1"}}]'
+        data = json_deserialize(data_str, intern_ids=True)
+        assert data[0]["device"] == {"id": "b1"}
+        assert data[0]["device"] is data[1]["device"]
+
+    def test_interns_ids(self):
+        data_str = '[{"id": "a1", "driver": "UnknownDriverId"}, {"id": "a2", "driver": "UnknownDriverId"}]'
+        data = json_deserialize(data_str, intern_ids=True)
+        assert data[0]["driver"] is data[1]["driver"]
+        assert data[0]["id"] is sys.intern("a1")
+
+    def test_keeps_entities_with_other_fields(self):
+        data_str = '[{"device": {"id": "b1", "name": "Truck"}}, {"device": {"id": "b1", "name": "Van"}}]'
+        data = json_deserialize(data_str, intern_ids=True)
+        assert data[0]["device"]["name"] == "Truck"
+        assert data[1]["device"]["name"] == "Van"
+
+    def test_still_parses_dates(self):
+        data_str = '{"id": "a1", "dateTime": "2015-06-04T07:03:43Z"}'
+        data = json_deserialize(data_str, intern_ids=True)
+        assert data["dateTime"].year == 2015
+
+    def test_disabled_by_default(self):
+        data_str = '[{"device": {"id": "b1"}}, {"device": {"id": "b1"}}]'
+        data = json_deserialize(data_str)
+        assert data[0]["device"] is not data[1]["device"]
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from mygeotab.ext.checkpoint import MemoryCheckpointStore
+from mygeotab.ext.sharded import DEFAULT_MAX_WORKERS, ShardedDataFeed, shard_by_devices, shard_by_groups
+from tests.test_feed import RecordingListener, feed_error
+
+
+def log_record(entity_id, minute):
+    return {"id": entity_id, "dateTime": datetime(2024, 1, 1, 12, minute, tzinfo=timezone.utc)}
+
+
+def shard_results(params_by_group):
+    def get_feed(method, **params):
+        group_id = params["search"]["deviceSearch"]["groups"][0]["id"]
+        return params_by_group[group_id]
+
+    return get_feed
+
+
+SHARD_DATA = {
+    "b1": {"toVersion": "0000000000000003", "data": [log_record("a1", 1), log_record("a3", 3)]},
+    "b2": {"toVersion": "0000000000000004", "data": [log_record("a2", 2), log_record("a4", 4)]},
+}
+
+
+class TestShards:
+    def test_shard_by_groups(self):
+        shards = shard_by_groups(["b1", "b2"], search=dict(fromDate="2024-01-01"))
+        assert shards == {
+            "b1": dict(fromDate="2024-01-01", deviceSearch=dict(groups=[dict(id="b1")])),
+            "b2": dict(fromDate="2024-01-01", deviceSearch=dict(groups=[dict(id="b2")])),
+        }
+
+    def test_shard_by_devices(self):
+        assert shard_by_devices(["b3"]) == {"b3": dict(deviceSearch=dict(id="b3"))}
+
+
+class TestShardedDataFeed:
+    def test_each_shard_has_own_cursor_and_checkpoint(self):
+        store = MemoryCheckpointStore()
+        store.save("LogRecord:b2", "0000000000000001")
+        client_api = MagicMock()
+        client_api.call.side_effect = shard_results(SHARD_DATA)
+        listener = RecordingListener()
+        sharded_feed = ShardedDataFeed(
+            client_api, listener, "LogRecord", 0, shard_by_groups(["b1", "b2"]), checkpoint_store=store
+        )
+        sharded_feed._load_checkpoints()
+        sharded_feed._deliver([sharded_feed._fetch(cursor) for cursor in sharded_feed.cursors])
+        from_versions = sorted(str(call[1]["fromVersion"]) for call in client_api.call.call_args_list)
+        assert from_versions == ["0000000000000001", "None"]
+        assert listener.batches == [SHARD_DATA["b1"]["data"], SHARD_DATA["b2"]["data"]]
+        assert store.load("LogRecord:b1") == "0000000000000003"
+        assert store.load("LogRecord:b2") == "0000000000000004"
+
+    def test_merged_stream_is_ordered_by_time(self):
+        client_api = MagicMock()
+        client_api.call.side_effect = [
+            {"toVersion": "0000000000000003", "data": [log_record("a1", 1), log_record("a3", 3)]},
+            {"toVersion": "0000000000000004", "data": [log_record("a2", 2), log_record("a4", 4)]},
+            feed_error(),
+        ]
+        listener = RecordingListener(keep_running=False)
+        sharded_feed = ShardedDataFeed(
+            client_api, listener, "LogRecord", 0, shard_by_groups(["b1", "b2"]), merge=True, max_workers=1
+        )
+        sharded_feed.start(threaded=False)
+        assert [[entity["id"] for entity in batch] for batch in listener.batches] == [["a1", "a2", "a3", "a4"]]
+
+    def test_merged_trips_are_ordered_by_stop(self):
+        def trip(entity_id, minute):
+            stop = datetime(2024, 1, 1, 12, minute, tzinfo=timezone.utc)
+            return {"id": entity_id, "start": stop.replace(hour=11), "stop": stop}
+
+        client_api = MagicMock()
+        client_api.call.side_effect = [
+            {"toVersion": "0000000000000003", "data": [trip("a3", 3), trip("a1", 1)]},
+            {"toVersion": "0000000000000004", "data": [trip("a2", 2), trip("a4", 4)]},
+            feed_error(),
+        ]
+        listener = RecordingListener(keep_running=False)
+        sharded_feed = ShardedDataFeed(
+            client_api, listener, "Trip", 0, shard_by_groups(["b1", "b2"]), merge=True, max_workers=1
+        )
+        sharded_feed.start(threaded=False)
+        assert [[entity["id"] for entity in batch] for batch in listener.batches] == [["a1", "a2", "a3", "a4"]]
+
+    def test_failed_round_does_not_move_versions(self):
+        client_api = MagicMock()
+        client_api.call.side_effect = [SHARD_DATA["b1"], feed_error()]
+        listener = RecordingListener(keep_running=False)
+        sharded_feed = ShardedDataFeed(
+            client_api, listener, "LogRecord", 0, shard_by_groups(["b1", "b2"]), max_workers=1
+        )
+        sharded_feed.start(threaded=False)
+        assert listener.batches == []
+        assert [cursor.version for cursor in sharded_feed.cursors] == [None, None]
+
+    @pytest.mark.asyncio
+    async def test_run_async(self):
+        client_api = MagicMock()
+        results = shard_results(SHARD_DATA)
+        calls = []
+
+        async def get_feed(method, **params):
+            calls.append(params)
+            if len(calls) > 2:
+                raise feed_error()
+            return results(method, **params)
+
+        client_api.call_async = AsyncMock(side_effect=get_feed)
+        listener = RecordingListener(keep_running=False)
+        sharded_feed = ShardedDataFeed(client_api, listener, "LogRecord", 0, shard_by_groups(["b1", "b2"]), merge=True)
+        await sharded_feed.run_async()
+        assert [entity["id"] for entity in listener.batches[0]] == ["a1", "a2", "a3", "a4"]
+        assert [cursor.version for cursor in sharded_feed.cursors] == ["0000000000000003", "0000000000000004"]
+
+    @pytest.mark.asyncio
+    async def test_run_async_max_workers(self):
+        client_api = MagicMock()
+        results = shard_results(SHARD_DATA)
+        in_progress = []
+        max_in_progress = []
+
+        async def get_feed(method, **params):
+            in_progress.append(params)
+            max_in_progress.append(len(in_progress))
+            await asyncio.sleep(0)
+            in_progress.pop()
+            return results(method, **params)
+
+        client_api.call_async = AsyncMock(side_effect=get_feed)
+        listener = RecordingListener(keep_running=False)
+        sharded_feed = ShardedDataFeed(
+            client_api, listener, "LogRecord", 0, shard_by_groups(["b1", "b2"]), max_workers=1
+        )
+        listener.on_data = lambda data: setattr(sharded_feed, "running", False)
+        await sharded_feed.run_async()
+        assert max_in_progress == [1, 1]
+
+    def test_default_max_workers(self):
+        shards = shard_by_devices(map(str, range(100)))
+        sharded_feed = ShardedDataFeed(MagicMock(), RecordingListener(), "Device", 0, shards)
+        assert sharded_feed.max_workers == DEFAULT_MAX_WORKERS
+        sharded_feed = ShardedDataFeed(MagicMock(), RecordingListener(), "Device", 0, shard_by_devices(["b1", "b2"]))
+        assert sharded_feed.max_workers == 2
+
+    def test_requires_shards(self):
+        with pytest.raises(ValueError):
+            ShardedDataFeed(MagicMock(), RecordingListener(), "LogRecord", 0, {})
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from mygeotab import API
+from mygeotab.altitude import AltitudeAPI
+from mygeotab.ext.feed import DataFeed, PipelinedDataFeed
+from mygeotab.ext.sharded import ShardedDataFeed, shard_by_devices
+from mygeotab.hooks import inject_context
+from tests.conftest import StoppingListener
+
+pytest.importorskip("opentelemetry.sdk")
+
+from opentelemetry.sdk.trace import TracerProvider  # noqa: E402
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor  # noqa: E402
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter  # noqa: E402
+
+from mygeotab.ext.tracing import TracingHook, attached_context, propagate_context  # noqa: E402
+
+
+@pytest.fixture
+def exporter():
+    return InMemorySpanExporter()
+
+
+@pytest.fixture
+def tracer_provider(exporter):
+    tracer_provider = TracerProvider()
+    tracer_provider.add_span_processor(SimpleSpanProcessor(exporter))
+    return tracer_provider
+
+
+@pytest.fixture
+def traced_api(fake_server, tracer_provider):
+    client_api = API(
+        "user@example.com",
+        password="password",
+        database="fakedb",
+        server=fake_server.url,
+        hooks=[TracingHook(tracer_provider=tracer_provider)],
+    )
+    client_api.authenticate()
+    return client_api
+
+
+def spans_by_name(exporter):
+    spans = {}
+    for span in exporter.get_finished_spans():
+        spans.setdefault(span.name, []).append(span)
+    return spans
+
+
+def is_child(span, parent):
+    return span.parent is not None and span.parent.span_id == parent.context.span_id
+
+
+class TestCalls:
+    def test_multi_call_has_child_spans(self, traced_api, exporter):
+        traced_api.multi_call([("Get", dict(typeName="Device", resultsLimit=2)), ("GetVersion",)])
+        spans = spans_by_name(exporter)
+        (multi_call,) = spans["MyGeotab ExecuteMultiCall"]
+        (get,) = spans["MyGeotab Get"]
+        (version,) = spans["MyGeotab GetVersion"]
+        assert is_child(get, multi_call) and is_child(version, multi_call)
+        assert get.attributes["mygeotab.type_name"] == "Device"
+        assert get.attributes["mygeotab.result_count"] == 2
+        assert version.attributes["mygeotab.multi_call.index"] == 1
+        assert get.start_time >= multi_call.start_time and get.end_time <= multi_call.end_time
+
+    def test_call_async(self, traced_api, exporter, tracer_provider):
+        async def get_devices():
+            with tracer_provider.get_tracer("test").start_as_current_span("parent"):
+                await asyncio.gather(*[traced_api.get_async("Device", resultsLimit=1) for _ in range(3)])
+
+        asyncio.run(get_devices())
+        spans = spans_by_name(exporter)
+        assert len(spans["MyGeotab Get"]) == 3
+        assert all(is_child(span, spans["parent"][0]) for span in spans["MyGeotab Get"])
+
+
+class TestOperations:
+    def test_data_feed_poll(self, traced_api, exporter, tracer_provider):
+        listener = StoppingListener(tracer=tracer_provider.get_tracer("test"))
+        listener.feed = DataFeed(traced_api, listener, "Device", 0)
+        listener.feed.start(threaded=False)
+        spans = spans_by_name(exporter)
+        (poll,) = spans["DataFeed.poll"]
+        (get_feed,) = spans["MyGeotab GetFeed"]
+        assert is_child(get_feed, poll)
+        assert is_child(spans["process"][0], poll)
+        assert poll.attributes["mygeotab.type_name"] == "Device"
+        assert poll.attributes["mygeotab.records"] == len(listener.batches[0])
+
+    def test_pipelined_workers_continue_the_poll(self, traced_api, exporter, tracer_provider):
+        listener = StoppingListener(tracer=tracer_provider.get_tracer("test"))
+        listener.feed = PipelinedDataFeed(traced_api, listener, "Device", 0, workers=2)
+        listener.feed.start(threaded=False)
+        spans = spans_by_name(exporter)
+        assert is_child(spans["process"][0], spans["DataFeed.poll"][0])
+
+    def test_sharded_feed_fetches_shards_in_the_poll(self, traced_api, exporter, tracer_provider):
+        listener = StoppingListener(tracer=tracer_provider.get_tracer("test"))
+        shards = shard_by_devices(["b00000001", "b00000002"])
+        listener.feed = ShardedDataFeed(traced_api, listener, "LogRecord", 0, shards)
+        listener.feed.start(threaded=False)
+        spans = spans_by_name(exporter)
+        (poll,) = spans["ShardedDataFeed.poll"]
+        assert poll.attributes["mygeotab.shards"] == 2
+        assert len(spans["MyGeotab GetFeed"]) == 2
+        assert all(is_child(span, poll) for span in spans["MyGeotab GetFeed"])
+
+    def test_altitude_job(self, fake_server, exporter, tracer_provider):
+        altitude_api = AltitudeAPI(
+            "user@example.com",
+            session_id="123",
+            database="fakedb",
+            hooks=[TracingHook(tracer_provider=tracer_provider)],
+        )
+        job = {"id": "job-1", "status": {"state": "DONE"}, "rows": [{"row": 1}], "totalRows": 1}
+        result = {"errors": [], "apiResult": {"results": [job], "errors": [], "errorMessage": None}}
+        with patch.object(altitude_api, "call_api", return_value=result):
+            assert altitude_api.do({"serviceName": "svc", "functionParameters": {}}) == [{"row": 1}]
+        spans = spans_by_name(exporter)
+        (job_span,) = spans["AltitudeAPI.job"]
+        assert job_span.attributes["mygeotab.service_name"] == "svc"
+        for step in ("AltitudeAPI.create_job", "AltitudeAPI.wait_for_job", "AltitudeAPI.get_data"):
+            assert is_child(spans[step][0], job_span)
+        assert spans["AltitudeAPI.get_data"][0].attributes["mygeotab.job_id"] == "job-1"
+
+
+class TestPropagation:
+    def test_carrier(self, traced_api, tracer_provider):
+        tracer = tracer_provider.get_tracer("test")
+        with tracer.start_as_current_span("parent") as parent:
+            carrier = inject_context(traced_api.hooks)
+        assert "traceparent" in carrier
+        with attached_context(carrier):
+            with tracer.start_as_current_span("child") as child:
+                assert child.parent.span_id == parent.get_span_context().span_id
+        assert inject_context(traced_api.hooks) == {}
+
+    def test_propagate_context(self, tracer_provider):
+        from concurrent.futures import ThreadPoolExecutor
+
+        from opentelemetry import trace
+
+        tracer = tracer_provider.get_tracer("test")
+        with tracer.start_as_current_span("parent") as parent:
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                span = executor.submit(propagate_context(trace.get_current_span)).result()
+        assert span is parent